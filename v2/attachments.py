@@ -0,0 +1,459 @@
+# attachments.py
+
+# Usage:
+#   python3 attachments.py [--input FILE]            → Dry-run: list the files each CSL item would get
+#   python3 attachments.py [--input FILE] --commit   → Attach each item's "file" to its Zotero item
+#                                                      (parents are found in the dedup index, so
+#                                                      upload the items with pipeline.py first)
+#   python3 attachments.py --commit --parent KEY FILE [FILE ...]
+#                                                    → Attach files to the item with key KEY
+#                                                      (other options go before --parent)
+#   Options: --concurrency N (uploads at once, default ZOTERO_CONCURRENCY),
+#            --base-dir DIR (for relative paths; default: the input file's directory)
+
+"""
+Attach files (usually PDFs) to Zotero items as child attachment items.
+
+Each file goes through Zotero's upload handshake:
+1. a child item (itemType "attachment", linkMode "imported_file") is created
+   under the parent;
+2. POST <item>/file with the file's md5, size and mtime asks for an upload
+   authorization. Zotero answers {"exists": 1} if it already stores a file with
+   that md5, and nothing is uploaded;
+3. otherwise the file is POSTed to the URL Zotero returned, wrapped in the
+   `prefix` and `suffix` it sent;
+4. POST <item>/file with the uploadKey registers the upload.
+
+Files are never read into memory. They are hashed in one pass with a fixed
+1 MiB buffer. The upload body is a file-like object that the HTTP stack reads
+block by block, with a Content-Length, so a 500 MB scan needs the same few KB
+as a 50 KB article. Several files are uploaded at once (--concurrency), each
+on its own pooled connection.
+
+Every attachment is logged (ATTACHMENT_LOG_PATH) by parent key and md5: once
+when its child item is created, once when the upload is registered. A re-run
+skips finished files and reuses the child item of an unfinished one, so an
+interrupted run never leaves duplicate attachments.
+
+See: https://www.zotero.org/support/dev/web_api/v3/file_upload
+"""
+
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+
+from config import BIBNOW_DATA_DIR, DEDUP_INDEX_PATH, ZOTERO_CONCURRENCY, require_credentials
+from zotero_writer import get_client, split_batch_response
+from utils import option_value
+
+ATTACHMENT_LOG_PATH = os.path.join(BIBNOW_DATA_DIR, "attachments.jsonl")
+HASH_CHUNK_SIZE = 1 << 20  # bytes read per hashing step
+# What an upload authorization must contain when the file is not on Zotero yet
+UPLOAD_AUTHORIZATION_FIELDS = ("url", "contentType", "prefix", "suffix", "uploadKey")
+# JabRef / Better BibTeX style entries: "description:path:type"
+_DESCRIBED_PATH = re.compile(r"^[^:]*:(.+):[A-Za-z/+.-]*$")
+
+
+@dataclass(frozen=True)
+class FileInfo:
+    """What Zotero needs to know about a file before it is uploaded."""
+    path: str
+    filename: str
+    size: int
+    mtime: int  # milliseconds, as Zotero stores it
+    md5: str
+    content_type: str
+
+
+def file_fingerprint(path, chunk_size=HASH_CHUNK_SIZE):
+    """
+    Hash a file in one streaming pass with a single reused buffer, and take
+    its size and mtime from the same open file.
+
+    Raises:
+        ValueError: If the file changed while it was being read.
+    """
+    md5 = hashlib.md5(usedforsecurity=False)
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        before = os.fstat(f.fileno())
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            md5.update(view[:n])
+        after = os.fstat(f.fileno())
+    if (before.st_size, before.st_mtime_ns) != (after.st_size, after.st_mtime_ns):
+        raise ValueError(f"{path} changed while it was being read")
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    return FileInfo(path, os.path.basename(path), after.st_size, after.st_mtime_ns // 1_000_000,
+                    md5.hexdigest(), content_type)
+
+
+def attachment_paths(csl_item, base_dir=None):
+    """
+    Return the local files named by a CSL item's "file" field.
+
+    Accepts a path, a ";"-separated list of paths, a JSON list of them, and
+    JabRef / Better BibTeX entries ("description:path:type"). Relative paths
+    are taken relative to `base_dir`.
+    """
+    value = csl_item.get("file")
+    if not value:
+        return []
+    parts = value if isinstance(value, list) else str(value).split(";")
+    paths = []
+    for part in parts:
+        part = str(part).strip()
+        if not part:
+            continue
+        if not os.path.exists(part):
+            described = _DESCRIBED_PATH.match(part)
+            if described:
+                part = described.group(1).replace("\\:", ":")
+        if base_dir and not os.path.isabs(part):
+            part = os.path.join(base_dir, part)
+        paths.append(os.path.expanduser(part))
+    return paths
+
+
+def attachment_item(parent_key, info):
+    """The child attachment item created for a file before it is uploaded."""
+    return {
+        "itemType": "attachment",
+        "parentItem": parent_key,
+        "linkMode": "imported_file",
+        "title": info.filename,
+        "contentType": info.content_type,
+        "filename": info.filename,
+        "tags": [],
+    }
+
+
+class _UploadBody:
+    """
+    prefix + file + suffix as one read-only stream, of known length.
+
+    The HTTP stack reads it in small blocks, so only a block at a time is in
+    memory. seek(0) starts over (a retried upload sends the whole body again).
+    """
+
+    def __init__(self, path, size, prefix, suffix):
+        self._path = path
+        self._size = size
+        self._prefix = prefix
+        self._suffix = suffix
+        self._file = None
+        self._position = 0
+
+    def __len__(self):
+        return len(self._prefix) + self._size + len(self._suffix)
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if offset != 0 or whence != os.SEEK_SET:
+            raise OSError("upload bodies can only be rewound to the start")
+        if self._file is not None:
+            self._file.seek(0)
+        self._position = 0
+        return 0
+
+    def read(self, n=-1):
+        if n is None or n < 0:
+            n = len(self) - self._position
+        out = b""
+        position = self._position
+        end_of_file = len(self._prefix) + self._size
+        if position < len(self._prefix):
+            out = self._prefix[position:position + n]
+        elif position < end_of_file:
+            if self._file is None:
+                self._file = open(self._path, "rb")
+            out = self._file.read(min(n, end_of_file - position))
+            if not out:
+                raise ValueError(f"{self._path} is shorter than when it was hashed")
+        else:
+            offset = position - end_of_file
+            out = self._suffix[offset:offset + n]
+        self._position += len(out)
+        return out
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class AttachmentLog:
+    """
+    Append-only JSON-lines record of created and finished attachments,
+    keyed by parent key and md5. Safe to use from several threads.
+
+    Parameters:
+        path (str): Log file; earlier records are read on open.
+    """
+
+    def __init__(self, path=ATTACHMENT_LOG_PATH):
+        self.path = path
+        self._records = {}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn final line from a crash
+                    self._records[(record["parent"], record["md5"])] = record
+        self._fp = open(path, "a", encoding="utf-8")
+
+    def get(self, parent_key, md5):
+        with self._lock:
+            return self._records.get((parent_key, md5))
+
+    def record(self, event, parent_key, md5, key, path):
+        record = {"event": event, "parent": parent_key, "md5": md5, "key": key, "path": path}
+        with self._lock:
+            self._records[(parent_key, md5)] = record
+            self._fp.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._fp.flush()
+            os.fsync(self._fp.fileno())
+
+    def close(self):
+        self._fp.close()
+
+
+def _response_message(response, error=None):
+    if response is None:
+        return f"Network or connection error: {error}"
+    return f"HTTP {response.status_code}: {response.text.strip()[:200]}"
+
+
+class AttachmentUploader:
+    """
+    Create child attachment items and upload their files, several at a time.
+
+    Parameters:
+        client (ZoteroClient): Client for the library (default: get_client()).
+        concurrency (int): Files uploaded at once.
+        log (AttachmentLog): Where created / finished attachments are recorded (optional).
+    """
+
+    def __init__(self, client=None, concurrency=ZOTERO_CONCURRENCY, log=None):
+        self.concurrency = max(1, int(concurrency))
+        self.client = client or get_client(self.concurrency)
+        self.log = log
+
+    # --- one file ---
+
+    def _create_item(self, parent_key, info):
+        status_code, content, _stats = self.client.post_items([attachment_item(parent_key, info)])
+        (result,) = split_batch_response(status_code, content, 1)
+        if result["status"] == "failed":
+            raise RuntimeError(result["message"])
+        if result["status"] == "committed":
+            raise RuntimeError("attachment item created, but Zotero's answer was lost, so its key is unknown")
+        if self.log is not None:
+            self.log.record("created", parent_key, info.md5, result["key"], info.path)
+        return result["key"]
+
+    def _authorize(self, key, info):
+        response, _stats, error = self.client.request(
+            "POST", f"items/{key}/file",
+            data={"md5": info.md5, "filename": info.filename, "filesize": info.size, "mtime": info.mtime},
+            headers={"If-None-Match": "*"},
+        )
+        if response is not None and response.status_code == 412:
+            return {"exists": 1}  # this item already has the file (registered by an interrupted run)
+        if response is None or response.status_code != 200:
+            raise RuntimeError(f"upload authorization failed: {_response_message(response, error)}")
+        authorization = response.json()
+        if not isinstance(authorization, dict):
+            raise RuntimeError(f"upload authorization failed: unexpected answer {authorization!r:.200}")
+        if authorization.get("exists"):
+            return authorization
+        missing = [name for name in UPLOAD_AUTHORIZATION_FIELDS if name not in authorization]
+        if missing:
+            raise RuntimeError(f"upload authorization failed: answer lacks {', '.join(missing)}")
+        return authorization
+
+    def _upload(self, info, authorization):
+        body = _UploadBody(info.path, info.size, authorization["prefix"].encode("utf-8"),
+                           authorization["suffix"].encode("utf-8"))
+        try:
+            # The upload URL is not the Zotero API: the API key must not be sent there
+            response, _stats, error = self.client.request(
+                "POST", authorization["url"], data=body,
+                headers={"Content-Type": authorization["contentType"],
+                         "Zotero-API-Key": None, "Zotero-API-Version": None},
+            )
+        finally:
+            body.close()
+        if response is None or response.status_code != 201:
+            raise RuntimeError(f"file upload failed: {_response_message(response, error)}")
+
+    def _register(self, key, upload_key):
+        response, _stats, error = self.client.request(
+            "POST", f"items/{key}/file", data={"upload": upload_key}, headers={"If-None-Match": "*"},
+        )
+        if response is None or response.status_code != 204:
+            raise RuntimeError(f"upload registration failed: {_response_message(response, error)}")
+
+    def attach(self, parent_key, path):
+        """
+        Attach one file to the item `parent_key`.
+
+        Returns:
+            dict: {"status", "parent", "path", "key", "bytes", "message"}; status is
+                  "uploaded", "exists" (Zotero already had the file), "skipped"
+                  (attached by an earlier run) or "failed".
+        """
+        result = {"status": "failed", "parent": parent_key, "path": path, "key": None, "bytes": 0, "message": ""}
+        try:
+            info = file_fingerprint(path)
+            record = self.log.get(parent_key, info.md5) if self.log is not None else None
+            if record and record["event"] == "done":
+                return dict(result, status="skipped", key=record["key"], message="Attached by an earlier run")
+            key = record["key"] if record else self._create_item(parent_key, info)
+            result["key"] = key
+            authorization = self._authorize(key, info)
+            if authorization.get("exists"):
+                result.update(status="exists", message="Zotero already has this file")
+            else:
+                self._upload(info, authorization)
+                self._register(key, authorization["uploadKey"])
+                result.update(status="uploaded", bytes=info.size, message="Upload successful")
+            if self.log is not None:
+                self.log.record("done", parent_key, info.md5, key, path)
+        except (OSError, ValueError, KeyError, RuntimeError) as e:
+            # Reported for this file only; the other uploads go on. requests' exceptions are
+            # OSErrors, so they are caught here without importing requests in dry runs
+            result["message"] = str(e) if not isinstance(e, KeyError) else f"unexpected Zotero answer: missing {e}"
+        return result
+
+    # --- many files ---
+
+    def run(self, jobs, on_result=None):
+        """
+        Attach files for `jobs`, an iterable of (parent_key, path), with up to
+        `concurrency` uploads at once. Jobs are read lazily.
+
+        Parameters:
+            on_result (callable): on_result(index, result), called on this thread
+                                  as soon as each file is done.
+
+        Returns:
+            list: One result per job (see attach()), in input order.
+        """
+        ordered = {}
+        pending = {}
+
+        def drain(done):
+            for future in done:
+                index = pending.pop(future)
+                ordered[index] = future.result()
+                if on_result:
+                    on_result(index, ordered[index])
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for index, (parent_key, path) in enumerate(jobs):
+                if len(pending) >= self.concurrency:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    drain(done)
+                pending[pool.submit(self.attach, parent_key, path)] = index
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                drain(done)
+        return [ordered[i] for i in range(len(ordered))]
+
+
+def _report(index, result):
+    size = f" ({result['bytes'] / 1e6:.1f} MB)" if result["bytes"] else ""
+    if result["status"] == "uploaded":
+        print(f"📎 {result['path']}{size} → {result['key']}")
+    elif result["status"] == "failed":
+        print(f"❌ {result['path']}: {result['message']}")
+    else:
+        print(f"⏭️ {result['path']}: {result['message']} ({result['key']})")
+
+
+def attachment_jobs(csl_items, dedup, base_dir=None):
+    """
+    Yield (parent_key, path) for each file of each CSL item whose Zotero item
+    the dedup index knows.
+    """
+    from csl_mapper import csl_to_zotero
+
+    for csl_item in csl_items:
+        paths = attachment_paths(csl_item, base_dir)
+        if not paths:
+            continue
+        match = dedup.lookup(csl_to_zotero(csl_item))
+        if not match:
+            print(f"⚠️ {paths[0]}: its item is not in the dedup index (not uploaded yet?); skipped.")
+            continue
+        for path in paths:
+            yield match["zotero_key"], path
+
+
+def attach_files(jobs, concurrency=ZOTERO_CONCURRENCY, log_path=ATTACHMENT_LOG_PATH):
+    """Upload `jobs` ((parent_key, path) pairs), report each file and print a summary."""
+    log = AttachmentLog(log_path)
+    try:
+        results = AttachmentUploader(concurrency=concurrency, log=log).run(jobs, on_result=_report)
+    finally:
+        log.close()
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    if results:
+        print("📎 Attachments: " + ", ".join(f"{n} {status}" for status, n in sorted(counts.items())))
+    return results
+
+
+def main(argv):
+    from csl_stream import iter_csl_items_from_file
+    from dedup_index import DedupIndex
+
+    commit = "--commit" in argv
+    concurrency = option_value(argv, "--concurrency", ZOTERO_CONCURRENCY, int)
+    if "--parent" in argv:
+        parent_key = option_value(argv, "--parent")
+        paths = argv[argv.index("--parent") + 2:]  # options go before --parent
+        if not commit:
+            for path in paths:
+                print(f"[DRY-RUN] Would attach {path} to {parent_key}")
+            return
+        require_credentials()
+        attach_files(((parent_key, path) for path in paths), concurrency)
+        return
+
+    input_path = option_value(argv, "--input", "input.txt")
+    base_dir = option_value(argv, "--base-dir", os.path.dirname(os.path.abspath(input_path)))
+    items = iter_csl_items_from_file(input_path)
+    if not commit:
+        for csl_item in items:
+            for path in attachment_paths(csl_item, base_dir):
+                state = "" if os.path.isfile(path) else " (missing)"
+                print(f"[DRY-RUN] {csl_item.get('title', 'Untitled')}: would attach {path}{state}")
+        return
+    require_credentials()
+    dedup = DedupIndex(DEDUP_INDEX_PATH)
+    try:
+        attach_files(attachment_jobs(items, dedup, base_dir), concurrency)
+    finally:
+        dedup.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,251 @@
+# batch_journal.py
+
+"""
+Crash-safe, append-only journal for `--commit` runs, and `--resume` support.
+
+Every item is identified by the SHA-256 of its upload payload (the mapped
+Zotero item, which is derived deterministically from the CSL input). Before a
+POST, each item in it is journaled as `pending` together with the request's
+Zotero-Write-Token; once its note is written it is journaled as `done` with
+its Zotero key and note path. Each line is flushed and fsync'ed, so after a
+crash the journal says exactly which items were created.
+
+On resume:
+- `done` items are skipped (no network or disk work);
+- `pending` items are regrouped into their original requests and re-sent with
+  the *same* write token. If the first attempt never reached Zotero it is
+  processed normally; if it did, Zotero answers 412 and the items are marked
+  `committed` so their keys can be looked up instead of creating duplicates.
+
+See: https://www.zotero.org/support/dev/web_api/v3/write_requests (Zotero-Write-Token)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+from dedup_index import conflicting, identifiers_for
+from zotero_writer import send_batch_to_zotero, chunk_items, ZOTERO_MAX_BATCH_SIZE
+
+
+def payload_hash(zotero_item):
+    """Stable SHA-256 of a mapped Zotero item."""
+    data = json.dumps(zotero_item, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class BatchJournal:
+    """
+    Append-only JSON-lines journal. Safe to use from several threads (upload
+    workers record requests while the main thread records finished notes).
+
+    Parameters:
+        path (str): Journal file.
+        resume (bool): Replay an existing journal (True) or start a new one (False).
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self._items = {}   # hash -> latest record
+        self._tokens = {}  # write token -> number of items sent with it
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if resume and os.path.exists(path):
+            self._replay()
+        self._fp = open(path, "a" if resume else "w", encoding="utf-8")
+
+    def _replay(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn final line from a crash
+                self._apply(record)
+
+    def _apply(self, record):
+        if record.get("event") == "pending":
+            self._tokens[record["token"]] = record.get("size", 1)
+        self._items[record["hash"]] = record
+
+    def _append(self, *records):
+        # A request's records are applied and written together, and never interleave with another's
+        with self._lock:
+            for record in records:
+                self._apply(record)
+            self._fp.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+            self._fp.flush()
+            os.fsync(self._fp.fileno())
+
+    # --- recording ---
+
+    def record_pending(self, hashes, token):
+        self._append(*({"event": "pending", "hash": h, "token": token, "size": len(hashes)} for h in hashes))
+
+    def record_done(self, h, zotero_key, note_path):
+        self._append({"event": "done", "hash": h, "key": zotero_key, "note": note_path})
+
+    def record_failed(self, h, message):
+        self._append({"event": "failed", "hash": h, "message": message})
+
+    def record_committed(self, h, token):
+        """The write token was already used: the item exists in Zotero, key still unknown."""
+        self._append({"event": "committed", "hash": h, "token": token})
+
+    # --- queries ---
+
+    def get(self, h):
+        with self._lock:
+            return self._items.get(h)
+
+    def is_done(self, h):
+        record = self.get(h)
+        return bool(record) and record["event"] == "done"
+
+    def pending_token(self, h):
+        record = self.get(h)
+        return record["token"] if record and record["event"] == "pending" else None
+
+    def token_size(self, token):
+        """Number of items that were sent with `token`."""
+        with self._lock:
+            return self._tokens.get(token)
+
+    def token_for(self, hashes):
+        """
+        Reuse the write token of an interrupted request if `hashes` is exactly
+        that request's payload; otherwise issue a new token.
+        """
+        tokens = {self.pending_token(h) for h in hashes}
+        if len(tokens) == 1:
+            token = tokens.pop()
+            if token and self.token_size(token) == len(hashes):
+                return token
+        return uuid.uuid4().hex
+
+    def compact(self):
+        """
+        Rewrite the journal with only the `pending` records (requests whose
+        outcome is unknown, kept so a retry reuses their write tokens), and
+        forget every other record. For long-lived writers such as watch mode,
+        called between requests. Returns the number of records kept.
+        """
+        with self._lock:
+            kept = [record for record in self._items.values() if record["event"] == "pending"]
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in kept))
+                f.flush()
+                os.fsync(f.fileno())
+            self._fp.close()
+            os.replace(tmp_path, self.path)
+            self._fp = open(self.path, "a", encoding="utf-8")
+            self._items = {record["hash"]: record for record in kept}
+            self._tokens = {record["token"]: record.get("size", 1) for record in kept}
+        return len(kept)
+
+    def close(self):
+        self._fp.close()
+
+
+def outcome_unknown(status_code):
+    """
+    True if a request may or may not have reached Zotero: no response at all
+    (status 0, e.g. a timeout) or a server error after the client's retries.
+    A 2xx or 4xx answer is definite.
+    """
+    return not 200 <= status_code < 500
+
+
+class JournaledSender:
+    """
+    Drop-in for zotero_writer.send_batch_to_zotero that journals each request
+    and reuses write tokens for interrupted requests.
+
+    If the outcome of a request is unknown (see outcome_unknown), its items
+    stay `pending` with their token and their results carry "retry": True, so
+    a retry or --resume sends the same request again and gets 412 if the
+    first attempt went through. Only items Zotero definitely rejected are
+    journaled as `failed`.
+    """
+
+    def __init__(self, journal, send=send_batch_to_zotero):
+        self.journal = journal
+        self.send = send
+
+    def __call__(self, zotero_items):
+        hashes = [payload_hash(z) for z in zotero_items]
+        token = self.journal.token_for(hashes)
+        self.journal.record_pending(hashes, token)
+
+        status_code, response, results = self.send(zotero_items, write_token=token)
+        if status_code == 412:
+            # Token already used: an earlier identical request went through (an
+            # interrupted run, or the client's own retry); results say "committed"
+            for h in hashes:
+                self.journal.record_committed(h, token)
+        elif outcome_unknown(status_code):
+            results = [dict(result, retry=True,
+                            message=f"{result['message']} (may have reached Zotero; kept for a retry "
+                                    f"with the same write token)") for result in results]
+        else:
+            for h, result in zip(hashes, results):
+                if result["status"] == "failed":
+                    self.journal.record_failed(h, result["message"])
+        return status_code, response, results
+
+
+def regroup_for_resume(entries, journal, batch_size=ZOTERO_MAX_BATCH_SIZE, zotero_item=lambda e: e[0]):
+    """
+    Chunk `entries` for upload so that items interrupted mid-request are sent
+    again as exactly the same request (and so with the same write token).
+    Other items are chunked normally, in input order.
+    """
+    batch_size = max(1, min(int(batch_size), ZOTERO_MAX_BATCH_SIZE))
+    groups = {}
+    fresh = []
+    for entry in entries:
+        token = journal.pending_token(payload_hash(zotero_item(entry)))
+        if token:
+            group = groups.setdefault(token, [])
+            group.append(entry)
+            if len(group) == journal.token_size(token):
+                yield groups.pop(token)
+            continue
+        fresh.append(entry)
+        if len(fresh) == batch_size:
+            yield fresh
+            fresh = []
+    # Interrupted requests whose items no longer all appear in the input get new tokens
+    for group in groups.values():
+        yield from chunk_items(group, batch_size)
+    if fresh:
+        yield fresh
+
+
+def resolve_committed_keys(zotero_items, mirror, client):
+    """
+    Find the Zotero keys of items an interrupted run created (412 on resume) by
+    syncing the local library mirror and matching identifiers (DOI, ISBN, URL,
+    title fingerprint). A library item with a different DOI or ISBN never
+    matches. zotero_items may be dicts or records.ItemRecords. Returns a list
+    of keys (or None), aligned with zotero_items.
+    """
+    mirror.sync(client)
+    item_ids = [identifiers_for(item) for item in zotero_items]
+    wanted = {}
+    for i, identifiers in enumerate(item_ids):
+        for identifier in identifiers:
+            wanted.setdefault(identifier, []).append(i)
+
+    keys = [None] * len(zotero_items)
+    for data in mirror.iter_items():
+        data_ids = identifiers_for(data)
+        for identifier in data_ids:
+            for i in wanted.get(identifier, ()):
+                if keys[i] is None and not conflicting(item_ids[i], data_ids):
+                    keys[i] = data["key"]
+                    break
+    return keys
@@ -0,0 +1,96 @@
+# batch_transform.py
+
+"""
+Multi-core transform stage: CSL → Zotero mapping, citekey, filename and
+(optionally) Markdown rendering, fanned out over a process pool.
+
+These steps are pure CPU work, so for large batches they are split into
+chunks and handed to worker processes. Results come back in input order, and
+only a bounded number of chunks is in flight at once, so a streamed input is
+never materialised in full.
+
+Used by pipeline.py (`--workers N`) and usable on its own:
+
+    from batch_transform import transform_items
+    for zotero_item, citekey, filename, markdown in transform_items(items, workers=4):
+        ...
+"""
+
+import os
+from collections import deque
+
+from csl_mapper import csl_to_zotero
+from metrics import METRICS
+from note_view import NoteView
+from obsidian_writer import build_markdown_from_zotero, generate_filename, generate_citekey
+
+DEFAULT_CHUNK_SIZE = 200
+
+
+def transform_item(csl_item, render=True):
+    """
+    Map one CSL item and derive its note fields.
+
+    Returns:
+        tuple: (zotero_item, citekey, filename, markdown); markdown is None when
+               render is False (e.g. when the note must wait for a Zotero key).
+    """
+    with METRICS.timer("map"):
+        zotero_item = csl_to_zotero(csl_item)
+    with METRICS.timer("keys"):
+        # Creator, year and title words are derived once for all three outputs
+        view = NoteView(zotero_item)
+        citekey = generate_citekey(zotero_item, view)
+        filename = generate_filename(zotero_item, view)
+    markdown = None
+    if render:
+        with METRICS.timer("render"):
+            markdown = build_markdown_from_zotero(zotero_item, citekey, view=view)
+    return zotero_item, citekey, filename, markdown
+
+
+def _transform_chunk(chunk, render):
+    return [transform_item(csl_item, render) for csl_item in chunk]
+
+
+def _chunks(csl_items, chunk_size):
+    chunk = []
+    for item in csl_items:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def transform_items(csl_items, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, render=True):
+    """
+    Transform CSL items across a process pool, yielding results in input order.
+
+    Parameters:
+        csl_items: Iterable of CSL item dicts (may be a lazy stream).
+        workers (int): Worker processes; defaults to os.cpu_count(). 1 runs inline.
+        chunk_size (int): Items per work unit sent to a worker.
+        render (bool): Also render the Markdown note (without a Zotero key).
+
+    Yields:
+        tuple: (zotero_item, citekey, filename, markdown) per input item.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        for csl_item in csl_items:
+            yield transform_item(csl_item, render)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor  # multiprocessing is slow to import; only load it when used
+
+    max_pending = workers * 2
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in _chunks(csl_items, max(1, chunk_size)):
+            pending.append(pool.submit(_transform_chunk, chunk, render))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
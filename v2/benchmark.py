@@ -0,0 +1,598 @@
+# benchmark.py
+
+# Usage:
+#   python3 benchmark.py mapping [--items N]   → per-item cost of csl_to_zotero with
+#                                                mapping plans vs. running every mapper
+#   python3 benchmark.py suite [--items N] [--mix legal_case=3,book=1] [--seed S] [--output FILE]
+#                                              → time each stage and an end-to-end dry-run
+#                                                on a synthetic corpus; save the results as JSON
+#   python3 benchmark.py notes [--items N] [--seed S]
+#                                              → citekey + filename + note body per item from one
+#                                                shared NoteView vs. deriving the fields three times
+#   python3 benchmark.py memory [--items N] [--seed S]
+#                                              → memory held by N mapped items as dicts vs.
+#                                                compact ItemRecords (records.py), via tracemalloc
+#   python3 benchmark.py upload [--items N] [--concurrency N] [--latency MS] [--p429 P] [--p5xx P]
+#                                              → upload throughput and retries against a local
+#                                                fake Zotero server (fake_zotero_server.py)
+#   python3 benchmark.py attachments [--size-mb N] [--files N] [--concurrency N]
+#                                              → hashing and upload throughput of N files of the given
+#                                                size against the fake Zotero server, and the peak
+#                                                Python memory used (constant in the file size)
+#   python3 benchmark.py bibtex [--items N]  → BibTeX → CSL (→ Zotero) throughput on a synthetic .bib of
+#                                                N entries and of 4N entries, and the peak memory of each
+#                                                (the same for both: the file is streamed)
+#   python3 benchmark.py imports [--modules pipeline,csl_mapper] [--budget-ms MS]
+#                                              → fresh-interpreter import time, without credentials;
+#                                                exits 1 if the HTTP stack or process pools load,
+#                                                or the budget is exceeded
+
+"""
+Micro-benchmarks for bibnow's CPU-bound stages. Runs offline and never contacts Zotero.
+The `suite` benchmark renders notes, so it needs the note settings from .env.
+
+Results saved with --output carry the corpus parameters, Python version and
+git revision, so runs of different versions can be compared.
+"""
+
+import copy
+import datetime
+import gc
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from csl_mapper import (
+    CSL_TO_ZOTERO_TYPE,
+    FIELD_MAPPERS,
+    csl_to_zotero,
+    map_creators,
+)
+from synthetic_corpus import DEFAULT_MIX, generate_corpus, parse_mix
+from utils import option_value
+from zotero_schema import SCHEMA
+
+# A small mixed-type corpus exercising the type-specific mappers
+SAMPLE_ITEMS = [
+    {"type": "article-journal", "title": "Signal and Noise in Urban Grocery Stores",
+     "author": [{"family": "Chen", "given": "Lili"}], "issued": {"date-parts": [[2023, 6, 1]]},
+     "container-title": "Journal of Sociolinguistics", "DOI": "10.1234/jsl.2023.002",
+     "page": "145-167", "volume": "27", "issue": "2", "keywords": "signage, multilingualism"},
+    {"type": "book", "title": "Technologies of Empire", "author": [{"family": "Ramos", "given": "Isabel"}],
+     "issued": {"date-parts": [[2012]]}, "publisher": "Colonial Studies Press",
+     "publisher-place": "Madrid", "URL": "https://example.org/book-empire"},
+    {"type": "chapter", "title": "Margins of the Archive", "author": [{"family": "Okafor", "given": "Ada"}],
+     "editor": [{"family": "Lind", "given": "Per"}], "issued": {"date-parts": [[2019]]},
+     "container-title": "Handbook of Archives", "page": "10-30", "keyword": ["archives", "memory"]},
+    {"type": "legal_case", "title": "Example v. Sample", "court": "Example Court",
+     "issued": {"date-parts": [[1999, 4, 12]]}, "page": "112-120"},
+    {"type": "report", "title": "Report With Single-Field Creator",
+     "author": [{"literal": "Institute for Test Studies"}], "issued": {"date-parts": [[2018]]},
+     "publisher": "ITS", "genre": "Working paper", "abstract": "A minimal report."},
+    {"type": "paper-conference", "title": "Batching at Scale", "author": [{"family": "Nguyen", "given": "Kim"}],
+     "issued": {"raw": "2022-09"}, "container-title": "Proc. Batching", "event": "BatchConf 2022"},
+    {"type": "thesis", "title": "On Pipelines", "author": [{"family": "OMalley", "given": "Pat"}],
+     "issued": {"date-parts": [[2021]]}, "publisher": "Test University", "genre": "PhD thesis"},
+    {"type": "webpage", "title": "A Page", "author": ["Anonymous"], "URL": "https://example.org",
+     "accessed": {"raw": "2024-01-01"}, "language": "en"},
+]
+
+
+def _unplanned_csl_to_zotero(csl_item):
+    """
+    Reference implementation of the pre-plan mapping path: every mapper runs on
+    every item and the allowed-field set and schema lookups are rebuilt per item.
+    Used for comparison only.
+    """
+    item_type = CSL_TO_ZOTERO_TYPE.get(csl_item.get("type", "").lower(), "document")
+    zotero_item = {
+        "itemType": item_type,
+        "title": csl_item.get("title", ""),
+        "date": csl_item.get("issued", {}).get("raw", csl_item.get("issued", {}).get("date-parts", [[None]])[0][0]),
+        "creators": map_creators(csl_item)
+    }
+    for mapper in FIELD_MAPPERS:
+        mapper(csl_item, zotero_item, item_type)
+    allowed_fields = set(SCHEMA.fields.get(item_type, [])) | {"tags"}
+    type_fields = dict(SCHEMA.type_fields.get(item_type, {}))
+    extra_lines = []
+    for field in list(zotero_item.keys()):
+        if field not in allowed_fields and field != "itemType" and field != "creators":
+            value = zotero_item.pop(field)
+            target = type_fields.get(field)
+            if target and target not in zotero_item and value not in (None, ""):
+                zotero_item[target] = value
+                continue
+            if isinstance(value, (list, dict)):
+                value = json.dumps(value)
+            extra_lines.append(f"{field}: {value}")
+    if extra_lines:
+        if "extra" in zotero_item and zotero_item["extra"].strip():
+            zotero_item["extra"] += "\n" + "\n".join(extra_lines)
+        else:
+            zotero_item["extra"] = "\n".join(extra_lines)
+    for creator in zotero_item["creators"]:
+        creator["creatorType"] = SCHEMA.valid_creator_type(item_type, creator["creatorType"])
+    return zotero_item
+
+
+def _per_function_note(zotero_item, zotero_key, template):
+    """
+    Reference implementation of the pre-NoteView note path: citekey, filename
+    and note body each derive creator, year and title words on their own, with
+    uncompiled patterns. Used for comparison only.
+    """
+    from config import ZOTERO_USERNAME
+    from obsidian_writer import yaml_escape_dq
+    from obsidian_writer_config import FILENAME_PREFIX, TITLE_WORD_LIMIT, USE_ET_AL
+
+    def first_creator(item):
+        creators = item.get("creators", [])
+        if creators:
+            return creators[0].get("lastName") or creators[0].get("name", "Unknown")
+        name = item.get("court", "") or item.get("authority", "") or "Unknown"
+        return re.findall(r"\w+", name)[-1]
+
+    def year_and_title(item):
+        year = (item.get("date") or item.get("dateDecided") or "")[:4] or "XXXX"
+        title = item.get("title") or item.get("caseName") or "Untitled"
+        return year, title, re.findall(r"\b\w+\b", title)
+
+    year, title, words = year_and_title(zotero_item)
+    citekey = first_creator(zotero_item) + year + "".join(w.capitalize() for w in words[:4])
+
+    year, title, words = year_and_title(zotero_item)
+    lastname = first_creator(zotero_item)
+    if USE_ET_AL and len(zotero_item.get("creators", [])) > 1:
+        lastname += " et al"
+    filename = f"{FILENAME_PREFIX}{lastname} {year} {' '.join(w.capitalize() for w in words[:TITLE_WORD_LIMIT])}.md"
+
+    year, title, words = year_and_title(zotero_item)
+    creators = zotero_item.get("creators", [])
+    if creators:
+        responsible = ", ".join(f"{c.get('firstName', '')} {c.get('lastName', c.get('name', ''))}".strip()
+                                for c in creators)
+    else:
+        responsible = zotero_item.get("court", "") or zotero_item.get("authority", "")
+    tag_list = [t.get("tag") for t in zotero_item.get("tags", []) if t.get("tag")]
+    links = [f"[[{t}]]" for t in tag_list]
+    zotero_url = f"https://www.zotero.org/{ZOTERO_USERNAME}/items/{zotero_key}" if zotero_key else ""
+    markdown = template.render({
+        "citekey": yaml_escape_dq(citekey), "aliases": "",
+        "type": yaml_escape_dq(zotero_item.get("itemType", "document")),
+        "zotero_key": yaml_escape_dq(zotero_key or ""), "zotero_url": yaml_escape_dq(zotero_url),
+        "responsible_party": yaml_escape_dq(responsible), "record_title": yaml_escape_dq(title),
+        "record_title_short": " ".join(w.capitalize() for w in words[:TITLE_WORD_LIMIT]),
+        "record_year": yaml_escape_dq(year), "callnumber": yaml_escape_dq(zotero_item.get("callNumber", "")),
+        "baseline_citation": f"{responsible}. {year}. {title}.",
+        "abstract": zotero_item.get("abstractNote", "None supplied"),
+        "keywords": ", ".join(tag_list), "keywords_display": ", ".join(links),
+        "keywords_yaml": "\n".join(f'  - "{w}"' for w in links) if links else "  []",
+        "extra": zotero_item.get("extra", "None supplied."),
+    })
+    return citekey, filename, markdown
+
+
+def _time_per_item(fn, items, repeat=5):
+    """Best-of-`repeat` seconds per item for fn applied to every item."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    return best / len(items)
+
+
+def mixed_corpus(n):
+    """Return n items cycling through SAMPLE_ITEMS."""
+    return [copy.deepcopy(SAMPLE_ITEMS[i % len(SAMPLE_ITEMS)]) for i in range(n)]
+
+
+def bench_mapping(n=20000):
+    items = mixed_corpus(n)
+    for item in SAMPLE_ITEMS:
+        assert csl_to_zotero(item) == _unplanned_csl_to_zotero(item), item.get("type")
+    unplanned = _time_per_item(_unplanned_csl_to_zotero, items)
+    planned = _time_per_item(csl_to_zotero, items)
+    return {
+        "items": n,
+        "unplanned_us_per_item": round(unplanned * 1e6, 2),
+        "planned_us_per_item": round(planned * 1e6, 2),
+        "speedup": round(unplanned / planned, 2),
+    }
+
+
+def _stage(fn, items, repeat=3):
+    per_item = _time_per_item(fn, items, repeat)
+    return {"us_per_item": round(per_item * 1e6, 2), "items_per_sec": round(1 / per_item)}
+
+
+def bench_suite(n=5000, mix=None, seed=0):
+    """
+    Time csl_to_zotero, generate_citekey, generate_filename and
+    build_markdown_from_zotero separately on a synthetic corpus, then a full
+    dry-run (mapping, key allocation, rendering and printing to /dev/null).
+    """
+    # Imported here: these read the vault settings, which the mapping benchmark does not need
+    from obsidian_writer import build_markdown_from_zotero, generate_citekey, generate_filename
+    from key_allocator import KeyAllocator
+    from pipeline import dry_run
+
+    corpus = list(generate_corpus(n, mix, seed))
+    mapped = [csl_to_zotero(item) for item in corpus]
+    keyed = [(z, generate_citekey(z)) for z in mapped]
+
+    results = {
+        "csl_to_zotero": _stage(csl_to_zotero, corpus),
+        "generate_citekey": _stage(generate_citekey, mapped),
+        "generate_filename": _stage(generate_filename, mapped),
+        "build_markdown_from_zotero": _stage(lambda pair: build_markdown_from_zotero(*pair, "ABCD1234"), keyed),
+    }
+
+    stdout = sys.stdout
+    with open(os.devnull, "w") as devnull:
+        sys.stdout = devnull
+        try:
+            start = time.perf_counter()
+            dry_run(iter(corpus), allocator=KeyAllocator())
+            elapsed = time.perf_counter() - start
+        finally:
+            sys.stdout = stdout
+    results["dry_run_end_to_end"] = {"seconds": round(elapsed, 3), "items_per_sec": round(n / elapsed)}
+    return results
+
+
+def bench_note_view(n=5000, seed=0):
+    """
+    Citekey, filename and note body for each mapped item: all three from one
+    NoteView (as batch_transform does) vs. the per-function reference path.
+    Outputs are checked to be identical first.
+    """
+    from obsidian_writer import TEMPLATES, build_markdown_from_zotero, generate_citekey, generate_filename
+    from note_view import NoteView
+
+    template = TEMPLATES.get("obsidian_note")
+    mapped = [csl_to_zotero(item) for item in generate_corpus(n, seed=seed)]
+
+    def shared(zotero_item, zotero_key="ABCD1234"):
+        view = NoteView(zotero_item)
+        citekey = generate_citekey(zotero_item, view)
+        return (citekey, generate_filename(zotero_item, view),
+                build_markdown_from_zotero(zotero_item, citekey, zotero_key, view=view))
+
+    for zotero_item in mapped[:500]:
+        assert shared(zotero_item) == _per_function_note(zotero_item, "ABCD1234", template)
+    per_function = _time_per_item(lambda z: _per_function_note(z, "ABCD1234", template), mapped, 3)
+    view = _time_per_item(shared, mapped, 3)
+    return {
+        "items": n,
+        "per_function_us_per_item": round(per_function * 1e6, 2),
+        "note_view_us_per_item": round(view * 1e6, 2),
+        "speedup": round(per_function / view, 2),
+    }
+
+
+def _retained_bytes(build):
+    """Bytes still allocated after build() returns, with its result kept alive."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del result
+    return retained
+
+
+def bench_memory(n=20000, seed=0):
+    """
+    Memory held by n mapped items as plain dicts vs. ItemRecords. Items are
+    loaded from JSON lines, as from a file or the library mirror, so every
+    item starts with its own copy of each string.
+    """
+    from records import ItemRecord, pack_items
+
+    lines = [json.dumps(csl_to_zotero(item)) for item in generate_corpus(n, seed=seed)]
+    for line in lines[:1000]:
+        assert ItemRecord.from_dict(json.loads(line)).to_dict() == json.loads(line)
+
+    as_dicts = _retained_bytes(lambda: [json.loads(line) for line in lines])
+    as_records = _retained_bytes(lambda: list(pack_items(json.loads(line) for line in lines)))
+    records = list(pack_items(json.loads(line) for line in lines))
+    return {
+        "items": n,
+        "dict_bytes_per_item": round(as_dicts / n),
+        "record_bytes_per_item": round(as_records / n),
+        "reduction": round(as_dicts / as_records, 2),
+        "pack_us_per_item": round(_time_per_item(ItemRecord.from_dict, [json.loads(l) for l in lines], 3) * 1e6, 2),
+        "to_dict_us_per_item": round(_time_per_item(ItemRecord.to_dict, records, 3) * 1e6, 2),
+    }
+
+
+def bench_upload(n=2000, concurrency=4, latency=0.02, p429=0.02, p5xx=0.02, batch_size=50):
+    """
+    Upload a mapped synthetic corpus to an in-process fake Zotero server through
+    the real client (retries, Retry-After, connection pool) and upload engine.
+    """
+    from fake_zotero_server import FakeZoteroServer
+    from upload_engine import ConcurrentUploader
+    from zotero_client import ZoteroClient
+    from zotero_writer import split_batch_response
+
+    items = [csl_to_zotero(item) for item in generate_corpus(n)]
+    with FakeZoteroServer(latency=latency, p429=p429, p5xx=p5xx, retry_after=0) as server:
+        client = ZoteroClient("benchmark", server.url + "/users/1", backoff_base=0.01,
+                              max_retries=10, pool_size=max(10, concurrency))
+
+        def send(zotero_items, write_token=None):
+            status_code, content, _stats = client.post_items(zotero_items, write_token)
+            return status_code, content, split_batch_response(status_code, content, len(zotero_items))
+
+        uploader = ConcurrentUploader(max_in_flight=concurrency, batch_size=batch_size, send=send,
+                                      client=client)
+        start = time.perf_counter()
+        results = uploader.run(items)
+        elapsed = time.perf_counter() - start
+        client.close()
+        server_stats = dict(server.state.stats)
+
+    statuses = {}
+    for _entry, result in results:
+        statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+    return {
+        "items": n,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "items_per_sec": round(n / elapsed),
+        "results": statuses,
+        "server": server_stats,
+    }
+
+
+def bench_attachments(size_mb=200, files=2, concurrency=2):
+    """
+    Hash and upload `files` random files of `size_mb` MB each through the real
+    attachment handshake, against an in-process fake Zotero server. Peak traced
+    memory covers the client and the server, and should not grow with size_mb.
+    """
+    import shutil
+    import tempfile
+    from attachments import AttachmentUploader, file_fingerprint
+    from fake_zotero_server import FakeZoteroServer
+    from zotero_client import ZoteroClient
+
+    directory = tempfile.mkdtemp(prefix="bibnow-attach-")
+    try:
+        paths = []
+        for i in range(files):
+            path = os.path.join(directory, f"scan{i}.pdf")
+            with open(path, "wb") as f:
+                for _ in range(size_mb):
+                    f.write(os.urandom(1 << 20))
+            paths.append(path)
+        total = files * size_mb
+
+        start = time.perf_counter()
+        for path in paths:
+            file_fingerprint(path)
+        hash_seconds = time.perf_counter() - start
+
+        with FakeZoteroServer() as server:
+            client = ZoteroClient("benchmark", server.url + "/users/1", pool_size=max(10, concurrency))
+            _status, content, _stats = client.post_items([{"itemType": "book", "title": "Scans"}])
+            parent = content["successful"]["0"]["key"]
+            tracemalloc.start()
+            start = time.perf_counter()
+            results = AttachmentUploader(client, concurrency).run((parent, path) for path in paths)
+            upload_seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            client.close()
+    finally:
+        shutil.rmtree(directory)
+
+    return {
+        "files": files,
+        "size_mb": size_mb,
+        "concurrency": concurrency,
+        "hash_mb_per_sec": round(total / hash_seconds),
+        "upload_mb_per_sec": round(total / upload_seconds),
+        "peak_traced_mb": round(peak / 1e6, 2),
+        "uploaded": sum(r["status"] == "uploaded" for r in results),
+    }
+
+
+_BIB_NAMES = ("M{\\\"u}ller, J{\\\"o}rg", "van der Berg, Anna", "Dvo\\v{r}{\\'a}k, Anton", "Smith, Jr., John",
+              "Jean de La Fontaine", "{World Health Organization}", "Garc{\\'\\i}a M{\\'a}rquez, Gabriel")
+
+
+def _synthetic_bib(path, n):
+    """Write n BibTeX entries: articles, and chapters crossref'ing a proceedings volume after them."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('@string{jsl = "Journal of {S}ociolinguistics"}\n@string{acm = {ACM Press}}\n\n')
+        for i in range(n):
+            names = " and ".join(_BIB_NAMES[(i + k) % len(_BIB_NAMES)] for k in range(1 + i % 3))
+            if i % 10 < 7:
+                f.write(f"@article{{art{i},\n  author = {{{names}}},\n"
+                        f"  title = {{{{DNA}} and Caf\\'e Culture --- Study {i}: \\emph{{na\\\"\\i{{}}ve}} results}},\n"
+                        f"  journal = jsl, year = {1990 + i % 30}, month = {('jan', 'jun', 'dec')[i % 3]},\n"
+                        f"  volume = {{{i % 40}}}, number = \"{i % 4 + 1}\", pages = {{{i % 300}--{i % 300 + 20}}},\n"
+                        f"  doi = {{10.1234/jsl.{i}}},\n}}\n\n")
+            else:
+                f.write(f"@inproceedings{{conf{i},\n  author = {{{names}}},\n  title = {{Paper {i} on \\c{{C}}ache Design}},\n"
+                        f"  pages = {{{i % 50}--{i % 50 + 9}}},\n  crossref = {{proc{i // 10}}},\n}}\n\n")
+            if i % 10 == 9:
+                f.write(f"@proceedings{{proc{i // 10},\n  title = {{Proceedings of the {i // 10}th Symposium}},\n"
+                        f"  editor = {{Doe, Jane}}, publisher = acm # \" Inc.\", address = {{New York}},\n"
+                        f"  year = {{{1990 + i % 30}}},\n}}\n\n")
+
+
+def _bib_run(path, map_items, trace=False):
+    from bibtex import iter_bibtex_items_from_file
+
+    gc.collect()
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    count = 0
+    for csl_item in iter_bibtex_items_from_file(path):
+        if map_items:
+            csl_to_zotero(csl_item)
+        count += 1
+    seconds = time.perf_counter() - start
+    peak = 0
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return count, seconds, peak
+
+
+def bench_bibtex(n=20000):
+    """
+    Stream a synthetic .bib file of n and of 4n entries through bibtex.py,
+    alone and followed by csl_to_zotero. Entries per second should not drop.
+    Peak memory is measured in a separate traced run; it grows only until the
+    crossref parent cache (bibtex.PARENT_CACHE_SIZE) is full.
+    """
+    import shutil
+    import tempfile
+
+    directory = tempfile.mkdtemp(prefix="bibnow-bib-")
+    try:
+        results = {}
+        for size in (n, 4 * n):
+            path = os.path.join(directory, f"{size}.bib")
+            _synthetic_bib(path, size)
+            megabytes = os.path.getsize(path) / 1e6
+            _bib_run(path, False)  # warm the page cache
+            count, parse_seconds, _peak = _bib_run(path, False)
+            _count, map_seconds, _peak = _bib_run(path, True)
+            _count, _seconds, parse_peak = _bib_run(path, False, trace=True)
+            results[size] = {
+                "entries": count,
+                "file_mb": round(megabytes, 1),
+                "parse_mb_per_sec": round(megabytes / parse_seconds, 1),
+                "parse_entries_per_sec": round(count / parse_seconds),
+                "to_zotero_entries_per_sec": round(count / map_seconds),
+                "peak_traced_kb": round(parse_peak / 1024),
+            }
+    finally:
+        shutil.rmtree(directory)
+    return results
+
+
+# Heavy modules a dry-run must not import; dotenv is only reported (it loads when a .env exists)
+LAZY_MODULES = ("requests", "urllib3", "multiprocessing", "pyperclip")
+REPORTED_MODULES = LAZY_MODULES + ("dotenv",)
+
+
+def _import_seconds(statement, env):
+    code = ("import sys, time, json\n"
+            "t = time.perf_counter()\n"
+            f"{statement}\n"
+            "t = time.perf_counter() - t\n"
+            f"print(json.dumps([t, [m for m in {REPORTED_MODULES!r} if m in sys.modules]]))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def bench_imports(modules=("pipeline",), repeat=5, budget_ms=None):
+    """
+    Time `import <module>` in fresh interpreters (best of `repeat`), with the
+    Zotero credentials removed from the environment, and list which heavy
+    modules were pulled in.
+    """
+    env = {k: v for k, v in os.environ.items() if not k.startswith("ZOTERO_")}
+    results = {}
+    ok = True
+    for module in modules:
+        best, loaded = float("inf"), []
+        for _ in range(repeat):
+            seconds, loaded = _import_seconds(f"import {module}", env)
+            best = min(best, seconds)
+        eager = [m for m in loaded if m in LAZY_MODULES]
+        within_budget = budget_ms is None or best * 1000 <= budget_ms
+        ok = ok and within_budget and not eager
+        results[module] = {"import_ms": round(best * 1000, 2), "heavy_modules_loaded": loaded,
+                           "within_budget": within_budget}
+    return {"modules": results, "budget_ms": budget_ms, "ok": ok}
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_suite(argv):
+    n = option_value(argv, "--items", 5000, int)
+    mix = parse_mix(option_value(argv, "--mix", "")) or DEFAULT_MIX
+    seed = option_value(argv, "--seed", 0, int)
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "items": n,
+            "seed": seed,
+            "mix": mix,
+        },
+        "results": bench_suite(n, mix, seed),
+    }
+    output = option_value(argv, "--output")
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Results saved to {output}", file=sys.stderr)
+    return report
+
+
+BENCHMARKS = {
+    "mapping": lambda argv: bench_mapping(option_value(argv, "--items", 20000, int)),
+    "suite": run_suite,
+    "memory": lambda argv: bench_memory(option_value(argv, "--items", 20000, int),
+                                        option_value(argv, "--seed", 0, int)),
+    "notes": lambda argv: bench_note_view(option_value(argv, "--items", 5000, int),
+                                          option_value(argv, "--seed", 0, int)),
+    "imports": lambda argv: bench_imports(
+        [m for m in option_value(argv, "--modules", "pipeline").split(",") if m],
+        budget_ms=option_value(argv, "--budget-ms", None, float),
+    ),
+    "attachments": lambda argv: bench_attachments(
+        option_value(argv, "--size-mb", 200, int),
+        option_value(argv, "--files", 2, int),
+        option_value(argv, "--concurrency", 2, int),
+    ),
+    "bibtex": lambda argv: bench_bibtex(option_value(argv, "--items", 20000, int)),
+    "upload": lambda argv: bench_upload(
+        option_value(argv, "--items", 2000, int),
+        option_value(argv, "--concurrency", 4, int),
+        option_value(argv, "--latency", 20, float) / 1000,
+        option_value(argv, "--p429", 0.02, float),
+        option_value(argv, "--p5xx", 0.02, float),
+    ),
+}
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    names = [a for a in args if a in BENCHMARKS] or list(BENCHMARKS)
+    failed = False
+    for name in names:
+        result = BENCHMARKS[name](args)
+        print(json.dumps({name: result}, indent=2))
+        failed = failed or result.get("ok") is False
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,626 @@
+# bibtex.py
+
+# Usage:
+#   python3 bibtex.py FILE.bib           → Print the entries as CSL JSON, one per line (NDJSON)
+#   python3 bibtex.py FILE.bib --count   → Only count the entries and report the throughput
+
+"""
+Streaming BibTeX / BibLaTeX reader that yields CSL-JSON items.
+
+Entries are read one at a time from a text stream, like csl_stream does for
+JSON. Only the text of the entry being parsed is buffered, so a file of tens
+of MB is processed in one linear pass. Memory does not grow with the file's
+size, with one exception: entries waiting for a crossref parent (see below).
+
+Supported:
+- @string macros, the standard month macros (jan … dec) and `#` concatenation;
+- braced, quoted and bare (number / macro) values;
+- @comment, @preamble and text between entries are skipped;
+- crossref: a child inherits every field it lacks from its parent, and the
+  parent's title becomes the child's booktitle. Parent-like entries
+  (proceedings, books, collections…) are kept in a bounded LRU cache
+  (PARENT_CACHE_SIZE) for children that come after them. BibTeX itself wants
+  children *before* their parent, so those are held back and yielded right
+  after their parent. Children whose parent never appears are yielded
+  unchanged at the end;
+- LaTeX decoding: accents (\\'e, {\\"o}, \\c{c}, \\v{s}…), special
+  letters (\\ss, \\o, \\ae, \\l…), escaped characters (\\&, \\%, \\_…), dashes,
+  TeX quotes, ~, and the braces and formatting commands (\\emph, \\textit…);
+- names: "Last, First", "Last, Jr, First" and "First von Last". Braced names
+  ({World Health Organization}) become literal names, and "and others" is
+  dropped. A particle (von, van der…) stays part of the family name, as Zotero
+  stores it;
+- BibTeX and BibLaTeX entry types and fields are mapped to CSL types and
+  variables (BIBTEX_TO_CSL_TYPE, _CSL_VARIABLES); date / year + month and
+  urldate become CSL dates.
+
+URLs, DOIs and file paths are taken verbatim (no LaTeX decoding).
+
+    with open("library.bib", encoding="utf-8") as f:
+        for csl_item in iter_bibtex_items(f):
+            zotero_item = csl_to_zotero(csl_item)
+"""
+
+import json
+import re
+import sys
+import time
+import unicodedata
+from collections import OrderedDict, deque
+
+CHUNK_SIZE = 1 << 16  # 64 KiB reads
+PARENT_CACHE_SIZE = 4096  # parent-like entries remembered for later crossrefs
+
+BIBTEX_TO_CSL_TYPE = {
+    "article": "article-journal",
+    "book": "book",
+    "mvbook": "book",
+    "booklet": "pamphlet",
+    "bookinbook": "chapter",
+    "inbook": "chapter",
+    "incollection": "chapter",
+    "suppbook": "chapter",
+    "suppcollection": "chapter",
+    "collection": "book",
+    "mvcollection": "book",
+    "reference": "book",
+    "mvreference": "book",
+    "inreference": "entry-encyclopedia",
+    "inproceedings": "paper-conference",
+    "conference": "paper-conference",
+    "proceedings": "book",
+    "mvproceedings": "book",
+    "manual": "report",
+    "techreport": "report",
+    "report": "report",
+    "mastersthesis": "thesis",
+    "phdthesis": "thesis",
+    "thesis": "thesis",
+    "online": "webpage",
+    "electronic": "webpage",
+    "www": "webpage",
+    "unpublished": "manuscript",
+    "patent": "patent",
+    "dataset": "dataset",
+    "jurisdiction": "legal_case",
+    "legislation": "legislation",
+    "letter": "personal_communication",
+    "movie": "motion_picture",
+    "video": "motion_picture",
+    "audio": "song",
+    "music": "song",
+    "artwork": "graphic",
+    "image": "graphic",
+    "map": "map",
+    "review": "review",
+    "misc": "document",
+}
+# Article subtypes (BibLaTeX entrysubtype)
+_ARTICLE_SUBTYPES = {"magazine": "article-magazine", "newspaper": "article-newspaper"}
+# Entry types that are usually crossref targets
+PARENT_TYPES = frozenset({"book", "mvbook", "collection", "mvcollection", "proceedings", "mvproceedings",
+                          "reference", "mvreference", "periodical"})
+# Fields a child never inherits from its parent
+_NOT_INHERITED = frozenset({"crossref", "xref", "ids", "title", "subtitle", "shorttitle", "entryset"})
+
+# Plain BibTeX field -> CSL variable (most fields need no special handling)
+_CSL_VARIABLES = {
+    "shorttitle": "title-short",
+    "publisher": "publisher",
+    "address": "publisher-place",
+    "location": "publisher-place",
+    "volume": "volume",
+    "edition": "edition",
+    "series": "collection-title",
+    "chapter": "chapter-number",
+    "isbn": "ISBN",
+    "issn": "ISSN",
+    "abstract": "abstract",
+    "keywords": "keywords",
+    "note": "note",
+    "language": "language",
+    "type": "genre",
+    "eventtitle": "event",
+    "venue": "event-place",
+}
+# Taken as they are: no LaTeX decoding
+_VERBATIM = {"doi": "DOI", "url": "URL", "file": "file"}
+
+MONTH_MACROS = {"jan": "January", "feb": "February", "mar": "March", "apr": "April", "may": "May",
+                "jun": "June", "jul": "July", "aug": "August", "sep": "September", "oct": "October",
+                "nov": "November", "dec": "December"}
+_MONTH_NUMBERS = {name[:3]: i for i, name in enumerate(MONTH_MACROS, 1)}
+
+# --- reading entries ---
+
+_ENTRY_START = re.compile(r"@\s*([A-Za-z][\w-]*)\s*([{(])")
+_PAREN_BODY = re.compile(r'[{}"()]')
+_LOOKS_LIKE_BIBTEX = re.compile(r"^\s*@\s*[A-Za-z]+\s*[{(]", re.MULTILINE)
+
+
+def looks_like_bibtex(text):
+    """True if `text` has a line starting with an entry such as `@article{`."""
+    return first_entry_line(text) >= 0
+
+
+def first_entry_line(text):
+    """Index where the first line starting with an entry begins, or -1."""
+    m = _LOOKS_LIKE_BIBTEX.search(text)
+    return m.start() if m else -1
+
+
+def _iter_blocks(fp, chunk_size=CHUNK_SIZE, prefix=""):
+    """
+    Yield (block type lower-cased, body text) for each @block in the stream.
+    `prefix` is text already read from `fp` (e.g. while sniffing the format).
+    """
+    text, pos, eof = prefix, 0, False
+
+    def fill():
+        nonlocal text, pos, eof
+        chunk = "" if eof else fp.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        text = text[pos:] + chunk
+        pos = 0
+        return True
+
+    while True:
+        at = text.find("@", pos)
+        if at < 0:
+            pos = len(text)
+            if not fill():
+                return
+            continue
+        m = _ENTRY_START.match(text, at)
+        if m is None:
+            if len(text) - at < 256 and not eof:
+                pos = at
+                fill()  # the entry header may be cut off by the chunk boundary
+                continue
+            pos = at + 1  # a stray "@" in text between entries
+            continue
+
+        block_type = m.group(1).lower()
+        start = m.end()
+        depth, in_quote, i = 0, False, start
+        while True:
+            if m.group(2) == "{":
+                # Common form: one find("}") per closing brace; the "{"s before it set the depth
+                j = text.find("}", i)
+                if j >= 0:
+                    depth += text.count("{", i, j)
+                    i = j + 1
+                    if depth == 0:
+                        break
+                    depth -= 1
+                    continue
+            else:
+                hit = _PAREN_BODY.search(text, i)
+                if hit is not None:
+                    ch = hit.group()
+                    i = hit.end()
+                    if ch == "{":
+                        depth += 1
+                    elif ch == "}":
+                        depth -= 1
+                    elif depth == 0:
+                        if ch == '"':
+                            in_quote = not in_quote
+                        elif ch == ")" and not in_quote:
+                            break
+                    continue
+            offset_start, offset_i, pos = start - at, i - at, at
+            if not fill():
+                raise ValueError(f"Unexpected end of input inside BibTeX entry @{block_type} "
+                                 f"({text[start:start + 40].strip()!r}...).")
+            start, i, at = offset_start, offset_i, 0
+        yield block_type, text[start:i - 1]
+        pos = i
+
+
+# --- parsing fields ---
+
+_CITE_KEY = re.compile(r"\s*([^,\s]*)\s*,?")
+_FIELD_NAME = re.compile(r"\s*,?\s*([A-Za-z_][\w:.+-]*)\s*=\s*")
+_BARE_VALUE = re.compile(r"[^\s,#{}\"]+")
+_CONCAT = re.compile(r"\s*#\s*")
+# `name = {value}` with no nested braces and nothing concatenated: most fields of most files
+_SIMPLE_FIELD = re.compile(r'\s*,?\s*([A-Za-z_][\w:.+-]*)\s*=\s*(?:\{([^{}]*)\}|"([^"{}]*)")(?=\s*(?:,|$))')
+
+
+def _read_value(body, i, macros):
+    """Parse `part # part # …` at body[i:]. Returns (raw value, end index)."""
+    parts = []
+    while True:
+        ch = body[i:i + 1]
+        if ch == "{":
+            depth, j = 0, i + 1
+            while True:
+                k = body.find("}", j)
+                if k < 0:
+                    raise ValueError("unbalanced braces")
+                depth += body.count("{", j, k)
+                j = k + 1
+                if depth == 0:
+                    break
+                depth -= 1
+            parts.append(body[i + 1:j - 1])
+            i = j
+        elif ch == '"':
+            j = i + 1
+            while True:  # the first '"' outside braces ends the value
+                k = body.find('"', j)
+                if k < 0:
+                    raise ValueError("unbalanced quotes")
+                if body.count("{", i, k) == body.count("}", i, k):
+                    break
+                j = k + 1
+            parts.append(body[i + 1:k])
+            i = k + 1
+        else:
+            m = _BARE_VALUE.match(body, i)
+            if m is None:
+                raise ValueError("missing value")
+            word = m.group()
+            parts.append(word if word.isdigit() else macros.get(word.lower(), ""))
+            i = m.end()
+        m = _CONCAT.match(body, i)
+        if m is None:
+            return "".join(parts), i
+        i = m.end()
+
+
+def _parse_fields(body, i, macros):
+    """Parse `name = value, …` from body[i:] into {lower-cased name: raw value}."""
+    fields = {}
+    while True:
+        m = _SIMPLE_FIELD.match(body, i)
+        if m is not None:
+            value = m.group(2)
+            fields[m.group(1).lower()] = value if value is not None else m.group(3)
+            i = m.end()
+            continue
+        m = _FIELD_NAME.match(body, i)
+        if m is None:
+            return fields
+        try:
+            value, i = _read_value(body, m.end(), macros)
+        except ValueError:
+            return fields  # keep the fields read so far
+        fields[m.group(1).lower()] = value
+
+
+# --- LaTeX decoding ---
+
+_ACCENTS = {"'": "\u0301", "`": "\u0300", "^": "\u0302", '"': "\u0308", "~": "\u0303", "=": "\u0304",
+            ".": "\u0307", "u": "\u0306", "v": "\u030c", "H": "\u030b", "c": "\u0327", "k": "\u0328",
+            "r": "\u030a", "d": "\u0323", "b": "\u0331"}
+_SYMBOLS = {"ss": "ß", "o": "ø", "O": "Ø", "ae": "æ", "AE": "Æ", "oe": "œ", "OE": "Œ", "aa": "å",
+            "AA": "Å", "l": "ł", "L": "Ł", "i": "ı", "j": "ȷ", "dh": "ð", "DH": "Ð", "th": "þ", "TH": "Þ",
+            "ng": "ŋ", "NG": "Ŋ", "S": "§", "P": "¶", "dag": "†", "ddag": "‡", "copyright": "©",
+            "textregistered": "®", "texttrademark": "™", "pounds": "£", "euro": "€", "textendash": "–",
+            "textemdash": "—", "textquoteleft": "‘", "textquoteright": "’", "textquotedblleft": "“",
+            "textquotedblright": "”", "ldots": "…", "dots": "…", "textellipsis": "…", "LaTeX": "LaTeX",
+            "TeX": "TeX", "textdegree": "°", "textbackslash": "\\",
+            # common math-mode letters ($\alpha$-helix)
+            "alpha": "α", "beta": "β", "gamma": "γ", "delta": "δ", "epsilon": "ε", "zeta": "ζ", "eta": "η",
+            "theta": "θ", "kappa": "κ", "lambda": "λ", "mu": "μ", "nu": "ν", "xi": "ξ", "pi": "π", "rho": "ρ",
+            "sigma": "σ", "tau": "τ", "phi": "φ", "chi": "χ", "psi": "ψ", "omega": "ω", "Gamma": "Γ",
+            "Delta": "Δ", "Theta": "Θ", "Lambda": "Λ", "Pi": "Π", "Sigma": "Σ", "Phi": "Φ", "Psi": "Ψ",
+            "Omega": "Ω", "times": "×", "pm": "±", "leq": "≤", "geq": "≥"}
+_DOTLESS = {"\\i": "i", "\\j": "j"}
+_LATEX = re.compile(
+    r"\\([`'^\"~=.])\s*(?:\{\s*(\\[ij]|[A-Za-z])\s*\}|(\\[ij]|[A-Za-z]))"  # \'e, \'{e}, \"{\i}
+    r"|\\([uvHckrdb])(?:\s*\{\s*(\\[ij]|[A-Za-z])\s*\}|\s+([A-Za-z]))"     # \v{s}, \c c
+    r"|\\([&%$_#{}\\ ,;!])"                                                  # \&, \%, \\, \, …
+    r"|\\([A-Za-z]+)\s*(?:\{\})?"                                            # \ss, \emph, \LaTeX{}
+)
+# Escaped braces and dollars survive the markup removal as private-use placeholders
+_ESCAPED = {"{": "\ue000", "}": "\ue001", "$": "\ue002", "\\": " ", " ": " ", ",": " ", ";": " ", "!": ""}
+# Grouping braces and math $ vanish, ~ is a space; then dashes and TeX quotes
+_MARKUP = (("{", ""), ("}", ""), ("$", ""), ("~", " "), ("---", "—"), ("--", "–"), ("``", "“"), ("''", "”"))
+_PLACEHOLDERS = (("\ue000", "{"), ("\ue001", "}"), ("\ue002", "$"))
+
+
+def _latex_replace(m):
+    accent = m.group(1) or m.group(4)
+    if accent:
+        base = m.group(2) or m.group(3) or m.group(5) or m.group(6)
+        return _DOTLESS.get(base, base) + _ACCENTS[accent]
+    if m.group(7):
+        return _ESCAPED.get(m.group(7), m.group(7))
+    return _SYMBOLS.get(m.group(8), "")  # formatting commands vanish, their argument stays
+
+
+def decode_latex(value):
+    """Turn LaTeX markup in a field value into plain Unicode text, with spaces collapsed."""
+    escaped = "\\" in value
+    if escaped:
+        value = _LATEX.sub(_latex_replace, value)
+    for markup, text in _MARKUP:
+        if markup in value:
+            value = value.replace(markup, text)
+    if escaped:
+        for placeholder, text in _PLACEHOLDERS:
+            value = value.replace(placeholder, text)
+        value = unicodedata.normalize("NFC", value)  # letter + accent -> one character
+    return " ".join(value.split())
+
+
+# --- names ---
+
+_AND = re.compile(r"\s+and\s+", re.IGNORECASE)
+
+
+def _split_top_level(text, pattern):
+    """Split `text` at matches of `pattern` that are not inside braces."""
+    parts, depth, start = [], 0, 0
+    if "{" not in text:
+        return pattern.split(text)
+    for m in re.finditer(r"[{}]|" + pattern.pattern, text, pattern.flags):
+        if m.group() == "{":
+            depth += 1
+        elif m.group() == "}":
+            depth -= 1
+        elif depth == 0:
+            parts.append(text[start:m.start()])
+            start = m.end()
+    parts.append(text[start:])
+    return parts
+
+
+_COMMA = re.compile(r"\s*,\s*")
+_SPACE = re.compile(r"\s+")
+
+
+def _wrapped_in_braces(text):
+    """True if the whole of `text` is one {…} group."""
+    if not (text.startswith("{") and text.endswith("}")):
+        return False
+    depth, i = 0, 1
+    while True:  # the "}" closing the opening brace must be the last character
+        j = text.find("}", i)
+        depth += text.count("{", i, j)
+        if depth == 0:
+            return j == len(text) - 1
+        depth -= 1
+        i = j + 1
+
+
+def _is_particle(word):
+    # A lower-case word is a particle (von, van, de la…); a braced word never is
+    return not word.startswith("{") and decode_latex(word)[:1].islower()
+
+
+def parse_name(raw):
+    """Parse one BibTeX name into a CSL name dict (family / given / suffix, or literal)."""
+    raw = raw.strip()
+    if _wrapped_in_braces(raw):
+        return {"literal": decode_latex(raw)}
+    parts = _split_top_level(raw, _COMMA)
+    given, suffix = "", ""
+    if len(parts) == 1:
+        words = [w for w in _split_top_level(parts[0], _SPACE) if w]
+        if not words:
+            return None
+        last = len(words) - 1
+        first_particle = next((k for k in range(last) if _is_particle(words[k])), last)
+        given = " ".join(words[:first_particle])
+        family = " ".join(words[first_particle:])
+    else:
+        family = parts[0]
+        given = parts[-1]
+        if len(parts) > 2:
+            suffix = parts[1]
+    name = {"family": decode_latex(family), "given": decode_latex(given)}
+    if suffix:
+        name["suffix"] = decode_latex(suffix)
+    return name
+
+
+def parse_names(raw):
+    """Parse an author / editor list ("A and B and others") into CSL names."""
+    names = []
+    for part in _split_top_level(" ".join(raw.split()), _AND):
+        if part.strip().lower() == "others":
+            continue
+        name = parse_name(part)
+        if name:
+            names.append(name)
+    return names
+
+
+# --- dates ---
+
+_ISO_DATE = re.compile(r"(\d{4})(?:-(\d{1,2})(?:-(\d{1,2}))?)?")
+_YEAR = re.compile(r"\d{4}")
+
+
+def _month_number(value):
+    value = decode_latex(value).strip().lower()
+    if value.isdigit():
+        return int(value) if 1 <= int(value) <= 12 else None
+    return _MONTH_NUMBERS.get(value[:3])
+
+
+def _csl_date(raw):
+    """CSL date from a BibLaTeX date ("2001-05-03", "2001-05/2002-01", "2001")."""
+    m = _ISO_DATE.search(raw)
+    if m is None:
+        return {"raw": decode_latex(raw)} if raw.strip() else None
+    return {"date-parts": [[int(p) for p in m.groups() if p]]}
+
+
+def _issued(fields):
+    if fields.get("date"):
+        return _csl_date(fields["date"])
+    year = fields.get("year", "")
+    m = _YEAR.search(year)
+    if m is None:
+        return {"raw": decode_latex(year)} if year.strip() else None
+    parts = [int(m.group())]
+    month = _month_number(fields["month"]) if fields.get("month") else None
+    if month:
+        parts.append(month)
+        if fields.get("day", "").strip().isdigit():
+            parts.append(int(fields["day"]))
+    return {"date-parts": [parts]}
+
+
+# --- entries to CSL ---
+
+def entry_to_csl(entry_type, key, fields):
+    """
+    Convert one parsed BibTeX entry (raw field values, crossref already applied)
+    to a CSL-JSON item.
+    """
+    csl_type = BIBTEX_TO_CSL_TYPE.get(entry_type, "document")
+    if entry_type == "article":
+        csl_type = _ARTICLE_SUBTYPES.get(fields.get("entrysubtype", "").strip().lower(), csl_type)
+    if entry_type in ("mastersthesis", "phdthesis") and "type" not in fields:
+        fields = dict(fields, type="Master's thesis" if entry_type == "mastersthesis" else "PhD thesis")
+    item = {"id": key, "type": csl_type}
+
+    title = fields.get("title")
+    if title:
+        item["title"] = decode_latex(title)
+        if fields.get("subtitle"):
+            item["title"] += ": " + decode_latex(fields["subtitle"])
+    for role in ("author", "editor"):
+        if fields.get(role):
+            item[role] = parse_names(fields[role])
+
+    container = fields.get("journaltitle") or fields.get("journal") or fields.get("booktitle")
+    if container:
+        item["container-title"] = decode_latex(container)
+    publisher = (fields.get("publisher") or fields.get("school") or fields.get("institution")
+                 or fields.get("organization"))
+    if publisher:
+        item["publisher"] = decode_latex(publisher)
+    if fields.get("number"):
+        item["issue" if csl_type.startswith("article") else "number"] = decode_latex(fields["number"])
+    if fields.get("pages"):
+        item["page"] = decode_latex(re.sub(r"-{2,3}", "-", fields["pages"]))
+
+    issued = _issued(fields)
+    if issued:
+        item["issued"] = issued
+    if fields.get("urldate"):
+        accessed = _csl_date(fields["urldate"])
+        if accessed:
+            item["accessed"] = accessed
+
+    for name, value in fields.items():
+        variable = _CSL_VARIABLES.get(name)
+        if variable and value and variable not in item:
+            item[variable] = decode_latex(value)
+        elif name in _VERBATIM and value.strip():
+            item[_VERBATIM[name]] = " ".join(value.replace("{", "").replace("}", "").split())
+    if "language" not in item and fields.get("langid"):
+        item["language"] = decode_latex(fields["langid"])
+    return item
+
+
+def _inherit(fields, parent):
+    """Child fields plus every field it lacks from its crossref parent."""
+    merged = dict(fields)
+    for name, value in parent.items():
+        if name not in _NOT_INHERITED and name not in merged:
+            merged[name] = value
+    if "booktitle" not in merged and parent.get("title"):
+        merged["booktitle"] = parent["title"]
+    return merged
+
+
+def iter_bibtex_entries(fp, chunk_size=CHUNK_SIZE, prefix=""):
+    """
+    Yield (entry_type, key, raw fields) for each entry, with macros expanded
+    and crossref fields inherited (see the module docstring for the order).
+    """
+    macros = dict(MONTH_MACROS)
+    parents = OrderedDict()  # lower-cased key -> fields of recent parent-like entries
+    waiting = {}             # lower-cased parent key -> [(seq, type, key, fields)] read before it
+    seq = 0
+    for block_type, body in _iter_blocks(fp, chunk_size, prefix):
+        if block_type == "string":
+            for name, value in _parse_fields(body, 0, macros).items():
+                macros[name] = value
+            continue
+        if block_type in ("comment", "preamble"):
+            continue
+
+        m = _CITE_KEY.match(body)
+        key = m.group(1)
+        fields = _parse_fields(body, m.end(), macros)
+        ref = fields.get("crossref", "").strip().lower()
+        if ref:
+            parent = parents.get(ref)
+            if parent is None:
+                waiting.setdefault(ref, []).append((seq, block_type, key, fields))
+                seq += 1
+                continue
+            parents.move_to_end(ref)
+            fields = _inherit(fields, parent)
+        seq += 1
+
+        # The entry, then any children that were waiting for it (and theirs, for crossref chains)
+        ready = deque([(block_type, key, fields)])
+        while ready:
+            entry_type, entry_key, entry_fields = ready.popleft()
+            yield entry_type, entry_key, entry_fields
+            lowered = entry_key.lower()
+            if entry_type in PARENT_TYPES or lowered in waiting:
+                parents[lowered] = entry_fields
+                if len(parents) > PARENT_CACHE_SIZE:
+                    parents.popitem(last=False)
+            for _seq, child_type, child_key, child_fields in waiting.pop(lowered, ()):
+                ready.append((child_type, child_key, _inherit(child_fields, entry_fields)))
+
+    orphans = sorted(child for children in waiting.values() for child in children)
+    if orphans:
+        print(f"⚠️ {len(orphans)} BibTeX entr{'y' if len(orphans) == 1 else 'ies'} cross-reference "
+              f"missing entries ({', '.join(sorted(waiting))[:200]}); used without inherited fields.",
+              file=sys.stderr)
+    for _seq, child_type, child_key, child_fields in orphans:
+        yield child_type, child_key, child_fields
+
+
+def iter_bibtex_items(fp, chunk_size=CHUNK_SIZE, prefix=""):
+    """
+    Yield CSL item dicts from a BibTeX / BibLaTeX text stream, one at a time.
+
+    Parameters:
+        fp: Readable text stream (file, io.StringIO, ...).
+        chunk_size (int): Characters read per refill.
+        prefix (str): Text already read from fp.
+
+    Raises:
+        ValueError: If the input ends inside an entry.
+    """
+    for entry_type, key, fields in iter_bibtex_entries(fp, chunk_size, prefix):
+        yield entry_to_csl(entry_type, key, fields)
+
+
+def iter_bibtex_items_from_file(filepath, chunk_size=CHUNK_SIZE):
+    """Open `filepath` and stream its entries as CSL items."""
+    with open(filepath, "r", encoding="utf-8") as f:
+        yield from iter_bibtex_items(f, chunk_size)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    paths = [a for a in args if not a.startswith("--")]
+    if not paths:
+        print("Usage: python3 bibtex.py FILE.bib [--count]")
+        sys.exit(1)
+    started = time.perf_counter()
+    count = 0
+    for csl_item in iter_bibtex_items_from_file(paths[0]):
+        count += 1
+        if "--count" not in args:
+            print(json.dumps(csl_item, ensure_ascii=False))
+    if "--count" in args:
+        elapsed = time.perf_counter() - started
+        print(f"📚 {count} entries in {elapsed:.2f}s ({count / max(elapsed, 1e-9):,.0f} entries/s)")
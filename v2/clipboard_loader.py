@@ -2,7 +2,9 @@
 
 import platform
 import os
-import subprocess
+import io
+from bibtex import looks_like_bibtex
+from metrics import METRICS
 
 def detect_platform():
     """
@@ -34,48 +36,98 @@ def _looks_like_json(s: str) -> bool:
     s = s.strip()
     return s.startswith("{") or s.startswith("[")
 
-def load_clipboard_or_file(filepath="input.txt"):
+def _looks_like_input(s: str) -> bool:
+    """CSL JSON or BibTeX; both are read by csl_stream.iter_csl_items."""
+    return _looks_like_json(s) or looks_like_bibtex(s)
+
+def _mirror_to_file(content: str, filepath: str):
+    """
+    Mirror clipboard content to `filepath` for auditability, skipping the write
+    when the file already holds exactly this content.
+    """
+    data = content.encode("utf-8")
+    try:
+        if os.path.getsize(filepath) == len(data):
+            with open(filepath, "rb") as f:
+                if f.read() == data:
+                    return
+    except OSError:
+        pass
+    with open(filepath, "wb") as f:
+        f.write(data)
+
+def get_clipboard_text(platform_type=None):
     """
-    Attempts to read JSON/BibTeX from clipboard (Linux or Termux), or falls back to input.txt.
+    Return the raw clipboard text (Linux: pyperclip, Termux: termux-clipboard-get),
+    or None on platforms without a supported clipboard. Backend errors propagate.
     """
+    platform_type = platform_type or detect_platform()
+    if platform_type == "linux":
+        import pyperclip
+        return (pyperclip.paste() or "").strip()
+    if platform_type == "android-termux":
+        import subprocess  # only needed for the Termux clipboard
+        return subprocess.check_output(["termux-clipboard-get"]).decode("utf-8").strip()
+    return None
+
+def read_clipboard(filepath="input.txt"):
+    """
+    Return JSON text from the clipboard (Linux or Termux), or None if the clipboard
+    is unavailable or holds something else. Clipboard text is mirrored to `filepath`.
+    """
+    with METRICS.timer("input.clipboard"):
+        return _read_clipboard(filepath)
+
+def _read_clipboard(filepath):
     platform_type = detect_platform()
 
     if platform_type == "linux":
         try:
-            import pyperclip
-            content = (pyperclip.paste() or "").strip()
-            if _looks_like_json(content):
-                print("📋 Clipboard input (Linux) loaded.")
+            content = get_clipboard_text(platform_type)
+            if _looks_like_input(content):
+                print(f"📋 Clipboard input (Linux{', BibTeX' if not _looks_like_json(content) else ''}) loaded.")
                 # mirror to file for auditability
-                with open(filepath, "w", encoding="utf-8") as f:
-                    f.write(content)
+                _mirror_to_file(content, filepath)
                 return content
-            elif "@article" in content or "@book" in content or "@inproceedings" in content:
-                # save BibTeX for reference but do not return it (v2 is JSON-only)
-                with open(filepath, "w", encoding="utf-8") as f:
-                    f.write(content)
-                print("⚠️ Detected BibTeX in clipboard; v2 expects CSL JSON. Falling back to input.txt.")
-                # fall through to file load below
         except Exception as e:
             print(f"⚠️ pyperclip failed: {e}")
 
     elif platform_type == "android-termux":
         try:
-            content = subprocess.check_output(["termux-clipboard-get"]).decode("utf-8").strip()
+            content = get_clipboard_text(platform_type)
             # always mirror clipboard to file
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write(content)
-            if _looks_like_json(content):
-                print("📋 Clipboard input (Android/Termux) loaded.")
+            _mirror_to_file(content, filepath)
+            if _looks_like_input(content):
+                print(f"📋 Clipboard input (Android/Termux{', BibTeX' if not _looks_like_json(content) else ''}) loaded.")
                 return content
-            elif "@article" in content or "@book" in content or "@inproceedings" in content:
-                print("⚠️ Detected BibTeX in clipboard; v2 expects CSL JSON. Falling back to input.txt.")
-                # fall through to file load below
-            # else: non-JSON, non-BibTeX → fall through
+            # else: neither JSON nor BibTeX → fall through
         except Exception as e:
             print(f"❌ Failed to read clipboard: {e}")
 
+    return None
+
+def load_clipboard_or_file(filepath="input.txt"):
+    """
+    Attempts to read CSL JSON or BibTeX from clipboard (Linux or Termux), or falls back to input.txt.
+    """
+    content = read_clipboard(filepath)
+    if content is not None:
+        return content
+
     # Fallback to file
     with open(filepath, encoding="utf-8") as f:
         print("📄 Loaded input from file.")
         return f.read()
+
+def open_clipboard_or_file(filepath="input.txt"):
+    """
+    Like load_clipboard_or_file, but returns a readable text stream so large
+    input files can be parsed incrementally (see csl_stream.iter_csl_items)
+    instead of being read into memory in one go.
+    """
+    content = read_clipboard(filepath)
+    if content is not None:
+        return io.StringIO(content)
+
+    print("📄 Loading input from file.")
+    return open(filepath, encoding="utf-8")
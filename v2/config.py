@@ -1,9 +1,28 @@
 # config.py
 import os
-from dotenv import load_dotenv
+
+
+def _load_env():
+    """
+    Load the nearest .env (next to this file or in a parent directory, the
+    same search python-dotenv does). python-dotenv is only imported if a .env
+    file actually exists.
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        path = os.path.join(directory, ".env")
+        if os.path.isfile(path):
+            from dotenv import load_dotenv
+            load_dotenv(path)
+            return
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return
+        directory = parent
+
 
 # Auto-load .env file if present in project root
-load_dotenv()
+_load_env()
 
 ZOTERO_API_KEY    = os.getenv("ZOTERO_API_KEY")
 LIBRARY_TYPE      = os.getenv("ZOTERO_LIBRARY", "user").lower()  # "user" | "group"
@@ -12,6 +31,32 @@ ZOTERO_USERNAME   = os.getenv("ZOTERO_USERNAME")
 ZOTERO_GROUP_ID   = os.getenv("ZOTERO_GROUP_ID")
 OBSIDIAN_VAULT_PATH = os.getenv("OBSIDIAN_VAULT_PATH", "/home/youruser/wealtheow/LN Literature Notes")
 
+# Local state (dedup index, caches, journals); kept out of the vault
+BIBNOW_DATA_DIR     = os.path.expanduser(os.getenv("BIBNOW_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".bibnow")))
+DEDUP_INDEX_PATH    = os.getenv("BIBNOW_DEDUP_INDEX", os.path.join(BIBNOW_DATA_DIR, "dedup_index.sqlite"))
+JOURNAL_PATH        = os.path.join(BIBNOW_DATA_DIR, "commit_journal.jsonl")
+
+# Local ingestion server (ingest_server.py): address, queue and micro-batching
+INGEST_HOST            = os.getenv("BIBNOW_INGEST_HOST", "127.0.0.1")
+INGEST_PORT            = int(os.getenv("BIBNOW_INGEST_PORT", "8765"))
+INGEST_TOKEN           = os.getenv("BIBNOW_INGEST_TOKEN")  # if set, clients must send X-Bibnow-Token
+INGEST_QUEUE_PATH      = os.path.join(BIBNOW_DATA_DIR, "ingest_queue.sqlite")
+INGEST_JOURNAL_PATH    = os.path.join(BIBNOW_DATA_DIR, "ingest_journal.jsonl")
+INGEST_BATCH_SIZE      = int(os.getenv("BIBNOW_INGEST_BATCH_SIZE", "50"))
+INGEST_BATCH_WINDOW    = float(os.getenv("BIBNOW_INGEST_BATCH_WINDOW", "2"))  # seconds to wait for a fuller batch
+
+# Zotero Web API root; point it at fake_zotero_server.py for offline load tests
+ZOTERO_API_URL         = os.getenv("ZOTERO_API_URL", "https://api.zotero.org").rstrip("/")
+
+# HTTP behaviour for Zotero API calls (seconds / attempts)
+ZOTERO_CONNECT_TIMEOUT = float(os.getenv("ZOTERO_CONNECT_TIMEOUT", "5"))
+ZOTERO_READ_TIMEOUT    = float(os.getenv("ZOTERO_READ_TIMEOUT", "30"))
+ZOTERO_MAX_RETRIES     = int(os.getenv("ZOTERO_MAX_RETRIES", "5"))
+
+# Concurrent uploads: requests in flight at once, and requests/second across all of them
+ZOTERO_CONCURRENCY     = int(os.getenv("ZOTERO_CONCURRENCY", "4"))
+ZOTERO_RATE_LIMIT      = float(os.getenv("ZOTERO_RATE_LIMIT", "5"))
+
 # Optional per-user overrides without editing repo files.
 try:
     from config_local import *  # noqa: F401,F403
@@ -22,16 +67,21 @@ except Exception:
 def _die(msg: str):
     raise RuntimeError(f"[config] {msg}")
 
-if not ZOTERO_API_KEY:
-    _die("ZOTERO_API_KEY is not set. Copy .env.example to .env and fill it in.")
+def require_credentials():
+    """
+    Check the Zotero settings needed to call the API. Called when the first
+    Zotero client is created, so a dry-run works without any credentials.
+    """
+    if not ZOTERO_API_KEY:
+        _die("ZOTERO_API_KEY is not set. Copy .env.example to .env and fill it in.")
 
-if LIBRARY_TYPE not in {"user", "group"}:
-    _die("ZOTERO_LIBRARY must be 'user' or 'group'.")
+    if LIBRARY_TYPE not in {"user", "group"}:
+        _die("ZOTERO_LIBRARY must be 'user' or 'group'.")
 
-if LIBRARY_TYPE == "user":
-    if not ZOTERO_USER_ID or not ZOTERO_USERNAME:
-        _die("For ZOTERO_LIBRARY=user, set both ZOTERO_USER_ID (numeric) and ZOTERO_USERNAME (string).")
-else:
-    if not ZOTERO_GROUP_ID:
-        _die("For ZOTERO_LIBRARY=group, set ZOTERO_GROUP_ID (numeric).")
+    if LIBRARY_TYPE == "user":
+        if not ZOTERO_USER_ID or not ZOTERO_USERNAME:
+            _die("For ZOTERO_LIBRARY=user, set both ZOTERO_USER_ID (numeric) and ZOTERO_USERNAME (string).")
+    else:
+        if not ZOTERO_GROUP_ID:
+            _die("For ZOTERO_LIBRARY=group, set ZOTERO_GROUP_ID (numeric).")
 
@@ -0,0 +1,51 @@
+# conftest.py
+
+"""
+pytest setup for the tests kept next to the modules (python -m pytest v2).
+The modules import each other by plain name, so this directory goes on sys.path.
+"""
+
+import atexit
+import importlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+# config reads the environment once, on import: point the data directory and the
+# vault at a scratch directory so tests never touch the real ones
+_SCRATCH = tempfile.mkdtemp(prefix="bibnow-tests-")
+atexit.register(shutil.rmtree, _SCRATCH, ignore_errors=True)
+os.environ["BIBNOW_DATA_DIR"] = os.path.join(_SCRATCH, "data")
+os.environ["OBSIDIAN_VAULT_PATH"] = os.path.join(_SCRATCH, "vault")
+os.environ.pop("BIBNOW_DEDUP_INDEX", None)
+
+# pytest also puts the repository root on sys.path, and its config.py is v1's; load v2's first
+importlib.import_module("config")
+
+# A manual script that uploads to the real Zotero API, not a pytest test
+collect_ignore = ["test_zotero_upload.py"]
+
+
+@pytest.fixture
+def run_pipeline(tmp_path):
+    """
+    Run pipeline.py in a subprocess against a fake Zotero server, with its data
+    directory and vault under tmp_path: run_pipeline(args, server, retries=1).
+    """
+    (tmp_path / "vault").mkdir(exist_ok=True)
+
+    def run(args, server, retries=1):
+        env = dict(os.environ, ZOTERO_API_KEY="test", ZOTERO_USER_ID="1", ZOTERO_USERNAME="test",
+                   ZOTERO_LIBRARY="user", ZOTERO_API_URL=server.url, ZOTERO_MAX_RETRIES=str(retries),
+                   BIBNOW_DATA_DIR=str(tmp_path / "data"), OBSIDIAN_VAULT_PATH=str(tmp_path / "vault"))
+        return subprocess.run([sys.executable, "pipeline.py", *args], cwd=HERE, env=env, stdin=subprocess.DEVNULL,
+                              capture_output=True, text=True, timeout=120)
+
+    return run
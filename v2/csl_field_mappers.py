@@ -1,21 +1,45 @@
 
+# === Mapper applicability ===
+
+def applies_to(*item_types, exclude=()):
+    """
+    Declare which Zotero item types a mapper does anything for, so csl_mapper can
+    build per-type mapping plans that skip irrelevant mappers entirely.
+    With no item_types the mapper applies to every type (minus `exclude`).
+    The mappers keep their own item_type checks, so calling them directly is still safe.
+    """
+    def decorate(fn):
+        fn.item_types = frozenset(item_types) or None
+        fn.excluded_item_types = frozenset(exclude)
+        return fn
+    return decorate
+
+def mapper_applies(fn, item_type):
+    """True if mapper `fn` can have an effect on items of `item_type`."""
+    types = getattr(fn, "item_types", None)
+    if types is not None and item_type not in types:
+        return False
+    return item_type not in getattr(fn, "excluded_item_types", ())
+
 # === Core conditional mappings ===
 
+CONTAINER_TITLE_FIELDS = {
+    "journalArticle": "publicationTitle",
+    "magazineArticle": "publicationTitle",
+    "newspaperArticle": "publicationTitle",
+    "bookSection": "bookTitle",
+    "conferencePaper": "proceedingsTitle",
+    "dictionaryEntry": "dictionaryTitle",
+    "encyclopediaArticle": "encyclopediaTitle"
+}
+
+@applies_to(*CONTAINER_TITLE_FIELDS)
 def map_container_title(csl_item, zotero_item, item_type):
     """Maps CSL 'container-title' to appropriate Zotero container field."""
     container = csl_item.get("container-title")
     if not container:
         return
-    field_map = {
-        "journalArticle": "publicationTitle",
-        "magazineArticle": "publicationTitle",
-        "newspaperArticle": "publicationTitle",
-        "bookSection": "bookTitle",
-        "conferencePaper": "proceedingsTitle",
-        "dictionaryEntry": "dictionaryTitle",
-        "encyclopediaArticle": "encyclopediaTitle"
-    }
-    target = field_map.get(item_type)
+    target = CONTAINER_TITLE_FIELDS.get(item_type)
     if target:
         zotero_item[target] = container
 
@@ -55,6 +79,7 @@ def map_genre(csl_item, zotero_item, item_type):
     else:
         zotero_item["extra"] = zotero_item.get("extra", "") + f"\ngenre: {genre}"
 
+@applies_to("conferencePaper")
 def map_event(csl_item, zotero_item, item_type):
     """Maps CSL 'event' to Zotero 'conferenceName' (only for conferencePaper)."""
     event = csl_item.get("event")
@@ -86,6 +111,7 @@ def map_issued_date(csl_item, zotero_item, item_type):
 
 # === Legal/Governmental ===
 
+@applies_to("case")
 def map_case_fields(csl_item, zotero_item, item_type):
     """
     Special handling for legal cases in Zotero.
@@ -140,6 +166,7 @@ def map_case_fields(csl_item, zotero_item, item_type):
             zotero_item["firstPage"] = str(page_val)
 
 
+@applies_to("bill")
 def map_bill_fields(csl_item, zotero_item, item_type):
     """Maps fields for bills."""
     if item_type != "bill":
@@ -148,6 +175,7 @@ def map_bill_fields(csl_item, zotero_item, item_type):
         if k in csl_item:
             zotero_item[k] = csl_item[k]
 
+@applies_to("statute")
 def map_statute_fields(csl_item, zotero_item, item_type):
     """Maps fields for statutes."""
     if item_type != "statute":
@@ -156,6 +184,7 @@ def map_statute_fields(csl_item, zotero_item, item_type):
         if k in csl_item:
             zotero_item[k] = csl_item[k]
 
+@applies_to("hearing")
 def map_hearing_fields(csl_item, zotero_item, item_type):
     """Maps fields for legislative hearings."""
     if item_type != "hearing":
@@ -166,24 +195,28 @@ def map_hearing_fields(csl_item, zotero_item, item_type):
 
 # === Media, interviews, presentations ===
 
+@applies_to("presentation")
 def map_presentation_fields(csl_item, zotero_item, item_type):
     if item_type != "presentation":
         return
     if "event" in csl_item:
         zotero_item["meetingName"] = csl_item["event"]
 
+@applies_to("interview")
 def map_interview_fields(csl_item, zotero_item, item_type):
     if item_type != "interview":
         return
     if "medium" in csl_item:
         zotero_item["interviewMedium"] = csl_item["medium"]
 
+@applies_to("audioRecording")
 def map_audio_fields(csl_item, zotero_item, item_type):
     if item_type != "audioRecording":
         return
     if "medium" in csl_item:
         zotero_item["audioRecordingFormat"] = csl_item["medium"]
 
+@applies_to("videoRecording")
 def map_video_fields(csl_item, zotero_item, item_type):
     if item_type != "videoRecording":
         return
@@ -200,6 +233,7 @@ def map_url(csl_item, zotero_item, item_type):
     if "URL" in csl_item:
         zotero_item["url"] = csl_item["URL"]
 
+@applies_to(exclude=("case",))
 def map_pages(csl_item, zotero_item, item_type):
     if item_type == "case":
         return  # 'pages' is not valid for Zotero case
@@ -240,6 +274,7 @@ def map_extra_fields(csl_item, zotero_item, item_type):
     standard_keys = {
         "title", "type", "author", "editor", "issued", "DOI", "URL", "container-title",
         "publisher", "page", "note", "language", "accessed", "abstract",
+        "file",  # local file paths are attached as files (attachments.py), not kept in 'extra'
         "title-short", "genre", "event", "keywords", "keyword", "id", "section", "category", "topic"
         # keep case-specific fields out of 'extra' if we mapped them
         "caseName", "court", "authority"
@@ -11,7 +11,7 @@ Assumes:
 See: zotero_writer.py for the upload logic
 """
 import json
-from zotero_allowed_fields import ZOTERO_ALLOWED_FIELDS
+from zotero_schema import SCHEMA
 from csl_field_mappers import (
     map_container_title,
     map_publisher_field,
@@ -35,7 +35,8 @@ from csl_field_mappers import (
     map_abstract,
     map_access_date,
     map_tags,
-    map_extra_fields
+    map_extra_fields,
+    mapper_applies
 )
 
 # Complete mapping
@@ -79,15 +80,84 @@ CSL_TO_ZOTERO_TYPE = {
     "webpage": "webpage"
 }
 
-def clean_unexpected_fields(zotero_item):
-    """Moves fields not allowed by Zotero to the 'extra' field."""
-    item_type = zotero_item.get("itemType")
-    allowed_fields = set(ZOTERO_ALLOWED_FIELDS.get(item_type, []))
+# All field mappers, in the order they are applied
+FIELD_MAPPERS = (
+    map_container_title,
+    map_publisher_field,
+    map_genre,
+    map_event,
+    map_title_short,
+    map_note,
+    map_issued_date,
+
+    map_case_fields,
+    map_bill_fields,
+    map_statute_fields,
+    map_hearing_fields,
+    map_presentation_fields,
+    map_interview_fields,
+    map_audio_fields,
+    map_video_fields,
+
+    map_doi,
+    map_url,
+    map_pages,
+    map_language,
+    map_abstract,
+    map_access_date,
+    map_tags,
+    map_extra_fields,
+)
+
+
+class MappingPlan:
+    """
+    Precompiled mapping steps for one Zotero item type: only the field mappers
+    that can affect that type, a frozen set of the fields Zotero accepts for it
+    ('tags' is allowed on every type) and, from the schema, the type-specific
+    fields that stand in for base fields (e.g. a statute's date is dateEnacted).
+    """
+    __slots__ = ("item_type", "mappers", "allowed_fields", "type_fields")
+
+    def __init__(self, item_type):
+        self.item_type = item_type
+        self.mappers = tuple(m for m in FIELD_MAPPERS if mapper_applies(m, item_type))
+        self.allowed_fields = SCHEMA.fields.get(item_type, frozenset()) | {"tags"}
+        self.type_fields = SCHEMA.type_fields.get(item_type, {})
+
+    def apply(self, csl_item, zotero_item):
+        for mapper in self.mappers:
+            mapper(csl_item, zotero_item, self.item_type)
+
+
+_PLANS = {}
+
+def get_mapping_plan(item_type):
+    """Return the cached MappingPlan for a Zotero item type, building it on first use."""
+    plan = _PLANS.get(item_type)
+    if plan is None:
+        plan = _PLANS[item_type] = MappingPlan(item_type)
+    return plan
+
+
+def clean_unexpected_fields(zotero_item, allowed_fields=None, type_fields=None):
+    """
+    Moves fields not allowed by Zotero to the 'extra' field. A base field the
+    type names differently (`type_fields`, e.g. date → dateEnacted) is renamed
+    instead, unless the type-specific field is already set.
+    """
+    if allowed_fields is None:
+        plan = get_mapping_plan(zotero_item.get("itemType"))
+        allowed_fields, type_fields = plan.allowed_fields, plan.type_fields
     extra_lines = []
 
     for field in list(zotero_item.keys()):
         if field not in allowed_fields and field != "itemType" and field != "creators":
             value = zotero_item.pop(field)
+            target = type_fields.get(field) if type_fields else None
+            if target and target not in zotero_item and value not in (None, ""):
+                zotero_item[target] = value
+                continue
             if isinstance(value, (list, dict)):
                 value = json.dumps(value)
             extra_lines.append(f"{field}: {value}")
@@ -146,8 +216,7 @@ def csl_to_zotero(csl_item):
 
     item_type = CSL_TO_ZOTERO_TYPE.get(csl_type, "document")
 
-    # Use allowed field whitelist
-    allowed_fields = ZOTERO_ALLOWED_FIELDS.get(item_type, [])
+    plan = get_mapping_plan(item_type)
 
     # Start with required fields
     zotero_item = {
@@ -157,39 +226,14 @@ def csl_to_zotero(csl_item):
         "creators": map_creators(csl_item)
     }
 
-    map_container_title(csl_item, zotero_item, item_type)
-    map_publisher_field(csl_item, zotero_item, item_type)
-    map_genre(csl_item, zotero_item, item_type)
-    map_event(csl_item, zotero_item, item_type)
-    map_title_short(csl_item, zotero_item, item_type)
-    map_note(csl_item, zotero_item, item_type)
-    map_issued_date(csl_item, zotero_item, item_type)
-    
-    map_case_fields(csl_item, zotero_item, item_type)
-    map_bill_fields(csl_item, zotero_item, item_type)
-    map_statute_fields(csl_item, zotero_item, item_type)
-    map_hearing_fields(csl_item, zotero_item, item_type)
-    map_presentation_fields(csl_item, zotero_item, item_type)
-    map_interview_fields(csl_item, zotero_item, item_type)
-    map_audio_fields(csl_item, zotero_item, item_type)
-    map_video_fields(csl_item, zotero_item, item_type)
-
-    map_doi(csl_item, zotero_item, item_type)
-    map_url(csl_item, zotero_item, item_type)
-    map_pages(csl_item, zotero_item, item_type)
-    map_language(csl_item, zotero_item, item_type)
-    map_abstract(csl_item, zotero_item, item_type)
-    map_access_date(csl_item, zotero_item, item_type)
-    map_tags(csl_item, zotero_item, item_type)
-    map_extra_fields(csl_item, zotero_item, item_type)
-
-# Patch all Zotero types to allow 'tags' globally (runtime override)
-    for fields in ZOTERO_ALLOWED_FIELDS.values():
-        if "tags" not in fields:
-            fields.append("tags")
-
-
-    clean_unexpected_fields(zotero_item)
+    # Only the mappers relevant to this item type
+    plan.apply(csl_item, zotero_item)
+
+    clean_unexpected_fields(zotero_item, plan.allowed_fields, plan.type_fields)
+
+    # Zotero rejects creator roles the item type does not have (e.g. an editor of a case)
+    for creator in zotero_item["creators"]:
+        creator["creatorType"] = SCHEMA.valid_creator_type(item_type, creator["creatorType"])
 
  
     # debug
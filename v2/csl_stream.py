@@ -0,0 +1,173 @@
+# csl_stream.py
+
+"""
+Incremental CSL-JSON reader for very large inputs.
+
+Yields CSL items one at a time from a text stream without ever holding the
+whole document in memory. Accepted layouts:
+
+- a single CSL object:                 { ... }
+- a top-level JSON array of objects:   [ {...}, {...} ]
+- newline-delimited JSON (NDJSON):     {...}\n{...}\n
+  (any whitespace-separated sequence of objects or arrays works)
+
+Only the text of the item currently being parsed is buffered, so peak memory
+depends on the largest single item, not on the size of the file, and the
+first item is available as soon as its closing brace has been read.
+
+BibTeX / BibLaTeX input (anything not starting with `{` or `[` that has a
+line starting with an entry such as `@article{`) is handed to
+bibtex.iter_bibtex_items, which streams it the same way and yields CSL items
+too. The reader looks past any number of chunks for that first entry and
+skips the text before its line, whatever the chunk size.
+"""
+
+import json
+import re
+
+from bibtex import first_entry_line, iter_bibtex_items
+
+CHUNK_SIZE = 1 << 16  # 64 KiB reads
+
+# Next structural character outside / inside a JSON string
+_STRUCTURAL = re.compile(r'[{}\[\]"]')
+_IN_STRING = re.compile(r'["\\]')
+
+NOT_JSON_MESSAGE = ("Input is neither CSL JSON nor BibTeX. v2 expects CSL JSON (an object, an array "
+                    "or one object per line) or BibTeX / BibLaTeX entries (@article{…}).")
+
+
+class _Buffer:
+    """Sliding text window over a stream; consumed text is dropped on refill."""
+
+    def __init__(self, fp, chunk_size):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Read another chunk, discarding text before `pos`. Returns False at EOF."""
+        if self.eof:
+            return False
+        chunk = self.fp.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.text = self.text[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Skip whitespace and return the next character ('' at EOF) without consuming it."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ""
+
+    def find_bibtex(self):
+        """
+        Read on until a line starts a BibTeX entry and move `pos` to it; returns
+        False if none does. Earlier lines are dropped, so a long comment header
+        is not held in memory.
+        """
+        while True:
+            at = first_entry_line(self.text[self.pos:])
+            if at >= 0:
+                self.pos += at
+                return True
+            # Keep the unfinished last line: the rest of it may arrive with the next chunk
+            self.pos = max(self.pos, self.text.rfind("\n") + 1)
+            if not self.fill():
+                return False
+
+    def read_object(self):
+        """Consume one JSON object starting at `pos` and return it decoded."""
+        depth = 0
+        in_string = False
+        i = self.pos
+        while True:
+            pattern = _IN_STRING if in_string else _STRUCTURAL
+            m = pattern.search(self.text, i)
+            if m is None:
+                offset = i - self.pos
+                if not self.fill():
+                    raise ValueError("Unexpected end of input inside a CSL item.")
+                i = self.pos + offset
+                continue
+            ch = m.group()
+            i = m.end()
+            if in_string:
+                if ch == "\\":
+                    if i >= len(self.text):
+                        offset = i - self.pos
+                        if not self.fill():
+                            raise ValueError("Unexpected end of input inside a CSL item.")
+                        i = self.pos + offset
+                    i += 1  # skip the escaped character
+                else:
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch in "{[":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    obj = json.loads(self.text[self.pos:i])
+                    self.pos = i
+                    return obj
+
+
+def iter_csl_items(fp, chunk_size=CHUNK_SIZE):
+    """
+    Yield CSL item dicts from a text stream, one at a time. BibTeX input is
+    recognized and converted (see bibtex.py).
+
+    Parameters:
+        fp: Readable text stream (file, io.StringIO, ...).
+        chunk_size (int): Characters read per refill.
+
+    Raises:
+        ValueError: if the input is neither JSON nor BibTeX, or an array element is not an object.
+    """
+    buf = _Buffer(fp, chunk_size)
+    ch = buf.peek()
+    if ch not in ("{", "["):
+        if ch and buf.find_bibtex():
+            yield from iter_bibtex_items(fp, chunk_size, prefix=buf.text[buf.pos:])
+            return
+        raise ValueError(NOT_JSON_MESSAGE)
+
+    while ch:
+        if ch == "{":
+            yield buf.read_object()
+        elif ch == "[":
+            buf.pos += 1
+            ch = buf.peek()
+            while ch != "]":
+                if not ch:
+                    raise ValueError("Unexpected end of input inside a CSL array.")
+                if ch != "{":
+                    raise ValueError("CSL input arrays must contain only JSON objects.")
+                yield buf.read_object()
+                ch = buf.peek()
+                if ch == ",":
+                    buf.pos += 1
+                    ch = buf.peek()
+                elif ch != "]":
+                    raise ValueError("Malformed CSL JSON array (expected ',' or ']').")
+            buf.pos += 1
+        else:
+            raise ValueError("Unexpected content between CSL items.")
+        ch = buf.peek()
+
+
+def iter_csl_items_from_file(filepath, chunk_size=CHUNK_SIZE):
+    """Open `filepath` and stream its CSL items (JSON object, array or NDJSON, or BibTeX)."""
+    with open(filepath, "r", encoding="utf-8") as f:
+        yield from iter_csl_items(f, chunk_size)
@@ -0,0 +1,240 @@
+# dedup_index.py
+
+"""
+Persistent local duplicate index (SQLite).
+
+Maps normalized identifiers of every item bibnow has written to its Zotero key
+and Obsidian note path, so re-running a batch or pasting an overlapping
+clipboard does not create the same Zotero item twice.
+
+Identifiers, in order of precedence:
+- doi:   lower-cased DOI without resolver prefix
+- isbn:  ISBN-13 digits (ISBN-10 is converted)
+- url:   lower-cased host, no scheme/"www."/fragment/trailing slash
+- title: normalized title + year + first creator's last name (only when the
+         item has all three; "Editorial|2020|" would match unrelated items)
+
+A DOI or ISBN on both sides that differs vetoes any weaker match: two
+"Introduction"s by Smith in 2020 with different DOIs are different works.
+
+Each lookup is a primary-key probe; each update is a single transaction, so
+the index never holds half of an item's identifiers.
+"""
+
+import os
+import re
+import sqlite3
+import unicodedata
+
+_DOI_PREFIX = re.compile(r"^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)", re.IGNORECASE)
+_EXTRA_LINE = re.compile(r"^\s*(DOI|ISBN)\s*:\s*(\S.*?)\s*$", re.IGNORECASE | re.MULTILINE)
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_doi(value):
+    if not value:
+        return None
+    doi = _DOI_PREFIX.sub("", str(value).strip()).strip().lower()
+    return doi if doi.startswith("10.") else None
+
+
+def normalize_isbn(value):
+    """Return the ISBN-13 for an ISBN-10/13 string, or None."""
+    if not value:
+        return None
+    digits = re.sub(r"[^0-9Xx]", "", str(value)).upper()
+    if len(digits) == 13 and digits.isdigit():
+        return digits
+    if len(digits) == 10 and digits[:9].isdigit():
+        core = "978" + digits[:9]
+        total = sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(core))
+        return core + str((10 - total % 10) % 10)
+    return None
+
+
+def normalize_url(value):
+    if not value:
+        return None
+    url = str(value).strip().split("#", 1)[0].lower()
+    url = re.sub(r"^[a-z][a-z0-9+.-]*://", "", url)
+    if url.startswith("www."):
+        url = url[4:]
+    url = url.rstrip("/")
+    return url or None
+
+
+def _fold(text):
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    return _NON_ALNUM.sub(" ", text).strip()
+
+
+def title_fingerprint(zotero_item):
+    """Normalized 'title|year|first-creator' key, or None unless the item has all three."""
+    title = _fold(zotero_item.get("title") or zotero_item.get("caseName"))
+    year = str(zotero_item.get("date") or zotero_item.get("dateDecided") or "")[:4].strip()
+    creators = zotero_item.get("creators") or []
+    first = _fold(creators[0].get("lastName") or creators[0].get("name")) if creators else ""
+    if not (title and year and first):
+        return None
+    return f"{title}|{year}|{first}"
+
+
+def identifiers_for(zotero_item):
+    """
+    Return [(kind, value), ...] for a Zotero-mapped item, strongest identifier first.
+    DOIs and ISBNs moved into 'extra' (for types without those fields) are found too.
+    """
+    found = {}
+    for label, value in _EXTRA_LINE.findall(zotero_item.get("extra") or ""):
+        found.setdefault(label.lower(), value)
+
+    ids = []
+    doi = normalize_doi(zotero_item.get("DOI") or found.get("doi"))
+    if doi:
+        ids.append(("doi", doi))
+    isbn = normalize_isbn(zotero_item.get("ISBN") or found.get("isbn"))
+    if isbn:
+        ids.append(("isbn", isbn))
+    url = normalize_url(zotero_item.get("url"))
+    if url:
+        ids.append(("url", url))
+    fingerprint = title_fingerprint(zotero_item)
+    if fingerprint:
+        ids.append(("title", fingerprint))
+    return ids
+
+
+# Identifiers that name exactly one work: if both items have one and they differ, nothing else counts
+VETO_KINDS = ("doi", "isbn")
+
+
+def conflicting(identifiers, other):
+    """True if the two identifier lists carry a different DOI or a different ISBN."""
+    mine = {kind: value for kind, value in identifiers if kind in VETO_KINDS}
+    return any(mine.get(kind, value) != value for kind, value in other if kind in VETO_KINDS)
+
+
+class SeenIdentifiers:
+    """
+    In-memory counterpart of DedupIndex for repeats within one run, with the
+    same DOI / ISBN veto.
+    """
+
+    def __init__(self):
+        self._items = {}  # identifier -> all identifiers of the item that first had it
+
+    def match(self, identifiers):
+        """Return the first identifier shared with an earlier, non-conflicting item, or None."""
+        for identifier in identifiers:
+            earlier = self._items.get(identifier)
+            if earlier is not None and not conflicting(identifiers, earlier):
+                return identifier
+        return None
+
+    def add(self, identifiers):
+        for identifier in identifiers:
+            self._items.setdefault(identifier, identifiers)
+
+
+class DedupIndex:
+    """
+    SQLite-backed identifier → (zotero_key, note_path) index.
+
+    Parameters:
+        path (str): Database file; parent directories are created as needed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS identifiers (
+                   kind TEXT NOT NULL,
+                   value TEXT NOT NULL,
+                   zotero_key TEXT,
+                   note_path TEXT,
+                   PRIMARY KEY (kind, value)
+               ) WITHOUT ROWID"""
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS identifiers_key ON identifiers (zotero_key)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self.conn.commit()
+
+    @property
+    def seeded_version(self):
+        """Library version up to which mirrored items were added (populate_dedup_index), or None."""
+        row = self.conn.execute("SELECT value FROM meta WHERE name = 'seeded_version'").fetchone()
+        return int(row[0]) if row else None
+
+    def set_seeded_version(self, version):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('seeded_version', ?)",
+                              (str(version),))
+
+    def lookup(self, zotero_item):
+        """
+        Return the first match for the item's identifiers as a dict
+        {"kind", "value", "zotero_key", "note_path"}, or None.
+        """
+        return self.lookup_identifiers(identifiers_for(zotero_item))
+
+    def lookup_identifiers(self, identifiers):
+        """
+        Like lookup(), for identifiers from identifiers_for(). A match is skipped
+        if the indexed item has a different DOI or ISBN than `identifiers`.
+        """
+        for kind, value in identifiers:
+            row = self.conn.execute(
+                "SELECT zotero_key, note_path FROM identifiers WHERE kind = ? AND value = ?",
+                (kind, value),
+            ).fetchone()
+            if row and not self._vetoed(identifiers, kind, row[0]):
+                return {"kind": kind, "value": value, "zotero_key": row[0], "note_path": row[1]}
+        return None
+
+    def _vetoed(self, identifiers, matched_kind, zotero_key):
+        """True if the item under `zotero_key` has a DOI / ISBN that `identifiers` contradicts."""
+        wanted = {kind: value for kind, value in identifiers if kind in VETO_KINDS and kind != matched_kind}
+        if not wanted or zotero_key is None:
+            return False
+        known = {}
+        for kind, value in self.conn.execute(
+                "SELECT kind, value FROM identifiers WHERE zotero_key = ? AND kind IN ('doi', 'isbn')",
+                (zotero_key,)):
+            known.setdefault(kind, set()).add(value)
+        return any(kind in known and value not in known[kind] for kind, value in wanted.items())
+
+    def note_for_key(self, zotero_key):
+        """Return the note path recorded for a Zotero key, or None."""
+        row = self.conn.execute(
+            "SELECT note_path FROM identifiers WHERE zotero_key = ? AND note_path IS NOT NULL LIMIT 1",
+            (zotero_key,),
+        ).fetchone()
+        return row[0] if row else None
+
+    def record(self, zotero_item, zotero_key, note_path=None):
+        """Store all of the item's identifiers in one transaction."""
+        rows = [(kind, value, zotero_key, note_path) for kind, value in identifiers_for(zotero_item)]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO identifiers (kind, value, zotero_key, note_path) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    def record_many(self, entries):
+        """record() for many (zotero_item, zotero_key, note_path) entries, in one transaction."""
+        rows = [(kind, value, zotero_key, note_path)
+                for zotero_item, zotero_key, note_path in entries
+                for kind, value in identifiers_for(zotero_item)]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO identifiers (kind, value, zotero_key, note_path) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,538 @@
+# fake_zotero_server.py
+
+# Usage:
+#   python3 fake_zotero_server.py [--port 8080] [--latency MS] [--p429 P] [--p5xx P] [--plost P]
+#                                 [--retry-after S] [--backoff S --pbackoff P] [--seed N]
+#
+#   then, in another shell:
+#   ZOTERO_API_URL=http://127.0.0.1:8080 python3 pipeline.py --commit --concurrency 4
+
+"""
+Local stand-in for the parts of the Zotero Web API v3 that bibnow uses, for
+offline load tests of the upload and sync paths. No credentials are checked
+beyond the presence of a Zotero-API-Key header.
+
+Writes (POST <library>/items):
+- at most 50 objects per request (413 otherwise);
+- response keyed by index in `successful` / `unchanged` / `failed`, like Zotero;
+  objects with an unknown item type, or a field or creator type that type does
+  not have (per zotero_schema), fail with code 400, so mapping mistakes
+  surface here too;
+- every successful write bumps the library version (Last-Modified-Version);
+- a reused Zotero-Write-Token, or a stale If-Unmodified-Since-Version, gets 412.
+
+Files (the upload handshake of attachments.py):
+- POST <library>/items/<key>/file with md5/filename/filesize/mtime authorizes an
+  upload of an imported-file attachment ({"exists": 1} if a file with that md5
+  was uploaded before); If-None-Match / If-Match are checked as Zotero does;
+- POST /upload/<uploadKey> stands in for the storage server: the body (prefix +
+  file + suffix) is read in blocks and only its md5 is kept, so uploads of any
+  size use constant memory; a size or md5 mismatch gets 400;
+- POST <library>/items/<key>/file with upload=<uploadKey> registers it.
+
+Reads: GET <library>/items (format=json|versions|keys, since, itemKey, start,
+limit), <library>/items/<key>, <library>/deleted?since=; DELETE <library>/items/<key>.
+
+Fault injection, applied to every API request:
+- --latency MS (plus up to 50% jitter) before answering;
+- --p429 P: answer 429 with Retry-After;
+- --p5xx P: answer 500, 502 or 503;
+- --pbackoff P: add a `Backoff` header to an otherwise normal response;
+- --plost P: apply a write, then drop the connection without answering, as
+  when a request times out after Zotero received it.
+
+GET /schema serves the bundled schema snapshot (with an ETag; If-None-Match
+gets 304). GET /stats (not part of the Zotero API) returns request and item
+counters.
+
+From Python (e.g. a benchmark), run it in a background thread:
+
+    with FakeZoteroServer(p429=0.1) as server:
+        client = ZoteroClient("key", server.url + "/users/1")
+"""
+
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from zotero_schema import SCHEMA, SCHEMA_SNAPSHOT_PATH
+from utils import option_value
+
+MAX_WRITE_OBJECTS = 50
+MAX_LIMIT = 100
+DEFAULT_LIMIT = 25
+KEY_ALPHABET = "23456789ABCDEFGHIJKLMNPQRSTUVWXYZ"  # Zotero's object key characters
+# Fields every item may carry besides its type's own fields
+COMMON_FIELDS = frozenset({"itemType", "creators", "tags", "collections", "relations", "key", "version",
+                           "deleted", "dateAdded", "dateModified", "parentItem"})
+# Properties only attachment items have
+ATTACHMENT_FIELDS = frozenset({"linkMode", "contentType", "charset", "filename", "md5", "mtime", "path", "note"})
+UPLOAD_BLOCK_SIZE = 64 * 1024  # bytes read at a time from an upload body
+_LIBRARY_PATH = re.compile(r"^/(users|groups)/(\d+)(/.*)?$")
+
+
+class LibraryState:
+    """In-memory library: items, deletions, version and used write tokens."""
+
+    def __init__(self, seed=0):
+        self.lock = threading.RLock()  # re-entered when a response is sent under the lock
+        self.rng = random.Random(seed)
+        self.version = 0
+        self.items = {}      # key -> data (including "key" and "version")
+        self.deleted = {}    # key -> version at which it was deleted
+        self.tokens = set()
+        self.files = set()   # md5 of every stored file
+        self.uploads = {}    # uploadKey -> authorized upload
+        self.stats = {"requests": 0, "writes": 0, "created": 0, "updated": 0, "unchanged": 0,
+                      "failed": 0, "throttled": 0, "server_errors": 0, "backoffs": 0, "precondition_failed": 0,
+                      "uploads": 0, "upload_bytes": 0, "files_existing": 0, "files_registered": 0,
+                      "lost": 0}
+
+    def new_key(self):
+        while True:
+            key = "".join(self.rng.choice(KEY_ALPHABET) for _ in range(8))
+            if key not in self.items and key not in self.deleted:
+                return key
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.stats[name] += n
+
+
+def _validate(obj):
+    """Return an error message for an object Zotero would reject, or None."""
+    if not isinstance(obj, dict):
+        return "Object is not an object"
+    item_type = obj.get("itemType")
+    if item_type not in SCHEMA.fields:
+        return f"'itemType' property not provided or invalid: {item_type!r}"
+    allowed = COMMON_FIELDS.union(SCHEMA.fields[item_type])
+    if item_type == "attachment":
+        allowed |= ATTACHMENT_FIELDS
+    for field in obj:
+        if field not in allowed:
+            return f"'{field}' is not a valid field for type '{item_type}'"
+    for creator in obj.get("creators") or []:
+        creator_type = creator.get("creatorType") if isinstance(creator, dict) else None
+        if creator_type not in SCHEMA.creator_types[item_type]:
+            return f"'{creator_type}' is not a valid creator type for item type '{item_type}'"
+    return None
+
+
+class FakeZoteroHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like api.zotero.org
+
+    # --- plumbing ---
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            sys.stderr.write("[fake-zotero] " + (format % args) + "\n")
+
+    def _send(self, status, body=None, headers=None):
+        if isinstance(body, (dict, list)):
+            data = json.dumps(body).encode("utf-8")
+            content_type = "application/json"
+        else:
+            data = (body or "").encode("utf-8")
+            content_type = "text/plain"
+        self.send_response(status)
+        headers = dict(headers or {})
+        if self.server.pbackoff and self.state.rng.random() < self.server.pbackoff:
+            headers["Backoff"] = f"{self.server.backoff:g}"
+            self.state.count("backoffs")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _route(self):
+        """Apply faults and split the path; returns (library, rest, query) or None if answered."""
+        # Always consume the body first: an unread body would corrupt the kept-alive connection
+        self.body = self._read_body()
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path == "/stats":
+            with self.state.lock:
+                self._send(200, dict(self.state.stats, library_version=self.state.version, items=len(self.state.items)))
+            return None
+
+        if self._inject_faults():
+            return None
+        if url.path == "/schema":
+            self._send_schema()
+            return None
+        if not self.headers.get("Zotero-API-Key"):
+            self._send(403, "Forbidden")
+            return None
+        match = _LIBRARY_PATH.match(url.path)
+        if not match:
+            self._send(404, "Not found")
+            return None
+        library = {"type": match.group(1)[:-1], "id": int(match.group(2))}
+        return library, (match.group(3) or "/").rstrip("/"), query
+
+    def _inject_faults(self):
+        """Count the request, add latency and maybe answer with a fault; True if answered."""
+        self.state.count("requests")
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency * (1 + 0.5 * self.state.rng.random()))
+        roll = self.state.rng.random()
+        if roll < server.p429:
+            self.state.count("throttled")
+            self._send(429, "Too many requests", {"Retry-After": f"{server.retry_after:g}"})
+            return True
+        if roll < server.p429 + server.p5xx:
+            self.state.count("server_errors")
+            self._send(self.state.rng.choice((500, 502, 503)), "Simulated server error")
+            return True
+        return False
+
+    def _send_schema(self):
+        """GET /schema: the bundled schema snapshot, with an ETag and 304 support."""
+        with open(SCHEMA_SNAPSHOT_PATH, "rb") as f:
+            data = f.read()
+        etag = f'"{hashlib.md5(data).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _entry(self, library, data):
+        prefix = "users" if library["type"] == "user" else "groups"
+        return {"key": data["key"], "version": data["version"], "library": library,
+                "links": {"self": {"href": f"{self.server.url}/{prefix}/{library['id']}/items/{data['key']}",
+                                   "type": "application/json"}},
+                "meta": {}, "data": data}
+
+    # --- writes ---
+
+    def do_POST(self):
+        upload = re.match(r"^/upload/(\w+)$", self.path)
+        if upload:
+            return self._receive_upload(upload.group(1))
+        routed = self._route()
+        if routed is None:
+            return
+        library, rest, _query = routed
+        file_request = re.match(r"^/items/([A-Z0-9]{8})/file$", rest)
+        if file_request:
+            return self._file_request(file_request.group(1))
+        if rest != "/items":
+            return self._send(405, "Method not allowed")
+        try:
+            objects = json.loads(self.body or b"null")
+        except json.JSONDecodeError:
+            return self._send(400, "Invalid JSON")
+        if not isinstance(objects, list):
+            return self._send(400, "Uploaded data must be a JSON array")
+        if len(objects) > MAX_WRITE_OBJECTS:
+            return self._send(413, f"Only {MAX_WRITE_OBJECTS} objects can be saved in a single request")
+
+        state = self.state
+        token = self.headers.get("Zotero-Write-Token")
+        expected = self.headers.get("If-Unmodified-Since-Version")
+        with state.lock:
+            if token and token in state.tokens:
+                state.stats["precondition_failed"] += 1
+                return self._send(412, "Write token already used")
+            if expected is not None and int(expected) != state.version:
+                state.stats["precondition_failed"] += 1
+                return self._send(412, f"Library has been modified since specified version "
+                                       f"(expected {expected}, found {state.version})")
+            if token:
+                state.tokens.add(token)
+
+            result = {"successful": {}, "success": {}, "unchanged": {}, "failed": {}}
+            version = state.version + 1
+            changed = False
+            for i, obj in enumerate(objects):
+                index = str(i)
+                error = _validate(obj)
+                if not error and obj.get("parentItem") and obj["parentItem"] not in state.items:
+                    error = f"Parent item {obj['parentItem']} doesn't exist"
+                if error:
+                    result["failed"][index] = {"key": obj.get("key") if isinstance(obj, dict) else None,
+                                               "code": 400, "message": error}
+                    state.stats["failed"] += 1
+                    continue
+                key = obj.get("key") or state.new_key()
+                current = state.items.get(key)
+                fields = {k: v for k, v in obj.items() if k not in ("key", "version")}
+                if current is not None and {k: v for k, v in current.items()
+                                            if k not in ("key", "version")} == fields:
+                    result["unchanged"][index] = key
+                    state.stats["unchanged"] += 1
+                    continue
+                data = dict(fields, key=key, version=version)
+                state.stats["updated" if current is not None else "created"] += 1
+                state.items[key] = data
+                state.deleted.pop(key, None)
+                result["successful"][index] = self._entry(library, data)
+                result["success"][index] = key
+                changed = True
+            if changed:
+                state.version = version
+            state.stats["writes"] += 1
+            headers = {"Last-Modified-Version": str(state.version)}
+            if state.rng.random() < self.server.plost:
+                state.stats["lost"] += 1
+                self.close_connection = True  # written, but the client never hears back
+                return
+        self._send(200, result, headers)
+
+    # --- files ---
+
+    def _file_request(self, key):
+        """POST <library>/items/<key>/file: authorize an upload, or register one."""
+        params = {k: v[0] for k, v in parse_qs(self.body.decode("utf-8")).items()}
+        state = self.state
+        with state.lock:
+            item = state.items.get(key)
+            if item is None:
+                return self._send(404, "Not found")
+            if item.get("itemType") != "attachment" or item.get("linkMode") not in ("imported_file", "imported_url"):
+                return self._send(400, "Item is not an imported file attachment")
+            if_match, if_none_match = self.headers.get("If-Match"), self.headers.get("If-None-Match")
+            if if_match is None and if_none_match is None:
+                return self._send(428, "If-Match/If-None-Match header not provided")
+            if (if_none_match == "*" and item.get("md5")) or (if_match is not None and if_match != item.get("md5")):
+                state.stats["precondition_failed"] += 1
+                return self._send(412, "File has changed or already exists")
+
+            if "upload" in params:
+                upload = state.uploads.get(params["upload"])
+                if upload is None or upload["key"] != key:
+                    return self._send(400, "Invalid upload key")
+                if not upload["received"]:
+                    return self._send(400, "File not uploaded")
+                del state.uploads[params["upload"]]
+                state.stats["files_registered"] += 1
+                return self._store_file(item, upload, 204, None)
+
+            missing = [p for p in ("md5", "filename", "filesize", "mtime") if p not in params]
+            if missing:
+                return self._send(400, f"'{missing[0]}' not provided")
+            file = {"key": key, "md5": params["md5"], "filename": params["filename"],
+                    "filesize": int(params["filesize"]), "mtime": int(params["mtime"]), "received": False}
+            if file["md5"] in state.files:
+                state.stats["files_existing"] += 1
+                return self._store_file(item, file, 200, {"exists": 1})
+
+            upload_key = "".join(state.rng.choice("0123456789abcdef") for _ in range(32))
+            boundary = f"---------------------------{upload_key[:16]}"
+            file["prefix"] = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"key\"\r\n\r\n{upload_key}\r\n"
+                              f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"\r\n"
+                              f"Content-Type: application/octet-stream\r\n\r\n").encode("utf-8")
+            file["suffix"] = f"\r\n--{boundary}--\r\n".encode("utf-8")
+            state.uploads[upload_key] = file
+            self._send(200, {"url": f"{self.server.url}/upload/{upload_key}",
+                             "contentType": f"multipart/form-data; boundary={boundary}",
+                             "prefix": file["prefix"].decode("utf-8"), "suffix": file["suffix"].decode("utf-8"),
+                             "uploadKey": upload_key})
+
+    def _store_file(self, item, file, status, body):
+        """Set an attachment's file properties (a new item version) and answer."""
+        state = self.state
+        state.version += 1
+        item.update(md5=file["md5"], mtime=file["mtime"], filename=file["filename"], version=state.version)
+        self._send(status, body, {"Last-Modified-Version": str(state.version)})
+
+    def _receive_upload(self, upload_key):
+        """POST /upload/<uploadKey>: read the body in blocks and check the file's size and md5."""
+        length = int(self.headers.get("Content-Length") or 0)
+        with self.state.lock:
+            upload = self.state.uploads.get(upload_key)
+        start = len(upload["prefix"]) if upload else 0
+        end = length - len(upload["suffix"]) if upload else 0
+        md5 = hashlib.md5(usedforsecurity=False)
+        position = 0
+        while position < length:
+            block = self.rfile.read(min(UPLOAD_BLOCK_SIZE, length - position))
+            if not block:
+                self.close_connection = True
+                return
+            lo, hi = max(start - position, 0), min(end - position, len(block))
+            if lo < hi:
+                md5.update(block[lo:hi])
+            position += len(block)
+
+        if self._inject_faults():
+            return
+        if upload is None:
+            return self._send(400, "Unknown upload")
+        if end - start != upload["filesize"] or md5.hexdigest() != upload["md5"]:
+            return self._send(400, "The content's size or md5 does not match the authorization")
+        with self.state.lock:
+            upload["received"] = True
+            self.state.files.add(upload["md5"])
+            self.state.stats["uploads"] += 1
+            self.state.stats["upload_bytes"] += upload["filesize"]
+        self._send(201)
+
+    def do_DELETE(self):
+        routed = self._route()
+        if routed is None:
+            return
+        _library, rest, _query = routed
+        match = re.match(r"^/items/([A-Z0-9]{8})$", rest)
+        if not match:
+            return self._send(405, "Method not allowed")
+        with self.state.lock:
+            if self.state.items.pop(match.group(1), None) is None:
+                return self._send(404, "Not found")
+            self.state.version += 1
+            self.state.deleted[match.group(1)] = self.state.version
+            headers = {"Last-Modified-Version": str(self.state.version)}
+        self._send(204, None, headers)
+
+    # --- reads ---
+
+    def do_GET(self):
+        routed = self._route()
+        if routed is None:
+            return
+        library, rest, query = routed
+        state = self.state
+        with state.lock:
+            headers = {"Last-Modified-Version": str(state.version)}
+            since = int(query.get("since", 0))
+
+            if rest == "/deleted":
+                keys = [k for k, v in state.deleted.items() if v > since]
+                return self._send(200, {"collections": [], "searches": [], "items": keys,
+                                        "tags": [], "settings": []}, headers)
+
+            single = re.match(r"^/items/([A-Z0-9]{8})$", rest)
+            if single:
+                data = state.items.get(single.group(1))
+                if data is None:
+                    return self._send(404, "Not found")
+                return self._send(200, self._entry(library, data), headers)
+
+            if rest not in ("/items", "/items/top"):
+                return self._send(404, "Not found")
+
+            selected = [d for d in state.items.values() if d["version"] > since]
+            if "itemKey" in query:
+                wanted = set(query["itemKey"].split(","))
+                selected = [d for d in selected if d["key"] in wanted]
+            selected.sort(key=lambda d: d["key"])
+
+            fmt = query.get("format", "json")
+            if fmt == "versions":
+                return self._send(200, {d["key"]: d["version"] for d in selected}, headers)
+            if fmt == "keys":
+                return self._send(200, "\n".join(d["key"] for d in selected), headers)
+
+            headers["Total-Results"] = str(len(selected))
+            start = int(query.get("start", 0))
+            limit = min(int(query.get("limit", DEFAULT_LIMIT)), MAX_LIMIT)
+            page = [self._entry(library, d) for d in selected[start:start + limit]]
+        self._send(200, page, headers)
+
+
+class FakeZoteroServer:
+    """
+    Threaded fake Zotero API server.
+
+    Parameters:
+        host (str), port (int): Address to bind; port 0 picks a free port.
+        latency (float): Seconds to wait before each answer (plus up to 50% jitter).
+        p429, p5xx (float): Probability of answering 429 / a 5xx error.
+        plost (float): Probability of applying a write but dropping its answer.
+        retry_after (float): Retry-After value sent with 429s.
+        backoff (float), pbackoff (float): Backoff header value and how often to send it.
+        seed (int): Seed for keys and fault injection, for reproducible runs.
+        verbose (bool): Log each request to stderr.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, p429=0.0, p5xx=0.0, retry_after=1,
+                 backoff=1, pbackoff=0.0, seed=0, verbose=False, plost=0.0):
+        self.httpd = ThreadingHTTPServer((host, port), FakeZoteroHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = LibraryState(seed)
+        self.httpd.latency = latency
+        self.httpd.p429 = p429
+        self.httpd.p5xx = p5xx
+        self.httpd.plost = plost
+        self.httpd.retry_after = retry_after
+        self.httpd.backoff = backoff
+        self.httpd.pbackoff = pbackoff
+        self.httpd.verbose = verbose
+        self.httpd.url = self.url
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def state(self):
+        return self.httpd.state
+
+    def start(self):
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    server = FakeZoteroServer(
+        port=option_value(args, "--port", 8080, int),
+        latency=option_value(args, "--latency", 0, float) / 1000,
+        p429=option_value(args, "--p429", 0.0, float),
+        p5xx=option_value(args, "--p5xx", 0.0, float),
+        plost=option_value(args, "--plost", 0.0, float),
+        retry_after=option_value(args, "--retry-after", 1, float),
+        backoff=option_value(args, "--backoff", 1, float),
+        pbackoff=option_value(args, "--pbackoff", 0.0, float),
+        seed=option_value(args, "--seed", 0, int),
+        verbose="--verbose" in args,
+    )
+    print(f"🧪 Fake Zotero API listening on {server.url}")
+    print(f"   export ZOTERO_API_URL={server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
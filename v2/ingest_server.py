@@ -0,0 +1,518 @@
+# ingest_server.py
+
+# Usage:
+#   python3 ingest_server.py            → Accept and queue items; dry-run (no upload, no notes)
+#   python3 ingest_server.py --commit   → Upload queued items to Zotero and write their notes
+#   Options: --port N (default 8765), --batch-size N, --window SECONDS
+#
+#   curl -s -H 'Content-Type: application/json' --data @item.json http://127.0.0.1:8765/items
+#       → 202 {"job": "…", "items": 1, "status_url": "/jobs/…"}
+#   curl -s http://127.0.0.1:8765/jobs/<job>
+#       → {"status": "done", "items": [{"status": "done", "zotero_key": "…", "note": "…"}, …]}
+
+"""
+Local HTTP ingestion endpoint, so browser extensions and scripts on the same
+machine can hand bibnow CSL-JSON without running pipeline.py for each item.
+
+POST /items takes a CSL item, a list of items or NDJSON (Content-Type must be
+application/json or application/x-ndjson), or BibTeX (application/x-bibtex). Every item is mapped with
+csl_to_zotero before anything is accepted; if one fails, the request is
+rejected with 400 and nothing is queued. Accepted items are stored in a SQLite
+queue (WAL, fsync'ed on commit) and the answer is 202 with a job ID.
+
+A single background worker takes queued items in micro-batches: it waits
+until `batch_size` items are queued or the oldest has waited `window`
+seconds, then uploads them in one Zotero request and writes their notes.
+Dedup index, key allocator and journal work as in `pipeline.py --commit`.
+
+GET /jobs/<id> returns the job's status and a result per item;
+GET /health returns queue depth and mode.
+
+After a crash or restart, items that were being processed are queued again.
+So are items whose request got no answer (a timeout) or a server error. The
+ingest journal sends their request again with its original write token.
+So an upload that already reached Zotero is not created a second time.
+
+The server listens on 127.0.0.1 only. Requiring a JSON content type means web
+pages cannot post to it without a CORS preflight, which it does not answer.
+Requests whose Host header is not 127.0.0.1:<port> or localhost:<port> are
+refused with 403. This stops DNS rebinding: a page whose own hostname is made
+to resolve to 127.0.0.1 would otherwise be same-origin with the server.
+If BIBNOW_INGEST_TOKEN is set, requests must also carry it in X-Bibnow-Token.
+"""
+
+import hmac
+import io
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from config import (INGEST_HOST, INGEST_PORT, INGEST_TOKEN, INGEST_QUEUE_PATH, INGEST_JOURNAL_PATH,
+                    INGEST_BATCH_SIZE, INGEST_BATCH_WINDOW, DEDUP_INDEX_PATH, require_credentials)
+from csl_stream import iter_csl_items
+from batch_transform import transform_item
+from dedup_index import DedupIndex, SeenIdentifiers, identifiers_for
+from batch_journal import (BatchJournal, JournaledSender, payload_hash, regroup_for_resume,
+                           resolve_committed_keys)
+from key_allocator import KeyAllocator
+from vault_index import VaultIndex
+from zotero_query import LibraryMirror
+from zotero_writer import get_client, ZOTERO_MAX_BATCH_SIZE
+from pipeline import _write_note
+from utils import option_value
+
+MAX_BODY_BYTES = 16 * 1024 * 1024
+JSON_TYPES = ("application/json", "application/x-ndjson", "application/vnd.citationstyles.csl+json")
+BIBTEX_TYPES = ("application/x-bibtex", "text/x-bibtex")
+FINAL_STATES = ("done", "duplicate", "failed")
+
+
+class IngestQueue:
+    """
+    Durable SQLite queue of mapped items, grouped into jobs.
+
+    Item states: queued → processing → done | duplicate | failed.
+
+    Parameters:
+        path (str): Database file; parent directories are created as needed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()  # one connection, shared by the HTTP threads and the worker
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # A 202 promises the items survive a crash, so every commit is fsync'ed
+        self.conn.execute("PRAGMA synchronous=FULL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS queue (
+                   id INTEGER PRIMARY KEY AUTOINCREMENT,
+                   job TEXT NOT NULL,
+                   position INTEGER NOT NULL,
+                   enqueued REAL NOT NULL,
+                   status TEXT NOT NULL,
+                   entry TEXT NOT NULL,
+                   zotero_key TEXT,
+                   note TEXT,
+                   message TEXT
+               )"""
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS queue_status ON queue (status, id)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS queue_job ON queue (job, position)")
+        self.conn.commit()
+
+    def enqueue(self, entries):
+        """Queue [(zotero_item, citekey, filename), ...] as one job; returns the job ID."""
+        job = uuid.uuid4().hex
+        now = time.time()
+        rows = [(job, i, now, "queued", json.dumps(entry, ensure_ascii=False)) for i, entry in enumerate(entries)]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO queue (job, position, enqueued, status, entry) VALUES (?, ?, ?, ?, ?)", rows)
+        return job
+
+    def recover(self):
+        """Queue again the items a crashed or stopped worker was processing. Returns how many."""
+        with self._lock, self.conn:
+            return self.conn.execute("UPDATE queue SET status = 'queued' WHERE status = 'processing'").rowcount
+
+    def pending(self):
+        """Return (number of queued items, enqueue time of the oldest or None)."""
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*), MIN(enqueued) FROM queue WHERE status = 'queued'").fetchone()
+
+    def claim(self, limit):
+        """Mark up to `limit` of the oldest queued items as processing; returns [(id, entry), ...]."""
+        with self._lock, self.conn:
+            rows = self.conn.execute(
+                "SELECT id, entry FROM queue WHERE status = 'queued' ORDER BY id LIMIT ?", (limit,)).fetchall()
+            self.conn.executemany("UPDATE queue SET status = 'processing' WHERE id = ?", [(r[0],) for r in rows])
+        return [(row_id, tuple(json.loads(entry))) for row_id, entry in rows]
+
+    def retry(self, row_ids, message):
+        """
+        Queue items again after a request whose outcome is unknown. They keep
+        their IDs, so the next claim takes them first, and they wait one more
+        batch window.
+        """
+        with self._lock, self.conn:
+            self.conn.executemany("UPDATE queue SET status = 'queued', enqueued = ?, message = ? WHERE id = ?",
+                                  [(time.time(), message, row_id) for row_id in row_ids])
+
+    def fail_unfinished(self, row_ids, message):
+        """Mark as failed those of `row_ids` still processing; returns how many."""
+        with self._lock, self.conn:
+            return sum(self.conn.execute(
+                "UPDATE queue SET status = 'failed', message = ? WHERE id = ? AND status = 'processing'",
+                (message, row_id)).rowcount for row_id in row_ids)
+
+    def finish(self, row_id, status, zotero_key=None, note=None, message=None):
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE queue SET status = ?, zotero_key = ?, note = ?, message = ? WHERE id = ?",
+                              (status, zotero_key, note, message, row_id))
+
+    def job(self, job):
+        """Return the job's status dict, or None for an unknown job ID."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT position, status, entry, zotero_key, note, message FROM queue WHERE job = ? ORDER BY position",
+                (job,)).fetchall()
+        if not rows:
+            return None
+        items = []
+        counts = {}
+        for position, status, entry, zotero_key, note, message in rows:
+            counts[status] = counts.get(status, 0) + 1
+            _, citekey, filename = json.loads(entry)
+            items.append({"position": position, "status": status, "citekey": citekey, "filename": filename,
+                          "zotero_key": zotero_key, "note": note, "message": message})
+        return {"job": job, "status": _job_status(counts, len(rows)), "counts": counts, "items": items}
+
+    def depth(self):
+        with self._lock:
+            return dict(self.conn.execute(
+                "SELECT status, COUNT(*) FROM queue WHERE status IN ('queued', 'processing') GROUP BY status"))
+
+    def close(self):
+        self.conn.close()
+
+
+def _job_status(counts, total):
+    if counts.get("queued", 0) == total:
+        return "queued"
+    if any(status not in FINAL_STATES for status in counts):
+        return "processing"
+    if counts.get("failed", 0) == total:
+        return "failed"
+    return "partial" if counts.get("failed") else "done"
+
+
+def parse_submission(body):
+    """
+    Parse and map a POSTed body.
+
+    Returns:
+        tuple: (entries, errors); entries are (zotero_item, citekey, filename) and
+               errors a list of {"position", "error"} for items that could not be mapped.
+    Raises:
+        ValueError: If the body is neither CSL-JSON nor BibTeX.
+    """
+    entries, errors = [], []
+    for position, csl_item in enumerate(iter_csl_items(io.StringIO(body.decode("utf-8")))):
+        if not isinstance(csl_item.get("type", ""), str):
+            errors.append({"position": position, "error": "'type' must be a string"})
+            continue
+        try:
+            zotero_item, citekey, filename, _ = transform_item(csl_item, render=False)
+        except Exception as e:
+            errors.append({"position": position, "error": f"could not map item: {e}"})
+            continue
+        entries.append((zotero_item, citekey, filename))
+    return entries, errors
+
+
+class IngestWorker:
+    """
+    Background thread that drains the queue in micro-batches.
+
+    Parameters:
+        queue (IngestQueue): The queue to drain.
+        commit (bool): Upload and write notes (True), or only mark items done (False).
+        batch_size (int): Most items per Zotero request (at most 50).
+        window (float): Seconds the oldest queued item may wait for the batch to fill.
+    """
+
+    def __init__(self, queue, commit=False, batch_size=INGEST_BATCH_SIZE, window=INGEST_BATCH_WINDOW):
+        self.queue = queue
+        self.commit = commit
+        self.batch_size = max(1, min(int(batch_size), ZOTERO_MAX_BATCH_SIZE))
+        self.window = window
+        self.allocator = KeyAllocator(VaultIndex())
+        self._names = {}  # queue row -> (citekey, filename) already allocated to it, kept across retries
+        self.dedup = None
+        self.journal = None
+        self.send = None
+        self.wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        recovered = self.queue.recover()
+        if recovered:
+            print(f"🔁 {recovered} item(s) interrupted by the last shutdown queued again.")
+        self._thread = threading.Thread(target=self._run, name="ingest-worker", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Finish the batch in progress, then stop."""
+        self._stopping.set()
+        self.wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _wait_for_batch(self):
+        """Block until a batch is due; returns False when stopping."""
+        while not self._stopping.is_set():
+            count, oldest = self.queue.pending()
+            if count:
+                due = oldest + self.window - time.time()
+                if count >= self.batch_size or due <= 0:
+                    return True
+                self.wakeup.wait(due)
+            else:
+                self.wakeup.wait()
+            self.wakeup.clear()
+        return False
+
+    def _open(self):
+        # SQLite connections belong to the thread that opens them, so this runs in the worker
+        if self.commit:
+            self.dedup = DedupIndex(DEDUP_INDEX_PATH)
+            self.journal = BatchJournal(INGEST_JOURNAL_PATH, resume=True)
+            self.send = JournaledSender(self.journal)
+
+    def _close(self):
+        if self.journal is not None:
+            self.journal.close()
+        if self.dedup is not None:
+            self.dedup.close()
+
+    def _run(self):
+        self._open()
+        try:
+            while self._wait_for_batch():
+                claimed = self.queue.claim(self.batch_size)
+                try:
+                    self.process(claimed)
+                except Exception as e:
+                    # Leave nothing stuck in "processing", but keep the outcome of items already
+                    # finished (or queued again) before the error
+                    failed = self.queue.fail_unfinished([row_id for row_id, _ in claimed], str(e))
+                    print(f"❌ Batch failed, {failed} of {len(claimed)} item(s) marked failed: {e}")
+        finally:
+            self._close()
+
+    def process(self, claimed):
+        """Upload one micro-batch and record each item's outcome in the queue."""
+        if not self.commit:
+            for row_id, (zotero_item, citekey, filename) in claimed:
+                _, filename = self.allocator.allocate(citekey, filename)
+                self.queue.finish(row_id, "done", note=filename, message="dry-run: not uploaded")
+            print(f"[DRY-RUN] {len(claimed)} item(s) accepted; nothing uploaded.")
+            return
+
+        batch = []
+        seen = SeenIdentifiers()
+        for row_id, (zotero_item, citekey, filename) in claimed:
+            record = self.journal.get(payload_hash(zotero_item))
+            if record and record["event"] == "done":
+                self.queue.finish(row_id, "done", record["key"], record.get("note"))
+                continue
+            identifiers = identifiers_for(zotero_item)
+            if seen.match(identifiers):
+                self.queue.finish(row_id, "failed", message="same item queued earlier in this batch")
+                continue
+            match = self.dedup.lookup_identifiers(identifiers)
+            if match:
+                note = match.get("note_path")
+                if not (note and os.path.exists(note)):
+                    note = _write_note(zotero_item, *self.allocator.allocate(citekey, filename), match["zotero_key"],
+                                       self.dedup)
+                self.queue.finish(row_id, "duplicate", match["zotero_key"], note, f"{match['kind']} match")
+                continue
+            seen.add(identifiers)
+            names = self._names.pop(row_id, None) or self.allocator.allocate(citekey, filename)
+            batch.append((row_id, zotero_item, *names))
+        # Items of a request with an unknown outcome go out again as that same request (same write token)
+        for request in regroup_for_resume(batch, self.journal, self.batch_size, zotero_item=lambda e: e[1]):
+            self._upload(request)
+
+    def _upload(self, batch):
+        status_code, _, results = self.send([entry[1] for entry in batch])
+        print(f"📦 Batch of {len(batch)} item(s) sent. Status: {status_code}")
+        committed, retry = [], []
+        for entry, result in zip(batch, results):
+            if result["status"] == "committed":
+                committed.append(entry)
+            elif result.get("retry"):
+                retry.append(entry[0])
+                self._names[entry[0]] = entry[2:]
+                message = result["message"]
+            elif result["status"] == "failed":
+                self.queue.finish(entry[0], "failed", message=result["message"])
+            else:
+                self._done(entry, result["key"])
+        if retry:
+            print(f"🔁 {len(retry)} item(s) queued again: {message}")
+            self.queue.retry(retry, message)
+        if committed:
+            # The request went through before a crash; find the keys Zotero gave those items
+            keys = resolve_committed_keys([entry[1] for entry in committed], LibraryMirror(), get_client())
+            for entry, zotero_key in zip(committed, keys):
+                self._done(entry, zotero_key)
+
+    def _done(self, entry, zotero_key):
+        row_id, zotero_item, citekey, filename = entry
+        note = _write_note(zotero_item, citekey, filename, zotero_key, self.dedup)
+        if zotero_key:
+            self.journal.record_done(payload_hash(zotero_item), zotero_key, note)
+            self.queue.finish(row_id, "done", zotero_key, note)
+        else:
+            self.queue.finish(row_id, "failed", note=note, message="uploaded, but Zotero returned no key")
+
+
+class IngestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            sys.stderr.write("[ingest] " + (format % args) + "\n")
+
+    def _send(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _authorized(self):
+        token = self.server.token
+        return not token or hmac.compare_digest(self.headers.get("X-Bibnow-Token", ""), token)
+
+    def _host_allowed(self):
+        return (self.headers.get("Host") or "").strip().lower() in self.server.allowed_hosts
+
+    def do_POST(self):
+        if not self._host_allowed():
+            self.close_connection = True  # the body is not read
+            return self._send(403, {"error": "unexpected Host header"})
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True  # the body is not read
+            return self._send(413, {"error": f"body larger than {MAX_BODY_BYTES} bytes"})
+        body = self.rfile.read(length) if length else b""
+        if not self._authorized():
+            return self._send(403, {"error": "missing or wrong X-Bibnow-Token"})
+        if urlparse(self.path).path.rstrip("/") != "/items":
+            return self._send(404, {"error": "not found"})
+        content_type = (self.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+        if content_type not in JSON_TYPES + BIBTEX_TYPES:
+            return self._send(415, {"error": "Content-Type must be application/json or application/x-bibtex"})
+
+        try:
+            entries, errors = parse_submission(body)
+        except (ValueError, UnicodeDecodeError) as e:
+            return self._send(400, {"error": str(e)})
+        if errors:
+            return self._send(400, {"error": "some items could not be mapped; nothing was queued",
+                                    "items": errors})
+        if not entries:
+            return self._send(400, {"error": "no CSL items in request"})
+
+        job = self.server.queue.enqueue(entries)
+        self.server.worker.wakeup.set()
+        self._send(202, {"job": job, "items": len(entries), "status_url": f"/jobs/{job}"})
+
+    def do_GET(self):
+        if not self._host_allowed():
+            return self._send(403, {"error": "unexpected Host header"})
+        if not self._authorized():
+            return self._send(403, {"error": "missing or wrong X-Bibnow-Token"})
+        path = urlparse(self.path).path.rstrip("/")
+        if path == "/health":
+            return self._send(200, {"mode": "commit" if self.server.worker.commit else "dry-run",
+                                    "queue": self.server.queue.depth()})
+        if path.startswith("/jobs/"):
+            status = self.server.queue.job(path[len("/jobs/"):])
+            if status is None:
+                return self._send(404, {"error": "unknown job"})
+            return self._send(200, status)
+        self._send(404, {"error": "not found"})
+
+
+class IngestServer:
+    """
+    Threaded ingestion server plus its queue worker.
+
+    Parameters:
+        host (str), port (int): Address to bind; port 0 picks a free port.
+        commit (bool): Upload and write notes, or dry-run.
+        batch_size (int), window (float): Micro-batching limits (see IngestWorker).
+        queue_path (str): SQLite queue file.
+        token (str): Shared secret required in X-Bibnow-Token, or None.
+        verbose (bool): Log each request to stderr.
+    """
+
+    def __init__(self, host=INGEST_HOST, port=INGEST_PORT, commit=False, batch_size=INGEST_BATCH_SIZE,
+                 window=INGEST_BATCH_WINDOW, queue_path=INGEST_QUEUE_PATH, token=INGEST_TOKEN, verbose=False):
+        if commit:
+            require_credentials()
+        self.queue = IngestQueue(queue_path)
+        self.worker = IngestWorker(self.queue, commit, batch_size, window)
+        self.httpd = ThreadingHTTPServer((host, port), IngestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.queue = self.queue
+        self.httpd.worker = self.worker
+        self.httpd.token = token
+        self.httpd.verbose = verbose
+        bound_port = self.httpd.server_address[1]
+        self.httpd.allowed_hosts = frozenset(f"{name}:{bound_port}" for name in ("127.0.0.1", "localhost"))
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve in a background thread."""
+        self.worker.start()
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self.httpd.shutdown()
+        self.httpd.server_close()
+        self.worker.stop()
+        self.queue.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def serve_forever(self):
+        self.worker.start()
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.stop()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    server = IngestServer(
+        port=option_value(args, "--port", INGEST_PORT, int),
+        commit="--commit" in args,
+        batch_size=option_value(args, "--batch-size", INGEST_BATCH_SIZE, int),
+        window=option_value(args, "--window", INGEST_BATCH_WINDOW, float),
+        verbose="--verbose" in args,
+    )
+    mode = "commit" if server.worker.commit else "dry-run"
+    print(f"📮 bibnow ingest server listening on {server.url} ({mode}). Ctrl-C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped; queued items are kept for the next start.")
@@ -0,0 +1,83 @@
+# key_allocator.py
+
+"""
+Collision-aware citekey and note filename allocation.
+
+generate_citekey / generate_filename build `LastnameYearTitlewords` and
+`LN Lastname Year Title.md`, which two different items can share. The
+allocator hands out each pair at most once, adding a Better BibTeX style
+suffix when the plain one is taken:
+
+    Smith2020DeepLearning        LN Smith 2020 Deep Learning.md
+    Smith2020DeepLearninga       LN Smith 2020 Deep Learning a.md
+    Smith2020DeepLearningb       LN Smith 2020 Deep Learning b.md
+    ... z, aa, ab, ...
+
+A key is taken if it was allocated earlier in this run (in-memory sets) or
+if a note in the vault already uses it (vault_index.VaultIndex, persisted
+between runs). The same suffix is applied to both citekey and filename, so
+they stay paired. Allocation is deterministic for a given input order and
+vault, and each call is O(1) set probes; a per-base counter means even
+thousands of items sharing one base key never rescan the suffixes they
+already handed out.
+"""
+
+import itertools
+import string
+
+
+def suffixes():
+    """Yield '', 'a' … 'z', 'aa', 'ab', … (Better BibTeX's %(a)s postfix)."""
+    yield ""
+    for length in itertools.count(1):
+        for letters in itertools.product(string.ascii_lowercase, repeat=length):
+            yield "".join(letters)
+
+
+def _with_suffix(filename, suffix):
+    if not suffix:
+        return filename
+    stem, dot, ext = filename.rpartition(".")
+    return f"{stem} {suffix}.{ext}" if dot else f"{filename} {suffix}"
+
+
+class KeyAllocator:
+    """
+    Parameters:
+        vault: Optional vault_index.VaultIndex of notes already on disk.
+    """
+
+    def __init__(self, vault=None):
+        self.vault = vault
+        self._citekeys = set()
+        self._filenames = set()   # case-folded: vaults often live on case-insensitive file systems
+        self._cursors = {}        # (citekey, filename) -> suffix generator, resumed on the next clash
+        self.collisions = 0
+
+    def _taken(self, citekey, filename):
+        if citekey in self._citekeys or filename.casefold() in self._filenames:
+            return True
+        return self.vault is not None and (self.vault.has_citekey(citekey) or self.vault.has_filename(filename))
+
+    def reserve(self, citekey, filename):
+        """Mark a citekey / filename pair as used (e.g. a note kept as it is)."""
+        self._citekeys.add(citekey)
+        self._filenames.add(filename.casefold())
+
+    def allocate(self, citekey, filename):
+        """
+        Return a (citekey, filename) pair not used in this run or in the vault,
+        and reserve it.
+        """
+        base = (citekey, filename)
+        cursor = self._cursors.get(base)
+        if cursor is None:
+            cursor = self._cursors[base] = suffixes()
+        for suffix in cursor:
+            candidate = (citekey + suffix, _with_suffix(filename, suffix))
+            if not self._taken(*candidate):
+                break
+        if suffix:
+            self.collisions += 1
+        self.reserve(*candidate)
+        return candidate
@@ -0,0 +1,174 @@
+# metrics.py
+
+"""
+Lightweight, thread-safe stage timers and counters for profiling bibnow runs.
+
+Modules record into the process-wide METRICS object:
+
+    with METRICS.timer("map"):          # wall time per stage, call count
+        ...
+    METRICS.add("bytes_written", n)     # counters
+    METRICS.observe("http", seconds)    # samples, reported as percentiles
+
+Recording is off until METRICS.enable() is called (pipeline.py --profile),
+so normal runs pay one attribute check per call site.
+
+METRICS.report() returns a JSON-ready dict with per-stage totals, items/sec,
+counters and p50/p90/p99/max of every sample series. run_profiled() wraps a
+whole run: it writes that report and, optionally, cProfile stats to files.
+
+Stages may nest: "input" includes "input.clipboard", and in --concurrency mode
+"upload" spans the whole streamed run. Compare a stage with its own children.
+
+With --workers N, mapping and rendering happen in worker processes; their
+per-stage timers are not collected, the main process's "transform" wait is.
+"""
+
+import cProfile
+import json
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Metrics:
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.timers = {}    # name -> [calls, seconds]
+            self.counters = {}
+            self.samples = {}   # name -> [values]
+            self.started = time.perf_counter()
+
+    def enable(self):
+        self.reset()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    # --- recording ---
+
+    def record_time(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self.timers.setdefault(name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+    @contextmanager
+    def timer(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_time(name, time.perf_counter() - start)
+
+    def timed_iter(self, name, iterable):
+        """Yield from `iterable`, charging the time spent producing each item to `name`."""
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.record_time(name, time.perf_counter() - start)
+                return
+            self.record_time(name, time.perf_counter() - start)
+            yield item
+
+    def add(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.samples.setdefault(name, []).append(value)
+
+    # --- reporting ---
+
+    def report(self):
+        """Return a JSON-ready snapshot of everything recorded so far."""
+        with self._lock:
+            elapsed = time.perf_counter() - self.started
+            items = self.counters.get("items", 0)
+            report = {
+                "elapsed_seconds": round(elapsed, 4),
+                "items": items,
+                "items_per_sec": round(items / elapsed, 2) if elapsed > 0 else None,
+                "stages": {
+                    name: {"calls": calls, "seconds": round(seconds, 4),
+                           "share": round(seconds / elapsed, 4) if elapsed > 0 else None}
+                    for name, (calls, seconds) in sorted(self.timers.items(), key=lambda kv: -kv[1][1])
+                },
+                "counters": dict(sorted(self.counters.items())),
+                "distributions": {},
+            }
+            for name, values in sorted(self.samples.items()):
+                ordered = sorted(values)
+                report["distributions"][name] = {
+                    "count": len(ordered),
+                    "p50": round(percentile(ordered, 0.50), 6),
+                    "p90": round(percentile(ordered, 0.90), 6),
+                    "p99": round(percentile(ordered, 0.99), 6),
+                    "max": round(ordered[-1], 6),
+                    "mean": round(sum(ordered) / len(ordered), 6),
+                }
+        return report
+
+
+METRICS = Metrics()
+
+
+def run_profiled(fn, args=(), metrics_path=None, cprofile_path=None):
+    """
+    Run fn(*args) with metrics enabled, then save the JSON report to
+    `metrics_path` and, if given, cProfile stats to `cprofile_path`
+    (read them with `python3 -m pstats FILE`).
+    """
+    METRICS.enable()
+    profiler = cProfile.Profile() if cprofile_path else None
+    try:
+        if profiler:
+            profiler.enable()
+        try:
+            return fn(*args)
+        finally:
+            if profiler:
+                profiler.disable()
+    finally:
+        report = METRICS.report()
+        METRICS.disable()
+        if metrics_path:
+            os.makedirs(os.path.dirname(os.path.abspath(metrics_path)), exist_ok=True)
+            with open(metrics_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"⏱️ Metrics report saved to {metrics_path}", file=sys.stderr)
+        else:
+            print(json.dumps(report, indent=2), file=sys.stderr)
+        if profiler:
+            profiler.dump_stats(cprofile_path)
+            print(f"⏱️ cProfile stats saved to {cprofile_path}", file=sys.stderr)
@@ -0,0 +1,199 @@
+# note_sync.py
+
+# Usage:
+#   python3 note_sync.py            → Update the notes of items changed in Zotero since the last sync
+#   python3 note_sync.py --dry-run  → Only list the notes that would change
+#   python3 note_sync.py --all      → Re-check every mirrored item (e.g. after editing the template)
+
+"""
+Zotero → Obsidian re-sync of existing notes.
+
+Notes are rendered with `autoupdate: true` and a "Do not edit above this line"
+marker. This module keeps those notes current with Zotero:
+
+1. The local library mirror (zotero_query.LibraryMirror) is synced, which only
+   downloads what changed.
+2. Items whose version is newer than the library version of the previous note
+   sync (stored in NOTE_SYNC_STATE_PATH) are re-rendered.
+3. In each note, everything up to and including the marker line is replaced
+   by the freshly rendered header; everything after it (the "User-generated
+   Content" section) is kept byte-for-byte.
+
+Notes are found through the dedup index (Zotero key → note path), then the
+note's generated filename, and only then the vault index (which covers notes
+that were renamed or moved). Only the notes of changed items are opened: the
+cost follows the number of changed items, not the vault size.
+Notes whose front-matter says `autoupdate: false`, or whose marker was
+removed, are left alone. Unchanged results are not rewritten (NoteWriter).
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+from config import DEDUP_INDEX_PATH
+from dedup_index import DedupIndex
+from obsidian_writer import build_markdown_from_zotero, generate_citekey, generate_filename, get_note_writer
+from note_view import NoteView
+from obsidian_writer_config import OUTPUT_DIR, NOTE_SYNC_STATE_PATH
+from vault_index import VaultIndex, front_matter_fields
+from zotero_query import LibraryMirror
+from zotero_writer import get_client
+
+MARKER = "<!-- Do not edit above this line"
+SKIP_TYPES = ("attachment", "note", "annotation")
+
+
+def read_state(path=NOTE_SYNC_STATE_PATH):
+    """Library version of the last note sync, or None if notes were never synced."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return int(json.load(f)["library_version"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def write_state(version, path=NOTE_SYNC_STATE_PATH):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".note-sync-", suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"library_version": version}, f)
+    os.replace(tmp_path, path)
+
+
+def split_at_marker(text):
+    """
+    Split a note after the marker line.
+
+    Returns:
+        tuple: (header, user_section), or None if the note has no marker.
+    """
+    start = text.find(MARKER)
+    if start == -1:
+        return None
+    end = text.find("\n", start)
+    end = len(text) if end == -1 else end + 1
+    return text[:end], text[end:]
+
+
+def splice_note(existing, rendered):
+    """
+    Return `rendered`'s generated header followed by `existing`'s user section
+    (unchanged), or None if either text has no marker.
+    """
+    old = split_at_marker(existing)
+    new = split_at_marker(rendered)
+    if old is None or new is None:
+        return None
+    return new[0] + old[1]
+
+
+def locate_note(data, output_dir=OUTPUT_DIR, dedup=None, vault=None, view=None):
+    """Path of the existing note for a mirrored item, or None."""
+    if dedup is not None:
+        path = dedup.note_for_key(data["key"])
+        if path and os.path.exists(path):
+            return path
+    path = os.path.join(output_dir, generate_filename(data, view))
+    if os.path.exists(path):
+        return path
+    if vault is not None:
+        # First use scans the vault (front-matter only, cached between runs)
+        return vault.path_for_key(data["key"])
+    return None
+
+
+def plan_updates(items, output_dir=OUTPUT_DIR, dedup=None, stats=None, vault=None):
+    """
+    Yield (markdown, filename, path, data) for each item whose note should be
+    rewritten. `stats` (a dict) counts notes that were missing or skipped.
+    """
+    stats = stats if stats is not None else {}
+    for data in items:
+        if data.get("itemType") in SKIP_TYPES or data.get("deleted"):
+            continue
+        view = NoteView(data)
+        path = locate_note(data, output_dir, dedup, vault, view)
+        if path is None:
+            stats["missing"] = stats.get("missing", 0) + 1
+            continue
+        # newline="" keeps the user's line endings exactly as they are
+        with open(path, encoding="utf-8", newline="") as f:
+            existing = f.read()
+        fields = front_matter_fields(existing)
+        if fields.get("zotero_key") != data["key"] or fields.get("autoupdate", "true").lower() != "true":
+            stats["skipped"] = stats.get("skipped", 0) + 1
+            continue
+
+        # Keep the note's citekey even if the title or authors changed in Zotero
+        citekey = fields.get("citekey") or generate_citekey(data, view)
+        rendered = build_markdown_from_zotero(data, citekey, data["key"], view=view)
+        markdown = splice_note(existing, rendered)
+        if markdown is None:
+            print(f"⚠️ No 'Do not edit above this line' marker in {path}; not updated.")
+            stats["skipped"] = stats.get("skipped", 0) + 1
+            continue
+        yield markdown, os.path.relpath(path, output_dir), path, data
+
+
+def sync_notes(mirror, since=None, dedup=None, writer=None, dry_run=False, vault=None):
+    """
+    Re-render the notes of items changed in `mirror` after library version `since`
+    (None = every mirrored item).
+
+    Returns:
+        dict: {"changed", "updated", "unchanged", "missing", "skipped"} counts.
+    """
+    writer = writer or get_note_writer()
+    changed = list(mirror.changed_since(since or 0))
+    stats = {"changed": len(changed), "updated": 0, "unchanged": 0, "missing": 0, "skipped": 0}
+    plans = list(plan_updates(changed, writer.output_dir, dedup, stats, vault))
+
+    if dry_run:
+        for markdown, _filename, path, _data in plans:
+            with open(path, encoding="utf-8", newline="") as f:
+                if f.read() == markdown:
+                    stats["unchanged"] += 1
+                else:
+                    stats["updated"] += 1
+                    print(f"📝 Would update: {path}")
+        return stats
+
+    results = writer.write_many([(markdown, filename) for markdown, filename, _path, _data in plans])
+    for (_markdown, _filename, _path, data), (path, written) in zip(plans, results):
+        if written:
+            stats["updated"] += 1
+            print(f"📝 Updated: {path}")
+        else:
+            stats["unchanged"] += 1
+        if dedup is not None:
+            dedup.record(data, data["key"], path)
+    return stats
+
+
+def main(argv):
+    dry_run = "--dry-run" in argv
+    since = None if "--all" in argv else read_state()
+
+    mirror = LibraryMirror()
+    result = mirror.sync(get_client())
+    print(f"🔄 {result['mode'].capitalize()} sync: {result['updated']} item(s) updated in the local mirror.")
+
+    dedup = DedupIndex(DEDUP_INDEX_PATH) if os.path.exists(DEDUP_INDEX_PATH) else None
+    stats = sync_notes(mirror, since, dedup=dedup, dry_run=dry_run, vault=VaultIndex())
+    if not dry_run:
+        write_state(mirror.library_version)
+    if dedup is not None:
+        dedup.close()
+    mirror.close()
+
+    verb = "would be updated" if dry_run else "updated"
+    print(f"✅ {stats['changed']} changed item(s): {stats['updated']} note(s) {verb}, "
+          f"{stats['unchanged']} already current, {stats['missing']} without a note, "
+          f"{stats['skipped']} skipped.")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
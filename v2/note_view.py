@@ -0,0 +1,109 @@
+# note_view.py
+
+"""
+Derived note fields of a mapped Zotero item, computed once per item.
+
+The citekey, the note filename and the note body all need the first creator's
+name, the year and the first words of the title. A NoteView computes these
+once, with precompiled patterns, and generate_citekey, generate_filename and
+build_markdown_from_zotero all read from the same view:
+
+    view = NoteView(zotero_item)
+    citekey = generate_citekey(zotero_item, view)
+    filename = generate_filename(zotero_item, view)
+    markdown = build_markdown_from_zotero(zotero_item, citekey, view=view)
+
+Fields only the note body needs (the full creator list, tag renderings) are
+computed on first use, by body_fields(). That way a view made only for
+citekey and filename does not pay for them.
+
+A view reads the item when it is created; build a new one if the item changes.
+"""
+
+import re
+from itertools import islice
+
+from config import ZOTERO_USERNAME
+from obsidian_writer_config import FILENAME_PREFIX, USE_ET_AL, TITLE_WORD_LIMIT
+
+_WORD = re.compile(r"\w+")
+CITEKEY_TITLE_WORDS = 4
+
+
+class NoteView:
+    """
+    Normalized, read-only view of the fields a note is built from.
+
+    Parameters:
+        zotero_item (dict): A mapped Zotero item (see csl_mapper.csl_to_zotero).
+    """
+
+    __slots__ = ("item", "creators", "last_name", "year", "title", "title_words", "_body")
+
+    def __init__(self, zotero_item: dict):
+        self.item = zotero_item
+        self._body = None
+        self.creators = zotero_item.get("creators", [])
+        if self.creators:
+            first = self.creators[0]
+            self.last_name = first.get("lastName") or first.get("name", "Unknown")
+        else:
+            # Cases have a court instead of authors; use the last word of its name
+            court = zotero_item.get("court", "") or zotero_item.get("authority", "") or "Unknown"
+            self.last_name = _WORD.findall(court)[-1]
+        self.year = (zotero_item.get("date") or zotero_item.get("dateDecided") or "")[:4] or "XXXX"
+        self.title = zotero_item.get("title") or zotero_item.get("caseName") or "Untitled"
+        # Only as many words as the longest use needs; long titles are not scanned to the end
+        wanted = max(CITEKEY_TITLE_WORDS, TITLE_WORD_LIMIT)
+        self.title_words = [m.group().capitalize() for m in islice(_WORD.finditer(self.title), wanted)]
+
+    @property
+    def citekey(self) -> str:
+        """`LastnameYearTitlewords`, before any collision suffix."""
+        return f"{self.last_name}{self.year}{''.join(self.title_words[:CITEKEY_TITLE_WORDS])}"
+
+    @property
+    def short_title(self) -> str:
+        return " ".join(self.title_words[:TITLE_WORD_LIMIT])
+
+    @property
+    def filename(self) -> str:
+        """`<prefix>Lastname [et al] Year Title Words.md`, before any collision suffix."""
+        lastname = self.last_name
+        if USE_ET_AL and len(self.creators) > 1:
+            lastname += " et al"
+        return f"{FILENAME_PREFIX}{lastname} {self.year} {self.short_title}.md"
+
+    def body_fields(self) -> tuple:
+        """
+        Fields only the note body uses, computed together on first call.
+
+        Returns:
+            tuple: (responsible_party, keywords_plain, keywords_display, keywords_yaml)
+        """
+        if self._body is None:
+            item = self.item
+            if self.creators:
+                responsible = ", ".join(
+                    f"{c.get('firstName', '')} {c.get('lastName', c.get('name', ''))}".strip()
+                    for c in self.creators
+                )
+            else:
+                responsible = item.get("court", "") or item.get("authority", "")
+            tag_list = [t.get("tag") for t in item.get("tags", []) if t.get("tag")]
+            links = [f"[[{t}]]" for t in tag_list]
+            keywords_yaml = "\n".join(f'  - "{w}"' for w in links) if links else "  []"
+            self._body = (responsible, ", ".join(tag_list), ", ".join(links), keywords_yaml)
+        return self._body
+
+    @property
+    def responsible_party(self) -> str:
+        return self.body_fields()[0]
+
+    @staticmethod
+    def zotero_url(zotero_key) -> str:
+        """Web-library link for an item, or "" without a key."""
+        # Links use the username's web library; group libraries are not linked separately
+        if not zotero_key:
+            return ""
+        return f"https://www.zotero.org/{ZOTERO_USERNAME}/items/{zotero_key}"
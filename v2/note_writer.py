@@ -0,0 +1,155 @@
+# note_writer.py
+
+"""
+Content-aware, atomic writer for Obsidian notes.
+
+- A note is only written if its bytes differ from what is already on disk,
+  so regenerating a vault leaves unchanged notes (and their mtimes) alone and
+  Obsidian / sync clients see no spurious changes.
+- A manifest of (sha256, mtime, size) per note lets unchanged files be
+  recognised from a stat() alone; the file is only read if it was modified
+  outside bibnow (or is not in the manifest yet).
+- Changed notes are written to a temporary file in the same directory and
+  renamed over the old one, so a crash never leaves a half-written note.
+- write_many() spreads a batch of writes over a bounded thread pool.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import METRICS
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _copy_mode(existing, tmp_path):
+    # mkstemp creates 0600 files; give the note the old file's mode, or a normal 0644
+    try:
+        mode = os.stat(existing).st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o644
+    try:
+        os.chmod(tmp_path, mode)
+    except OSError:
+        pass  # e.g. Android shared storage does not support chmod
+
+
+class NoteWriter:
+    """
+    Parameters:
+        output_dir (str): Directory notes are written into.
+        manifest_path (str): JSON manifest of note hashes (None = compare file contents only).
+        max_workers (int): Thread pool size for write_many().
+    """
+
+    def __init__(self, output_dir, manifest_path=None, max_workers=4):
+        self.output_dir = output_dir
+        self.manifest_path = manifest_path
+        self.max_workers = max(1, max_workers)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._manifest = {}
+        self.written = 0
+        self.unchanged = 0
+        self.bytes_written = 0
+        if manifest_path and os.path.exists(manifest_path):
+            try:
+                with open(manifest_path, encoding="utf-8") as f:
+                    self._manifest = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self._manifest = {}
+
+    def _unchanged(self, path, digest, data):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return False
+        if st.st_size != len(data):
+            return False
+        entry = self._manifest.get(path)
+        if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            return entry["sha256"] == digest
+        # Not in the manifest, or touched outside bibnow: compare the bytes
+        with open(path, "rb") as f:
+            return f.read() == data
+
+    def _remember(self, path, digest):
+        st = os.stat(path)
+        with self._lock:
+            self._manifest[path] = {"sha256": digest, "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+            self._dirty = True
+
+    def write(self, markdown: str, filename: str):
+        """
+        Write one note unless identical content is already on disk.
+
+        Returns:
+            tuple: (path, written) where written is False for a skipped no-op write.
+        """
+        with METRICS.timer("note_write"):
+            path, written = self._write(markdown, filename)
+        METRICS.add("notes_written" if written else "notes_unchanged")
+        return path, written
+
+    def _write(self, markdown, filename):
+        path = os.path.join(self.output_dir, filename)
+        data = markdown.encode("utf-8")
+        digest = _sha256(data)
+
+        if self._unchanged(path, digest, data):
+            with self._lock:
+                self.unchanged += 1
+            if path not in self._manifest:
+                self._remember(path, digest)
+            return path, False
+
+        os.makedirs(self.output_dir, exist_ok=True)  # ensure directory exists
+        fd, tmp_path = tempfile.mkstemp(dir=self.output_dir, prefix=".bibnow-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            _copy_mode(path, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        self._remember(path, digest)
+        with self._lock:
+            self.written += 1
+            self.bytes_written += len(data)
+        METRICS.add("bytes_written", len(data))
+        return path, True
+
+    def write_many(self, notes):
+        """
+        Write many (markdown, filename) pairs on a bounded I/O thread pool.
+
+        Returns:
+            list: (path, written) per note, in input order.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = list(pool.map(lambda note: self.write(*note), notes))
+        self.save_manifest()
+        return results
+
+    def save_manifest(self):
+        """Atomically persist the manifest if anything changed."""
+        if not self.manifest_path or not self._dirty:
+            return
+        with self._lock:
+            data = json.dumps(self._manifest, ensure_ascii=False)
+            self._dirty = False
+        directory = os.path.dirname(os.path.abspath(self.manifest_path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".manifest-", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.manifest_path)
@@ -1,16 +1,19 @@
-import os
-import re
-from string import Template
+import atexit
+from template_cache import TemplateCache
+from note_writer import NoteWriter
+from note_view import NoteView
 
-from config import (ZOTERO_USER_ID, ZOTERO_USERNAME)
 from obsidian_writer_config import (
     OUTPUT_DIR,
-    FILENAME_PREFIX,
-    USE_ET_AL,
-    TITLE_WORD_LIMIT,
-    TEMPLATE_PATH
+    TEMPLATE_PATH,
+    NOTE_MANIFEST_PATH,
+    NOTE_WRITE_WORKERS
 )
 
+# Compiled note templates, keyed by name; add more with TEMPLATES.register(name, path)
+TEMPLATES = TemplateCache()
+TEMPLATES.register("obsidian_note", TEMPLATE_PATH)
+
 def yaml_escape_dq(value: str) -> str:
     """
     Escape a Python string for safe inclusion *inside a double-quoted YAML scalar*.
@@ -27,102 +30,55 @@ def yaml_escape_dq(value: str) -> str:
     return s
 
 
-def generate_citekey(zotero_item: dict) -> str:
-    creators = zotero_item.get("creators", [])
-    if creators:
-        last_name = creators[0].get("lastName") or creators[0].get("name", "Unknown")
-    else:
-        last_name = zotero_item.get("court", "") or zotero_item.get("authority", "") or "Unknown"
-        last_name = re.findall(r"\w+", last_name)[-1] if last_name else "Unknown"
-    year = (zotero_item.get("date") or zotero_item.get("dateDecided") or "")[:4] or "XXXX"
-    title = zotero_item.get("title") or zotero_item.get("caseName") or "Untitled"
-    title_words = re.findall(r"\b\w+\b", title)
-    title_part = ''.join(word.capitalize() for word in title_words[:4])
-
-    return f"{last_name}{year}{title_part}"
-
-def generate_filename(zotero_item: dict) -> str:
-    creators = zotero_item.get("creators", [])
-    title = (zotero_item.get("title") or zotero_item.get("caseName") or "Untitled")
-    date = ((zotero_item.get("date") or zotero_item.get("dateDecided") or "")[:4] or "XXXX")
-
-    if creators:
-        first_creator = creators[0]
-        lastname = first_creator.get("lastName") or first_creator.get("name", "Unknown")
-    else:
-        lastname = zotero_item.get("court", "") or zotero_item.get("authority", "") or "Unknown"
-        lastname = re.findall(r"\w+", lastname)[-1] if lastname else "Unknown"
-
-    if USE_ET_AL and len(creators) > 1:
-        lastname += " et al"
-
-    title_words = re.findall(r"\b\w+\b", title)
-    title_part = " ".join(word.capitalize() for word in title_words[:TITLE_WORD_LIMIT])
-
-    return f"{FILENAME_PREFIX}{lastname} {date} {title_part}.md"
+def generate_citekey(zotero_item: dict, view: NoteView = None) -> str:
+    return (view or NoteView(zotero_item)).citekey
 
-def build_markdown_from_zotero(zotero_item: dict, citekey: str, zotero_key: str = None) -> str:
-    # Prepare values
-    creators = zotero_item.get("creators", [])
-    if creators:
-        responsible = ", ".join(
-            f"{c.get('firstName', '')} {c.get('lastName', c.get('name', ''))}".strip()
-            for c in creators
-        )
-    else:
-        responsible = zotero_item.get("court","") or zotero_item.get("authority","")
-    year = (zotero_item.get("date") or zotero_item.get("dateDecided") or "")[:4] or "XXXX"
-    title = zotero_item.get("title") or zotero_item.get("caseName") or "Untitled"
-    title_words = re.findall(r"\b\w+\b", title)
-    title_part = " ".join(word.capitalize() for word in title_words[:TITLE_WORD_LIMIT])
-    extra = zotero_item.get("extra", "None supplied.")
-    abstract = zotero_item.get("abstractNote", "None supplied")
-    tags = zotero_item.get("tags", [])
-    tag_list = [t.get("tag") for t in tags if t.get("tag")]
+def generate_filename(zotero_item: dict, view: NoteView = None) -> str:
+    return (view or NoteView(zotero_item)).filename
 
-    # --- NEW keyword renderings ---
-    keywords_plain = ", ".join(tag_list) if tag_list else ""
-    keywords_wikilinks_list = [f"[[{t}]]" for t in tag_list]
-    keywords_wikilinks_csv = ", ".join(keywords_wikilinks_list) if keywords_wikilinks_list else ""
-    keywords_yaml = "\n".join(f'  - "{w}"' for w in keywords_wikilinks_list) if keywords_wikilinks_list else "  []"
+def build_markdown_from_zotero(zotero_item: dict, citekey: str, zotero_key: str = None,
+                               template_name: str = "obsidian_note", view: NoteView = None) -> str:
+    # Title, creators, year and tags come from the view shared with the citekey and filename
+    view = view or NoteView(zotero_item)
+    responsible, keywords_plain, keywords_display, keywords_yaml = view.body_fields()
+    zotero_url = view.zotero_url(zotero_key)
 
+    # Compiled once, reloaded only if the template file changes
+    template = TEMPLATES.get(template_name)
 
-    # Use username for user libraries (web UI), group ID for groups
-    if zotero_key:
-        if "ZOTERO_GROUP_ID" in globals() and ZOTERO_GROUP_ID:
-            zotero_url = f"https://www.zotero.org/groups/{ZOTERO_GROUP_ID}/items/{zotero_key}"
-        else:
-            zotero_url = f"https://www.zotero.org/{ZOTERO_USERNAME}/items/{zotero_key}"
-    else:
-        zotero_url = ""
-
-    # Load template
-    with open(TEMPLATE_PATH, encoding="utf-8") as f:
-        template = Template(f.read())
-
-    return template.safe_substitute({
+    return template.render({
         "citekey": yaml_escape_dq(citekey),
         "aliases": "",
         "type": yaml_escape_dq(zotero_item.get("itemType", "document")),
         "zotero_key": yaml_escape_dq(zotero_key or ""),
         "zotero_url": yaml_escape_dq(zotero_url),
         "responsible_party": yaml_escape_dq(responsible),
-        "record_title": yaml_escape_dq(title),
-        "record_title_short": title_part,
-        "record_year": yaml_escape_dq(year),
+        "record_title": yaml_escape_dq(view.title),
+        "record_title_short": view.short_title,
+        "record_year": yaml_escape_dq(view.year),
         "callnumber": yaml_escape_dq(zotero_item.get("callNumber", "")),
-        "baseline_citation": f"{responsible}. {year}. {title}.",
-        "abstract": abstract,
+        "baseline_citation": f"{responsible}. {view.year}. {view.title}.",
+        "abstract": zotero_item.get("abstractNote", "None supplied"),
         "keywords": keywords_plain,
-        "keywords_display": keywords_wikilinks_csv,
+        "keywords_display": keywords_display,
         "keywords_yaml": keywords_yaml,
-        "extra": extra
+        "extra": zotero_item.get("extra", "None supplied.")
     })
 
+_note_writer = None
+
+def get_note_writer() -> NoteWriter:
+    """
+    Return the shared NoteWriter for OUTPUT_DIR (skips unchanged notes, writes atomically).
+    Its hash manifest is saved when the process exits.
+    """
+    global _note_writer
+    if _note_writer is None:
+        _note_writer = NoteWriter(OUTPUT_DIR, NOTE_MANIFEST_PATH, NOTE_WRITE_WORKERS)
+        atexit.register(_note_writer.save_manifest)
+    return _note_writer
+
 def write_obsidian_note(markdown: str, filename: str):
-    path = os.path.join(OUTPUT_DIR, filename)
-    os.makedirs(OUTPUT_DIR, exist_ok=True)  # ensure directory exists
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(markdown)
+    path, _written = get_note_writer().write(markdown, filename)
     return path
 
@@ -1,7 +1,7 @@
 # obsidian_writer_config.py
 
 import os
-from config import OBSIDIAN_VAULT_PATH
+from config import OBSIDIAN_VAULT_PATH, BIBNOW_DATA_DIR
 
 OUTPUT_DIR = OBSIDIAN_VAULT_PATH  # write directly into Obsidian vault
 
@@ -9,3 +9,8 @@ FILENAME_PREFIX = "LN "           # required: matches your canonical style
 USE_ET_AL = True                  # include 'et al.' if multiple authors
 TITLE_WORD_LIMIT = 4              # for title_short
 TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), "templates", "obsidian_note.md.tmpl")
+NOTE_MANIFEST_PATH = os.path.join(BIBNOW_DATA_DIR, "note_manifest.json")  # hashes of written notes
+NOTE_SYNC_STATE_PATH = os.path.join(BIBNOW_DATA_DIR, "note_sync_state.json")  # last synced library version
+VAULT_INDEX_PATH = os.path.join(BIBNOW_DATA_DIR, "vault_index.json")  # cached note front-matter
+VAULT_SCAN_WORKERS = 8            # threads reading front-matter when indexing the vault
+NOTE_WRITE_WORKERS = 4            # I/O threads for batch note writes
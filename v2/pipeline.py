@@ -3,6 +3,29 @@
 # Usage:
 #   python3 pipeline.py             → Dry-run: parse and display CSL JSON
 #   python3 pipeline.py --commit   → Upload entry to Zotero
+#   python3 pipeline.py --input FILE
+#                                  → Stream items from FILE (JSON object, array or NDJSON)
+#                                    instead of the clipboard / input.txt
+#   python3 pipeline.py [--commit] --workers N
+#                                  → Map (and in dry-run, render) items on N processes
+#   python3 pipeline.py --commit --no-dedup
+#                                  → Upload even if the local index says the item already exists
+#   python3 pipeline.py --commit --batch [--batch-size N]
+#                                  → Upload in multi-item POSTs (up to 50 items each)
+#   python3 pipeline.py --commit --concurrency N [--rate R] [--batch-size N]
+#                                  → Upload batches N at a time, at most R requests/second
+#   python3 pipeline.py --resume [--batch | --concurrency N] [--journal PATH]
+#                                  → Continue an interrupted --commit run from its journal
+#   python3 pipeline.py [--commit] --sync [...]
+#                                  → First sync the library mirror and add its new items to the
+#                                    dedup index, so items already in Zotero are not uploaded
+#   python3 pipeline.py --commit [...] --attach
+#                                  → Then attach each item's CSL "file" (PDF…) to its Zotero
+#                                    item (see attachments.py)
+#   python3 pipeline.py [...] --profile [--metrics FILE] [--cprofile FILE]
+#                                  → Time each stage and save a JSON metrics report
+#                                    (default .bibnow/metrics.json); with --cprofile, also
+#                                    save cProfile stats (read with `python3 -m pstats FILE`)
 
 
 
@@ -16,11 +39,23 @@
 # as the entry point for clipboard-based ingestion. Upload to Zotero will be added later.
 
 import json
-from csl_mapper import csl_to_zotero
-from config import ZOTERO_USERNAME
-from zotero_writer import send_to_zotero
-from clipboard_loader import load_clipboard_or_file
-from obsidian_writer import build_markdown_from_zotero, generate_filename, generate_citekey, write_obsidian_note
+from config import (ZOTERO_USERNAME, ZOTERO_CONCURRENCY, ZOTERO_RATE_LIMIT, DEDUP_INDEX_PATH, JOURNAL_PATH,
+                    BIBNOW_DATA_DIR, require_credentials)
+from zotero_writer import send_batch_to_zotero, chunk_items, get_client, ZOTERO_MAX_BATCH_SIZE
+from upload_engine import ConcurrentUploader
+from batch_transform import transform_item, transform_items
+from dedup_index import DedupIndex, SeenIdentifiers, identifiers_for
+from batch_journal import BatchJournal, JournaledSender, payload_hash, regroup_for_resume, resolve_committed_keys
+from zotero_query import LibraryMirror, sync_library, report_sync
+from records import ItemRecord
+from clipboard_loader import open_clipboard_or_file
+from csl_stream import iter_csl_items, iter_csl_items_from_file
+from obsidian_writer import build_markdown_from_zotero, get_note_writer
+from key_allocator import KeyAllocator
+from vault_index import VaultIndex
+from metrics import METRICS, run_profiled
+from utils import option_value
+import os
 import sys
 
 def _extract_first_key(response: dict):
@@ -48,61 +83,385 @@ def _extract_all_keys(response: dict):
     return [v.get("key") for v in successful.values() if isinstance(v, dict) and v.get("key")]
 
 
+def iter_csl_items_from_input_file(filepath="input.txt"):
+    """
+    Stream CSL items from a file holding a JSON object, a list of objects or NDJSON.
+    Items are parsed one at a time, so memory use does not grow with file size.
+    """
+    return iter_csl_items_from_file(filepath)
 
 def load_csl_items_from_input_file(filepath="input.txt"):
-    with open(filepath, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
     # Accept both a single dict and a list of dicts
-    if isinstance(data, dict):
-        return [data]
-    elif isinstance(data, list):
-        return data
+    return list(iter_csl_items_from_input_file(filepath))
+
+
+def _iter_items(argv):
+    # Time spent reading and parsing input (clipboard included) is charged to "input"
+    for csl_item in METRICS.timed_iter("input", _read_items(argv)):
+        METRICS.add("items")
+        yield csl_item
+
+
+def _read_items(argv):
+    """
+    Yield CSL items lazily from --input FILE, or from the clipboard / input.txt.
+    """
+    input_path = option_value(argv, "--input")
+    if input_path:
+        yield from iter_csl_items_from_input_file(input_path)
+        return
+    with open_clipboard_or_file("input.txt") as stream:
+        yield from iter_csl_items(stream)
+
+
+def _prepare(csl_item):
+    # Map, then generate citekey and filename (markdown waits for the Zotero key)
+    zotero_item, citekey, filename, _ = transform_item(csl_item, render=False)
+    return zotero_item, citekey, filename
+
+
+def _prepare_all(items, workers=1):
+    """
+    Yield (zotero_item, citekey, filename) for each CSL item, in input order,
+    mapping on `workers` processes when more than one is requested.
+    """
+    if workers > 1:
+        transformed = transform_items(items, workers, render=False)
+        for zotero_item, citekey, filename, _ in METRICS.timed_iter("transform", transformed):
+            yield zotero_item, citekey, filename
     else:
-        raise ValueError("Input file must contain a JSON object or a list of objects.")
+        for csl_item in items:
+            yield _prepare(csl_item)
 
 
-if __name__ == "__main__":
-    input_text = load_clipboard_or_file("input.txt")
-    t = (input_text or "").lstrip()
-    if not (t.startswith("{") or t.startswith("[")):
-        raise ValueError("Input is not JSON. v2 expects CSL JSON. If you have BibTeX, switch back to v1 or refactor the input as CSL.")
-    data = json.loads(input_text)
-    items = [data] if isinstance(data, dict) else data
-
-    for csl_item in items:
-        zotero_item = csl_to_zotero(csl_item)
-        # Generate markdown and filename
-        citekey = generate_citekey(zotero_item)
-        filename = generate_filename(zotero_item)
-
-        if "--commit" in sys.argv:
-            status_code, response = send_to_zotero(zotero_item)
-            if 200 <= status_code < 300:
-                successful = response.get("successful", {})
-                zotero_key = None
-                if successful:
-                    first_item = next(iter(successful.values()))
-                    zotero_key = first_item.get("key")
-
-                if zotero_key:
-                    print(f"✅ Upload successful. Zotero Key: {zotero_key}")
-                    print(f"🔗 Zotero URL: https://www.zotero.org/users/{ZOTERO_USERNAME}/items/{zotero_key}")
-                else:
-                    print(f"⚠️ Upload succeeded but no key returned.\n{json.dumps(response, indent=2)}")
+def _write_note(zotero_item, citekey, filename, zotero_key, dedup=None):
+    # ✅ Markdown generation after upload (using zotero_key if present)
+    with METRICS.timer("render"):
+        markdown = build_markdown_from_zotero(zotero_item, citekey, zotero_key)
+
+    path, written = get_note_writer().write(markdown, filename)
+    if written:
+        print(f"📄 Markdown written to: {filename}")
+    else:
+        print(f"📄 Note unchanged, not rewritten: {filename}")
+
+    # Remember the item only once Zotero has it; one transaction per item
+    if dedup is not None and zotero_key:
+        dedup.record(zotero_item, zotero_key, path)
+    return path
+
+
+def _skip_duplicates(prepared, dedup, allocator):
+    """
+    Drop items the dedup index already knows (linking their note instead of
+    uploading again) and repeats of an earlier item in the same run.
+    """
+    if dedup is None:
+        yield from prepared
+        return
+    seen = SeenIdentifiers()
+    for zotero_item, citekey, filename in prepared:
+        with METRICS.timer("dedup"):
+            identifiers = identifiers_for(zotero_item)
+            duplicate = seen.match(identifiers)
+            match = None if duplicate else dedup.lookup_identifiers(identifiers)
+        if duplicate:
+            print(f"⏭️ {filename}: same item appears earlier in this batch; skipped.")
+            continue
+        if match:
+            print(f"🔗 Already in Zotero ({match['kind']} match), not uploading again. Zotero Key: {match['zotero_key']}")
+            note_path = match.get("note_path")
+            if note_path and os.path.exists(note_path):
+                print(f"📄 Note already exists: {note_path}")
+            else:
+                _write_note(zotero_item, *allocator.allocate(citekey, filename), match["zotero_key"], dedup)
+            continue
+        seen.add(identifiers)
+        yield zotero_item, citekey, filename
+
+
+def _report_retries():
+    stats = get_client().last_stats
+    if stats.retries:
+        print(f"🔁 Zotero throttled or unavailable: {stats.summary()}")
+
+
+def _report_key(zotero_key):
+    print(f"✅ Upload successful. Zotero Key: {zotero_key}")
+    print(f"🔗 Zotero URL: https://www.zotero.org/users/{ZOTERO_USERNAME}/items/{zotero_key}")
+
+
+def _skip_completed(prepared, journal, deferred, allocator):
+    """
+    On --resume, drop items an earlier run already finished (rewriting a note
+    only if it has gone missing) and set aside items whose request went through
+    before the crash but whose keys were never recorded.
+    """
+    if journal is None:
+        yield from prepared
+        return
+    for zotero_item, citekey, filename in prepared:
+        record = journal.get(payload_hash(zotero_item))
+        if record and record["event"] == "done":
+            if not (record.get("note") and os.path.exists(record["note"])):
+                _write_note(zotero_item, *allocator.allocate(citekey, filename), record["key"])
+            print(f"⏭️ {filename}: already uploaded by the earlier run (Zotero Key: {record['key']}).")
+            continue
+        if record and record["event"] == "committed":
+            deferred.append((ItemRecord.from_dict(zotero_item), *allocator.allocate(citekey, filename)))
+            continue
+        yield zotero_item, citekey, filename
+
+
+def _finish_item(entry, result, dedup=None, journal=None, deferred=None):
+    """
+    Write the note for an uploaded item and journal it as done. Items an earlier
+    attempt created (write token already used: an interrupted run, or a retry
+    after a lost answer) are deferred until their keys have been looked up.
+    """
+    zotero_item, citekey, filename = entry
+    if result["status"] == "committed":
+        print(f"⏳ {filename}: created by an earlier attempt; looking up its key at the end.")
+        if deferred is not None:
+            deferred.append((ItemRecord.from_dict(zotero_item), citekey, filename))
+        return
+    if result.get("retry"):
+        # Zotero may have the item; a keyless note now would take the name its real note needs
+        print(f"🔁 {filename}: no answer from Zotero; run --resume to retry it (no duplicate is created).")
+        return
+    zotero_key = result["key"] if result["status"] != "failed" else None
+    path = _write_note(zotero_item, citekey, filename, zotero_key, dedup)
+    if journal is not None and zotero_key:
+        journal.record_done(payload_hash(zotero_item), zotero_key, path)
+
+
+def _resolve_deferred(deferred, dedup=None, journal=None):
+    """
+    Look up keys for items an earlier attempt created, then write their notes.
+    `deferred` holds (ItemRecord, citekey, filename): after a large crashed
+    run it can hold most of the input, so items wait there in compact form.
+    """
+    if not deferred:
+        return
+    print(f"🔎 Looking up {len(deferred)} item(s) created by an earlier attempt...")
+    keys = resolve_committed_keys([entry[0] for entry in deferred], LibraryMirror(), get_client())
+    for (record, citekey, filename), zotero_key in zip(deferred, keys):
+        entry = (record.to_dict(), citekey, filename)
+        if zotero_key:
+            _report_key(zotero_key)
+            _finish_item(entry, {"status": "successful", "key": zotero_key}, dedup, journal)
+        else:
+            print(f"⚠️ {entry[2]}: exists in Zotero but could not be matched; note written without key.")
+            _write_note(*entry, None, dedup)
+
+
+def _allocate(prepared, allocator):
+    """Give each item a citekey and note filename no other note uses (a/b/c suffixes)."""
+    for zotero_item, citekey, filename in prepared:
+        yield (zotero_item, *allocator.allocate(citekey, filename))
+
+
+def _commit_stream(items, workers, dedup, journal, deferred, allocator):
+    prepared = _skip_completed(_prepare_all(items, workers), journal, deferred, allocator)
+    return _allocate(_skip_duplicates(prepared, dedup, allocator), allocator)
+
+
+def commit_items(items, workers=1, dedup=None, journal=None, allocator=None):
+    """
+    Upload each CSL item in its own request and write its Obsidian note.
+    """
+    send = JournaledSender(journal) if journal is not None else send_batch_to_zotero
+    deferred = []
+    allocator = allocator or KeyAllocator()
+    for entry in _commit_stream(items, workers, dedup, journal, deferred, allocator):
+        with METRICS.timer("upload"):
+            status_code, response, (result,) = send([entry[0]])
+        _report_retries()
+        if result["status"] == "committed":
+            pass
+        elif 200 <= status_code < 300 and result["status"] != "failed":
+            if result["key"]:
+                _report_key(result["key"])
+            else:
+                print(f"⚠️ Upload succeeded but no key returned.\n{json.dumps(response, indent=2)}")
+        else:
+            print(f"❌ Upload failed. Status: {status_code}")
+            print(json.dumps(response, indent=2))
+
+        _finish_item(entry, result, dedup, journal, deferred)
+    _resolve_deferred(deferred, dedup, journal)
+
+
+def _chunks(prepared, batch_size, journal):
+    if journal is not None:
+        # Re-send requests interrupted by a crash exactly as before (same write token)
+        return regroup_for_resume(prepared, journal, batch_size)
+    return chunk_items(prepared, batch_size)
+
+
+def commit_items_batched(items, batch_size=ZOTERO_MAX_BATCH_SIZE, workers=1, dedup=None, journal=None,
+                         allocator=None):
+    """
+    Upload CSL items in multi-item POSTs of up to `batch_size` (max 50) items.
+
+    Each item in a chunk is matched back to its own key via the index Zotero
+    uses in the `successful` / `unchanged` / `failed` sections of the response,
+    so every Obsidian note gets the key of its own item.
+    """
+    send = JournaledSender(journal) if journal is not None else send_batch_to_zotero
+    deferred = []
+    allocator = allocator or KeyAllocator()
+    prepared = _commit_stream(items, workers, dedup, journal, deferred, allocator)
+    for chunk in _chunks(prepared, batch_size, journal):
+        with METRICS.timer("upload"):
+            status_code, response, results = send([p[0] for p in chunk])
+        print(f"📦 Batch of {len(chunk)} item(s) sent. Status: {status_code}")
+        _report_retries()
+
+        for entry, result in zip(chunk, results):
+            filename = entry[2]
+            if result["status"] == "failed":
+                print(f"❌ {filename}: {result['message']}")
+            elif result["status"] == "committed":
+                pass
+            elif result["key"]:
+                _report_key(result["key"])
             else:
-                print(f"❌ Upload failed. Status: {status_code}")
-                print(json.dumps(response, indent=2))
-            # ✅ Markdown generation after upload (using zotero_key if present)
-            markdown = build_markdown_from_zotero(zotero_item, citekey, zotero_key)
+                print(f"⚠️ {filename}: upload succeeded but no key returned.")
+
+            _finish_item(entry, result, dedup, journal, deferred)
+    _resolve_deferred(deferred, dedup, journal)
+
+
+def commit_items_concurrently(items, concurrency=ZOTERO_CONCURRENCY, rate=ZOTERO_RATE_LIMIT,
+                              batch_size=ZOTERO_MAX_BATCH_SIZE, workers=1, dedup=None, journal=None,
+                              allocator=None):
+    """
+    Upload CSL items in batches with up to `concurrency` requests in flight,
+    sharing a `rate` requests/second limit. Each note is written as soon as
+    its item's key arrives; the summary is printed in input order.
+    """
+    def on_chunk(status_code, size, stats, waited):
+        print(f"📦 Batch of {size} item(s) sent. Status: {status_code}")
+        if stats.retries:
+            print(f"🔁 Zotero throttled or unavailable: {stats.summary()}")
 
-            write_obsidian_note(markdown, filename)
-            print(f"📄 Markdown written to: {filename}")
+    deferred = []
 
+    def on_item(index, entry, result):
+        _finish_item(entry, result, dedup, journal, deferred)
+
+    uploader = ConcurrentUploader(
+        max_in_flight=concurrency, rate=rate, batch_size=batch_size,
+        send=JournaledSender(journal) if journal is not None else send_batch_to_zotero,
+    )
+    chunker = None
+    if journal is not None:
+        chunker = lambda indexed: regroup_for_resume(indexed, journal, batch_size, zotero_item=lambda e: e[2])
+    prepared = _commit_stream(items, workers, dedup, journal, deferred, allocator or KeyAllocator())
+    with METRICS.timer("upload"):
+        results = uploader.run(prepared, zotero_item=lambda entry: entry[0],
+                               on_item=on_item, on_chunk=on_chunk, chunker=chunker)
+
+    for (zotero_item, citekey, filename), result in results:
+        if result["status"] == "failed":
+            print(f"❌ {filename}: {result['message']}")
+        elif result["status"] == "committed":
+            pass
+        elif result["key"]:
+            _report_key(result["key"])
+        else:
+            print(f"⚠️ {filename}: upload succeeded but no key returned.")
+    _resolve_deferred(deferred, dedup, journal)
+
+
+def dry_run(items, workers=1, dedup=None, allocator=None):
+    allocator = allocator or KeyAllocator()
+    # Mapping and rendering are pure CPU work; spread them over processes if asked
+    for zotero_item, citekey, filename, markdown in transform_items(items, workers):
+        match = dedup.lookup(zotero_item) if dedup is not None else None
+        if match:
+            print(f"[DRY-RUN] Already in Zotero ({match['kind']} match, key {match['zotero_key']}); would not upload again.")
         else:
-            # Dry-run mode
-            markdown = build_markdown_from_zotero(zotero_item, citekey)
-            print("[DRY-RUN] No upload. Final mapped Zotero item:\n")
-            print(json.dumps(zotero_item, indent=2))
-            print(f"\n📄 Would write: {filename}")
-            print(markdown)
+            unique_citekey, filename = allocator.allocate(citekey, filename)
+            if unique_citekey != citekey:
+                markdown = build_markdown_from_zotero(zotero_item, unique_citekey)
+        print("[DRY-RUN] No upload. Final mapped Zotero item:\n")
+        print(json.dumps(zotero_item, indent=2))
+        print(f"\n📄 Would write: {filename}")
+        print(markdown)
+
+
+def _attach(argv, dedup):
+    """Second pass over the input: upload the files of items that are now in Zotero."""
+    if dedup is None:
+        print("⚠️ --attach finds items through the dedup index; not attaching with --no-dedup.")
+        return
+    from attachments import attach_files, attachment_jobs  # only runs that attach files need it
+    input_path = option_value(argv, "--input")
+    base_dir = os.path.dirname(os.path.abspath(input_path)) if input_path else os.getcwd()
+    with METRICS.timer("attach"):
+        attach_files(attachment_jobs(_read_items(argv), dedup, base_dir),
+                     option_value(argv, "--concurrency", ZOTERO_CONCURRENCY, int))
+
+
+def main(argv):
+    items = _iter_items(argv)
+    workers = option_value(argv, "--workers", 1, int)
+
+    dedup = None
+    if "--no-dedup" not in argv and ("--commit" in argv or "--resume" in argv or "--sync" in argv
+                                     or os.path.exists(DEDUP_INDEX_PATH)):
+        dedup = DedupIndex(DEDUP_INDEX_PATH)
+
+    if "--sync" in argv:
+        if dedup is None:
+            print("⚠️ --sync fills the dedup index; not syncing with --no-dedup.")
+        else:
+            require_credentials()
+            report_sync(sync_library(get_client(), dedup))
+
+    # Citekeys / filenames already used by notes in the vault are never handed out again
+    allocator = KeyAllocator(VaultIndex())
+
+    commit = "--commit" in argv or "--resume" in argv
+    journal = None
+    if commit:
+        # Fail before any work is done; a dry-run needs no credentials at all
+        require_credentials()
+        # Every commit run is journaled; --resume replays the journal instead of starting over
+        journal = BatchJournal(option_value(argv, "--journal", JOURNAL_PATH), resume="--resume" in argv)
+
+    if commit:
+        if "--concurrency" in argv:
+            commit_items_concurrently(
+                items,
+                concurrency=option_value(argv, "--concurrency", ZOTERO_CONCURRENCY, int),
+                rate=option_value(argv, "--rate", ZOTERO_RATE_LIMIT, float),
+                batch_size=option_value(argv, "--batch-size", ZOTERO_MAX_BATCH_SIZE, int),
+                workers=workers,
+                dedup=dedup,
+                journal=journal,
+                allocator=allocator,
+            )
+        elif "--batch" in argv:
+            batch_size = option_value(argv, "--batch-size", ZOTERO_MAX_BATCH_SIZE, int)
+            commit_items_batched(items, batch_size, workers, dedup, journal, allocator)
+        else:
+            commit_items(items, workers, dedup, journal, allocator)
+        journal.close()
+        if "--attach" in argv:
+            _attach(argv, dedup)
+    else:
+        # Dry-run mode
+        dry_run(items, workers, dedup, allocator)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if "--profile" in args or "--cprofile" in args:
+        run_profiled(main, (args,),
+                     metrics_path=option_value(args, "--metrics", os.path.join(BIBNOW_DATA_DIR, "metrics.json")),
+                     cprofile_path=option_value(args, "--cprofile"))
+    else:
+        main(args)
@@ -0,0 +1,196 @@
+# records.py
+
+"""
+Compact in-memory records for mapped Zotero items.
+
+A mapped item is normally a dict of fields plus a dict per creator and per
+tag. Held by the hundred thousand, that costs several GB. ItemRecord holds the
+same item in a fraction of that:
+
+- field names live in a "shape" tuple that is shared by every item with the
+  same fields in the same order; each record keeps only a tuple of values;
+- creators become CreatorRecords (__slots__, no per-instance dict);
+- plain tags ({"tag": ...}) become the tag string itself;
+- repeated strings are interned: item types, creator roles, names, tags and
+  the values of fields listed in INTERNED_FIELDS (journal, publisher, place…),
+  so each distinct string is stored once however many items use it.
+
+Conversion is lossless: ItemRecord.from_dict(d).to_dict() == d, with the
+original field order. to_dict() gives exactly the JSON object send_to_zotero
+expects. Creators with unusual keys are kept as their original dicts, and so
+is an item's tag list if any tag has more than a "tag" key (e.g. "type": 1).
+
+    record = ItemRecord.from_dict(csl_to_zotero(csl_item))
+    record["title"], record.item_type, record.creators[0].last_name
+    send_batch_to_zotero([r.to_dict() for r in records])
+
+Records are read-only; build a new one from a changed dict. They are used
+where items wait in bulk: items of a crashed run waiting for their keys
+(pipeline._resolve_deferred) and items of an incremental library sync
+waiting to be stored (zotero_query.LibraryMirror).
+"""
+
+import sys
+
+# Fields whose values repeat across many items of a library
+INTERNED_FIELDS = frozenset({
+    "itemType", "publicationTitle", "journalAbbreviation", "bookTitle", "proceedingsTitle", "conferenceName",
+    "encyclopediaTitle", "dictionaryTitle", "websiteTitle", "blogTitle", "forumTitle", "programTitle",
+    "seriesTitle", "series", "publisher", "place", "university", "institution", "company", "label",
+    "distributor", "network", "studio", "court", "reporter", "legislativeBody", "code", "committee",
+    "language", "libraryCatalog", "archive", "rights", "genre", "thesisType", "reportType",
+    "websiteType", "presentationType", "manuscriptType", "letterType", "mapType", "postType",
+    "interviewMedium", "audioRecordingFormat", "videoRecordingFormat", "artworkMedium", "medium",
+})
+
+_CREATOR_KEYS = (("creatorType", "firstName", "lastName"), ("creatorType", "name"))
+_SHAPES = {}  # field-name tuple -> the one shared instance of it
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def _shape(keys):
+    keys = tuple(sys.intern(k) for k in keys)
+    return _SHAPES.setdefault(keys, keys)
+
+
+class CreatorRecord:
+    """A creator: firstName/lastName or a single name, plus its role."""
+
+    __slots__ = ("creator_type", "first_name", "last_name", "name")
+
+    def __init__(self, creator_type, first_name=None, last_name=None, name=None):
+        self.creator_type = _intern(creator_type)
+        self.first_name = _intern(first_name)
+        self.last_name = _intern(last_name)
+        self.name = _intern(name)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Return a CreatorRecord, or `data` itself if it has keys a record cannot hold."""
+        keys = tuple(data)
+        if keys == _CREATOR_KEYS[0]:
+            return cls(data["creatorType"], data["firstName"], data["lastName"])
+        if keys == _CREATOR_KEYS[1] and data["name"] is not None:
+            return cls(data["creatorType"], name=data["name"])
+        return data
+
+    def to_dict(self):
+        if self.name is not None:
+            return {"creatorType": self.creator_type, "name": self.name}
+        return {"creatorType": self.creator_type, "firstName": self.first_name, "lastName": self.last_name}
+
+    def __eq__(self, other):
+        if not isinstance(other, CreatorRecord):
+            return NotImplemented
+        return (self.creator_type, self.first_name, self.last_name, self.name) == \
+               (other.creator_type, other.first_name, other.last_name, other.name)
+
+    def __repr__(self):
+        return f"CreatorRecord({self.to_dict()!r})"
+
+
+def _pack_value(name, value):
+    if name == "creators" and type(value) is list:
+        return tuple(CreatorRecord.from_dict(c) if type(c) is dict else c for c in value)
+    if name == "tags" and type(value) is list:
+        if all(type(t) is dict and len(t) == 1 and type(t.get("tag")) is str for t in value):
+            return tuple(sys.intern(t["tag"]) for t in value)
+        return value  # tags with a "type" or other keys are kept as they are
+    if name in INTERNED_FIELDS:
+        return _intern(value)
+    return value
+
+
+def _unpack_value(name, value):
+    if name == "creators" and type(value) is tuple:
+        return [c.to_dict() if type(c) is CreatorRecord else c for c in value]
+    if name == "tags" and type(value) is tuple:
+        return [{"tag": t} for t in value]
+    return value
+
+
+class ItemRecord:
+    """
+    A mapped Zotero item as a shared field-name shape plus a tuple of values.
+
+    Parameters:
+        shape (tuple): Field names, in order (see ItemRecord.from_dict).
+        values (tuple): Packed values, aligned with shape.
+    """
+
+    __slots__ = ("shape", "values")
+
+    def __init__(self, shape, values):
+        self.shape = shape
+        self.values = values
+
+    @classmethod
+    def from_dict(cls, data):
+        """Pack a Zotero item dict (as built by csl_to_zotero or read from the API)."""
+        return cls(_shape(data), tuple(_pack_value(name, value) for name, value in data.items()))
+
+    def to_dict(self):
+        """Return the item as the JSON-ready dict send_to_zotero expects."""
+        return {name: _unpack_value(name, value) for name, value in zip(self.shape, self.values)}
+
+    # --- read access ---
+
+    def _index(self, name):
+        try:
+            return self.shape.index(name)
+        except ValueError:
+            return -1
+
+    def get(self, name, default=None):
+        """Field value as in the dict form (creators and tags unpacked)."""
+        i = self._index(name)
+        return _unpack_value(name, self.values[i]) if i >= 0 else default
+
+    def __getitem__(self, name):
+        i = self._index(name)
+        if i < 0:
+            raise KeyError(name)
+        return _unpack_value(name, self.values[i])
+
+    def __contains__(self, name):
+        return name in self.shape
+
+    def __len__(self):
+        return len(self.shape)
+
+    def keys(self):
+        return self.shape
+
+    @property
+    def item_type(self):
+        i = self._index("itemType")
+        return self.values[i] if i >= 0 else None
+
+    @property
+    def creators(self):
+        """Creators as CreatorRecords (or dicts for unusual ones), without unpacking."""
+        i = self._index("creators")
+        return self.values[i] if i >= 0 else ()
+
+    @property
+    def tags(self):
+        """Tag strings, without unpacking (tag dicts if any tag has extra keys)."""
+        i = self._index("tags")
+        return self.values[i] if i >= 0 else ()
+
+    def __eq__(self, other):
+        if not isinstance(other, ItemRecord):
+            return NotImplemented
+        return self.shape == other.shape and self.values == other.values
+
+    def __repr__(self):
+        return f"ItemRecord({self.to_dict()!r})"
+
+
+def pack_items(items):
+    """Yield an ItemRecord for each Zotero item dict."""
+    for item in items:
+        yield ItemRecord.from_dict(item)
@@ -0,0 +1,195 @@
+# synthetic_corpus.py
+
+# Usage:
+#   python3 synthetic_corpus.py 10000 > corpus.ndjson
+#   python3 synthetic_corpus.py 10000 --mix legal_case=3,bill=1,book=1 --seed 7 --array > corpus.json
+
+"""
+Reproducible synthetic CSL-JSON corpora for benchmarks and load tests.
+
+Items are generated from a seeded random.Random, so the same (n, mix, seed)
+always gives the same corpus. Besides ordinary articles, books and chapters,
+the default mix covers the cases the mappers special-case:
+
+- legal_case (caseName / court / authority, date-parts → dateDecided, page → firstPage)
+- bill (billNumber, session, legislativeBody) and legislation → statute
+- literal / "name" / plain-string creators next to family/given names
+- "keywords" as a comma-separated string and "keyword" as a list
+- nonstandard fields that csl_to_zotero moves into `extra` (strings, lists and dicts)
+"""
+
+import json
+import random
+import sys
+
+from utils import option_value
+
+# Relative weight of each CSL type in the default corpus
+DEFAULT_MIX = {
+    "article-journal": 6,
+    "book": 3,
+    "chapter": 2,
+    "paper-conference": 2,
+    "report": 2,
+    "thesis": 1,
+    "webpage": 2,
+    "legal_case": 2,
+    "bill": 1,
+    "legislation": 1,
+    "presentation": 1,
+    "interview": 1,
+    "song": 1,
+    "motion_picture": 1,
+}
+
+_WORDS = (
+    "archive signal noise memory empire margin pipeline batch network urban language "
+    "policy court reform data model theory practice history media culture law market "
+    "health climate digital public private evidence method analysis study review"
+).split()
+_FAMILY = ("Smith", "Chen", "Okafor", "Ramos", "Nguyen", "Lind", "O'Malley", "Müller", "García", "Kowalski")
+_GIVEN = ("Ada", "Kim", "Pat", "Isabel", "Lili", "Per", "Jane", "Omar", "Sven", "Zoë")
+_INSTITUTIONS = ("Institute for Test Studies", "World Health Organization", "Law Commission",
+                 "Office of Statistics")
+_COURTS = ("Supreme Court", "Court of Appeal", "High Court of Justice", "Example District Court")
+_NONSTANDARD = ("archive", "archive_location", "call-number", "dimensions", "ISSN", "original-title",
+                "references", "status", "version", "medium", "scale", "source", "note")
+
+
+def _title(rng, lo=3, hi=9):
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(lo, hi))).capitalize()
+
+
+def _person(rng):
+    roll = rng.random()
+    if roll < 0.1:
+        return {"literal": rng.choice(_INSTITUTIONS)}
+    if roll < 0.15:
+        return {"name": rng.choice(_INSTITUTIONS)}
+    if roll < 0.18:
+        return rng.choice(_FAMILY)  # bare string creator
+    return {"family": rng.choice(_FAMILY), "given": rng.choice(_GIVEN)}
+
+
+def _issued(rng):
+    year = rng.randint(1950, 2025)
+    roll = rng.random()
+    if roll < 0.2:
+        return {"raw": f"{year}-{rng.randint(1, 12):02d}"}
+    if roll < 0.6:
+        return {"date-parts": [[year, rng.randint(1, 12), rng.randint(1, 28)]]}
+    return {"date-parts": [[year]]}
+
+
+def _keywords(rng, item):
+    words = rng.sample(_WORDS, rng.randint(1, 6))
+    roll = rng.random()
+    if roll < 0.4:
+        item["keywords"] = ", ".join(words)
+    elif roll < 0.8:
+        item["keyword"] = words
+    elif roll < 0.9:
+        item["keywords"] = words
+
+
+def _nonstandard(rng, item, i):
+    for name in rng.sample(_NONSTANDARD, rng.randint(0, 5)):
+        item[name] = _title(rng, 1, 3)
+    if rng.random() < 0.2:
+        item[f"custom-field-{i % 7}"] = [rng.choice(_WORDS), rng.choice(_WORDS)]
+    if rng.random() < 0.1:
+        item["custom"] = {"source": "synthetic", "n": i}
+
+
+def _common(rng, item, i):
+    if rng.random() < 0.5:
+        item["DOI"] = f"10.{rng.randint(1000, 9999)}/synthetic.{i}"
+    if rng.random() < 0.4:
+        item["URL"] = f"https://example.org/items/{i}"
+    if rng.random() < 0.6:
+        item["abstract"] = " ".join(_title(rng, 8, 20) + "." for _ in range(rng.randint(1, 4)))
+    if rng.random() < 0.3:
+        item["language"] = rng.choice(("en", "de", "fr", "es"))
+    if rng.random() < 0.2:
+        item["accessed"] = {"raw": f"{rng.randint(2015, 2025)}-01-01"}
+
+
+def make_item(csl_type, rng, i):
+    """Build one synthetic CSL item of `csl_type`."""
+    item = {"id": f"syn-{i}", "type": csl_type, "title": _title(rng), "issued": _issued(rng),
+            "author": [_person(rng) for _ in range(rng.randint(1, 4))]}
+
+    if csl_type in ("article-journal", "paper-conference", "chapter"):
+        item["container-title"] = _title(rng, 2, 5)
+        item["page"] = f"{rng.randint(1, 300)}-{rng.randint(301, 600)}"
+        item["volume"] = str(rng.randint(1, 80))
+        item["issue"] = str(rng.randint(1, 12))
+    if csl_type == "chapter":
+        item["editor"] = [_person(rng) for _ in range(rng.randint(1, 2))]
+    if csl_type in ("book", "chapter", "report", "thesis"):
+        item["publisher"] = _title(rng, 1, 3) + " Press"
+        item["publisher-place"] = rng.choice(("London", "Madrid", "Berlin", "New York"))
+    if csl_type in ("report", "thesis"):
+        item["genre"] = rng.choice(("Working paper", "PhD thesis", "Technical report"))
+    if csl_type in ("paper-conference", "presentation"):
+        item["event"] = _title(rng, 1, 3) + f" Conference {rng.randint(1990, 2025)}"
+    if csl_type in ("interview", "song", "motion_picture"):
+        item["medium"] = rng.choice(("Audio", "Video", "CD", "Streaming"))
+    if csl_type == "legal_case":
+        del item["author"]  # cases have courts, not authors
+        if rng.random() < 0.5:
+            item["caseName"] = f"{rng.choice(_FAMILY)} v. {rng.choice(_FAMILY)}"
+        court = rng.choice(_COURTS)
+        item["court" if rng.random() < 0.7 else "authority"] = court
+        item["page"] = f"{rng.randint(1, 900)}-{rng.randint(901, 999)}"
+    if csl_type == "bill":
+        item["billNumber"] = f"H.R. {rng.randint(1, 9999)}"
+        item["session"] = str(rng.randint(100, 120))
+        item["legislativeBody"] = rng.choice(("House", "Senate", "Parliament"))
+    if csl_type == "legislation":
+        item["nameOfAct"] = item["title"] + " Act"
+        item["section"] = str(rng.randint(1, 200))
+        item["code"] = rng.choice(("U.S.C.", "C.F.R."))
+
+    _common(rng, item, i)
+    _keywords(rng, item)
+    _nonstandard(rng, item, i)
+    return item
+
+
+def parse_mix(spec):
+    """Parse 'legal_case=3,book=1' into a mix dict."""
+    mix = {}
+    for part in spec.split(","):
+        if part.strip():
+            name, _, weight = part.partition("=")
+            mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def generate_corpus(n, mix=None, seed=0):
+    """
+    Yield n synthetic CSL items.
+
+    Parameters:
+        n (int): Number of items.
+        mix (dict): CSL type → relative weight (defaults to DEFAULT_MIX).
+        seed (int): Random seed; the same arguments always give the same corpus.
+    """
+    mix = mix or DEFAULT_MIX
+    rng = random.Random(seed)
+    types = list(mix)
+    weights = [mix[t] for t in types]
+    for i in range(n):
+        yield make_item(rng.choices(types, weights)[0], rng, i)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    count = int(args[0]) if args and args[0].isdigit() else 1000
+    corpus = generate_corpus(count, parse_mix(option_value(args, "--mix", "")), option_value(args, "--seed", 0, int))
+    if "--array" in args:
+        json.dump(list(corpus), sys.stdout, ensure_ascii=False)
+    else:
+        for csl_item in corpus:
+            sys.stdout.write(json.dumps(csl_item, ensure_ascii=False) + "\n")
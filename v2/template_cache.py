@@ -0,0 +1,104 @@
+# template_cache.py
+
+"""
+Compiled, cached note templates.
+
+Templates use `string.Template` syntax ($name / ${name}, $$ for a literal $)
+and render exactly like `Template.safe_substitute`: unknown placeholders are
+left in the output untouched.
+
+A template is parsed once into a list of literal segments with placeholder
+slots, so rendering is a handful of list assignments and one join instead of
+a regex scan of the whole template per note. Templates are registered by name
+and recompiled automatically when the file's mtime (or size) changes.
+"""
+
+import os
+import threading
+from string import Template
+
+_MISSING = object()
+
+
+class CompiledTemplate:
+    """A template pre-split into literal segments and placeholder slots."""
+
+    def __init__(self, text: str):
+        self.text = text
+        parts = []
+        slots = []  # (index into parts, placeholder name, original text)
+        literal = []
+        pos = 0
+        for m in Template.pattern.finditer(text):
+            literal.append(text[pos:m.start()])
+            pos = m.end()
+            name = m.group("named") or m.group("braced")
+            if name is not None:
+                parts.append("".join(literal))
+                literal = []
+                slots.append((len(parts), name, m.group()))
+                parts.append(m.group())
+            elif m.group("escaped") is not None:
+                literal.append(Template.delimiter)
+            else:
+                # invalid placeholder: safe_substitute leaves it as-is
+                literal.append(m.group())
+        literal.append(text[pos:])
+        parts.append("".join(literal))
+
+        self._parts = parts
+        self._slots = tuple(slots)
+
+    @property
+    def placeholders(self):
+        """Names used by the template, in order of first appearance."""
+        return list(dict.fromkeys(name for _, name, _ in self._slots))
+
+    def render(self, mapping: dict) -> str:
+        """Substitute values from `mapping`; equivalent to Template(text).safe_substitute(mapping)."""
+        out = self._parts.copy()
+        for i, name, raw in self._slots:
+            value = mapping.get(name, _MISSING)
+            out[i] = raw if value is _MISSING else str(value)
+        return "".join(out)
+
+
+class TemplateCache:
+    """
+    Registry of named template files, compiled on first use and recompiled
+    when the file changes on disk.
+    """
+
+    def __init__(self):
+        self._paths = {}
+        self._compiled = {}  # name -> ((mtime_ns, size), CompiledTemplate)
+        self._lock = threading.Lock()
+
+    def register(self, name: str, path: str):
+        """Register (or re-point) template `name` to the file at `path`."""
+        with self._lock:
+            self._paths[name] = path
+            self._compiled.pop(name, None)
+
+    def names(self):
+        return list(self._paths)
+
+    def get(self, name: str) -> CompiledTemplate:
+        """Return the compiled template, recompiling if the file's mtime or size changed."""
+        path = self._paths.get(name)
+        if path is None:
+            raise KeyError(f"No template registered under '{name}'.")
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached = self._compiled.get(name)
+        if cached and cached[0] == stamp:
+            return cached[1]
+
+        with open(path, encoding="utf-8") as f:
+            compiled = CompiledTemplate(f.read())
+        with self._lock:
+            self._compiled[name] = (stamp, compiled)
+        return compiled
+
+    def render(self, name: str, mapping: dict) -> str:
+        return self.get(name).render(mapping)
@@ -0,0 +1,75 @@
+# test_batch_journal.py
+
+"""
+Write-token resume against fake_zotero_server: a request that reached Zotero
+but timed out must not be created a second time by --resume. Compaction must
+keep exactly what such a retry needs.
+"""
+
+import json
+
+from batch_journal import BatchJournal
+from fake_zotero_server import FakeZoteroServer
+
+ITEMS = [
+    {"id": "a", "type": "article-journal", "title": "Write tokens in practice", "DOI": "10.1000/resume.1",
+     "author": [{"family": "Okafor", "given": "Kim"}], "issued": {"date-parts": [[2021]]}},
+    {"id": "b", "type": "book", "title": "Idempotent uploads", "ISBN": "9780306406157",
+     "author": [{"family": "Smith", "given": "Ada"}], "issued": {"date-parts": [[2019]]}},
+]
+
+
+def _journal(tmp_path):
+    with open(tmp_path / "data" / "commit_journal.jsonl", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_timeout_then_resume_reuses_write_token(tmp_path, run_pipeline):
+    input_path = tmp_path / "items.json"
+    input_path.write_text(json.dumps(ITEMS), encoding="utf-8")
+
+    with FakeZoteroServer(plost=1.0) as server:
+        # Zotero stores the items, but the answer is lost and the client gives up (no retries left)
+        first = run_pipeline(["--commit", "--batch", "--input", str(input_path)], server, retries=0)
+        assert first.returncode == 0, first.stdout + first.stderr
+        assert server.state.stats["created"] == 2
+        assert server.state.stats["lost"] == 1
+
+        records = _journal(tmp_path)
+        assert {r["event"] for r in records} == {"pending"}  # not journaled as failed
+        tokens = {r["token"] for r in records}
+        assert len(tokens) == 1
+        assert not list((tmp_path / "vault").iterdir())  # no keyless notes taking the names
+
+        server.httpd.plost = 0.0
+        resumed = run_pipeline(["--resume", "--batch", "--input", str(input_path)], server)
+        assert resumed.returncode == 0, resumed.stdout + resumed.stderr
+        assert "Status: 412" in resumed.stdout
+
+    # Same token sent again, nothing created twice, and the notes carry the keys found in the library
+    committed = [r for r in _journal(tmp_path) if r["event"] == "committed"]
+    assert {r["token"] for r in committed} == tokens
+    assert server.state.stats["created"] == 2
+    done = [r for r in _journal(tmp_path) if r["event"] == "done"]
+    assert sorted(r["key"] for r in done) == sorted(server.state.items)
+    assert len(list((tmp_path / "vault").iterdir())) == 2
+
+
+def test_compact_keeps_only_unanswered_requests(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = BatchJournal(str(path))
+    journal.record_pending(["a", "b"], "done-token")
+    journal.record_done("a", "AAAA2222", "a.md")
+    journal.record_failed("b", "HTTP 400")
+    journal.record_pending(["c", "d"], "lost-token")
+
+    assert journal.compact() == 2
+    assert journal.get("a") is None and journal.token_size("done-token") is None
+    journal.record_done("e", "EEEE2222", "e.md")  # appends to the compacted file
+    journal.close()
+
+    with open(path, encoding="utf-8") as f:
+        assert [json.loads(line)["hash"] for line in f] == ["c", "d", "e"]
+    resumed = BatchJournal(str(path), resume=True)
+    assert resumed.token_for(["c", "d"]) == "lost-token"
+    resumed.close()
@@ -0,0 +1,115 @@
+# test_bibtex.py
+
+"""
+Streaming BibTeX reader: the result must not depend on where the chunks end,
+and crossref, macros and the name forms must come out as Zotero needs them.
+"""
+
+import io
+
+import pytest
+
+from bibtex import iter_bibtex_items, parse_name, parse_names
+
+CHUNK_SIZES = [1, 2, 3, 7, 64, 1 << 16]
+
+LIBRARY = r"""
+% JabRef header, ignored
+@comment{jabref-meta: databaseType:biblatex;}
+@preamble{"\newcommand{\noop}[1]{}"}
+@string{ acm = "ACM" }
+@string{conf = acm # " Conference on " # "Streams"}
+
+@inproceedings{early,
+  author    = {Dupont, Jean and M{\"u}ller, J{\"o}rg},
+  title     = {Parsing {BibTeX} in one pass},
+  crossref  = {proc},
+  pages     = {10--20},
+}
+
+@proceedings{proc,
+  title     = conf,
+  editor    = {Ada Lovelace},
+  publisher = acm,
+  year      = 2021,
+  month     = mar,
+}
+
+@inproceedings(late,
+  author   = "de la Fontaine, Jean",
+  title    = "Crossrefs after their parent",
+  crossref = "PROC",
+  year     = 2022,
+)
+
+@article{orphan,
+  title    = {Nobody's child},
+  crossref = {missing},
+}
+
+@article{plain,
+  author  = {{World Health Organization} and others},
+  title   = "Caf\'e \& {na\"{\i}ve} --- quotes",
+  journal = {Journal of Tests},
+  number  = 4,
+  doi     = {10.1000/Plain_1},
+}
+"""
+
+
+def _items(text, chunk_size=1 << 16):
+    return list(iter_bibtex_items(io.StringIO(text), chunk_size))
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_chunk_size_does_not_change_the_result(chunk_size):
+    assert _items(LIBRARY, chunk_size) == _items(LIBRARY)
+
+
+def test_crossref_order_and_inheritance():
+    items = _items(LIBRARY)
+    # A child read before its parent is held back until right after it; an orphan comes last
+    assert [item["id"] for item in items] == ["proc", "early", "late", "plain", "orphan"]
+    items = {item["id"]: item for item in items}
+
+    early = items["early"]
+    assert early["title"] == "Parsing BibTeX in one pass"
+    assert early["container-title"] == "ACM Conference on Streams"
+    assert early["publisher"] == "ACM"
+    assert early["editor"] == [{"family": "Lovelace", "given": "Ada"}]
+    assert early["issued"] == {"date-parts": [[2021, 3]]}
+    assert early["page"] == "10-20"
+
+    late = items["late"]  # crossref keys are case-insensitive; the child's year wins, the month is inherited
+    assert late["container-title"] == "ACM Conference on Streams"
+    assert late["issued"] == {"date-parts": [[2022, 3]]}
+
+    assert items["orphan"] == {"id": "orphan", "type": "article-journal", "title": "Nobody's child"}
+
+
+def test_macros_latex_and_verbatim_fields():
+    plain = {item["id"]: item for item in _items(LIBRARY)}["plain"]
+    assert plain["title"] == "Café & naïve — quotes"
+    assert plain["author"] == [{"literal": "World Health Organization"}]  # "and others" is dropped
+    assert plain["container-title"] == "Journal of Tests"
+    assert plain["issue"] == "4"
+    assert plain["DOI"] == "10.1000/Plain_1"
+
+
+@pytest.mark.parametrize("raw, name", [
+    ("Jean Dupont", {"family": "Dupont", "given": "Jean"}),
+    ("Dupont, Jean", {"family": "Dupont", "given": "Jean"}),
+    ("King, Jr, Martin Luther", {"family": "King", "given": "Martin Luther", "suffix": "Jr"}),
+    ("Ludwig van Beethoven", {"family": "van Beethoven", "given": "Ludwig"}),
+    ("van der Berg, Anna", {"family": "van der Berg", "given": "Anna"}),
+    ("{Barnes and Noble}", {"literal": "Barnes and Noble"}),
+    ("Jean {de La} Fontaine", {"family": "Fontaine", "given": "Jean de La"}),
+    ("{\\'E}mile Zola", {"family": "Zola", "given": "Émile"}),
+])
+def test_name_forms(raw, name):
+    assert parse_name(raw) == name
+
+
+def test_name_list_splits_only_on_top_level_and():
+    assert parse_names("{Barnes and Noble} AND Smith, Ada and others") == [
+        {"literal": "Barnes and Noble"}, {"family": "Smith", "given": "Ada"}]
@@ -0,0 +1,66 @@
+# test_csl_stream.py
+
+"""
+Incremental CSL reader: every accepted layout must give the same items
+whatever the chunk size, and BibTeX must be recognized however far its first
+entry is from the start.
+"""
+
+import io
+import json
+
+import pytest
+
+from csl_stream import iter_csl_items
+
+CHUNK_SIZES = [1, 2, 3, 7, 64, 1 << 16]
+
+ITEMS = [
+    {"id": "a", "type": "book", "title": "Braces { and } [brackets] in \"strings\"",
+     "author": [{"family": "Müller", "given": "Jörg"}]},
+    {"id": "b", "type": "article-journal", "title": "Back\\slash \\\" and \\u escapes ☃",
+     "issued": {"date-parts": [[2020, 5]]}, "note": "line\nbreak"},
+    {"id": "c", "type": "chapter", "title": "", "keywords": [[], {}, ["{"]]},
+]
+
+LAYOUTS = {
+    "object": json.dumps(ITEMS[0]),
+    "array": json.dumps(ITEMS, indent=2),
+    "ndjson": "\n".join(json.dumps(item, ensure_ascii=False) for item in ITEMS) + "\n",
+    "arrays in sequence": json.dumps(ITEMS[:1]) + "\n" + json.dumps(ITEMS[1:]),
+    "padded": "\n\n  " + json.dumps(ITEMS, separators=(",", ":")) + "  \n",
+}
+
+
+def _items(text, chunk_size=1 << 16):
+    return list(iter_csl_items(io.StringIO(text), chunk_size))
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_layouts_at_every_chunk_size(layout, chunk_size):
+    expected = ITEMS[:1] if layout == "object" else ITEMS
+    assert _items(LAYOUTS[layout], chunk_size) == expected
+
+
+def test_empty_array():
+    assert _items(" [ ] ") == []
+
+
+@pytest.mark.parametrize("text", ["hello", "[1, 2]", '[{"id": "a"} {"id": "b"}]', '{"id": "a"} 42', '[{"id": "a"}'])
+def test_malformed_input_is_rejected(text):
+    with pytest.raises(ValueError):
+        _items(text, 3)
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_bibtex_after_a_long_header(chunk_size):
+    # The first entry comes long after the first chunk; a commented-out entry does not count
+    header = "% exported by a reference manager\n% @misc{commented, title={No}}\n" * 2000
+    text = header + "@book{first, title={First}}\n@misc{second, title = {Second}}\n"
+    assert [item["id"] for item in _items(text, chunk_size)] == ["first", "second"]
+
+
+def test_text_without_entries_is_rejected():
+    with pytest.raises(ValueError):
+        _items("% only comments\n" * 10000 + "mail me@example.org\n", 64)
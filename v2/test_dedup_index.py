@@ -0,0 +1,69 @@
+# test_dedup_index.py
+
+"""
+DedupIndex matches on the strongest shared identifier, but a DOI or ISBN on
+both sides that differs vetoes weaker (URL, title) matches; SeenIdentifiers
+applies the same rule within a run.
+"""
+
+from dedup_index import DedupIndex, SeenIdentifiers, identifiers_for, normalize_isbn
+
+INTRODUCTION = {"itemType": "bookSection", "title": "Introduction", "date": "2020", "DOI": "10.1000/intro.a",
+                "creators": [{"creatorType": "author", "firstName": "Ada", "lastName": "Smith"}]}
+BOOK = {"itemType": "book", "title": "Streams", "date": "2019", "ISBN": "0-306-40615-2",
+        "url": "https://www.example.org/streams/",
+        "creators": [{"creatorType": "author", "firstName": "Kim", "lastName": "Okafor"}]}
+
+
+def _index(tmp_path):
+    index = DedupIndex(str(tmp_path / "dedup.sqlite"))
+    index.record(INTRODUCTION, "INTROAAA", "intro.md")
+    index.record(BOOK, "BOOKAAAA", "book.md")
+    return index
+
+
+def test_identifiers_are_normalized():
+    item = dict(BOOK, DOI="https://doi.org/10.1000/ABC")
+    assert identifiers_for(item)[:3] == [("doi", "10.1000/abc"), ("isbn", "9780306406157"),
+                                         ("url", "example.org/streams")]
+    assert normalize_isbn("978-0-306-40615-7") == normalize_isbn("0306406152")
+
+
+def test_strongest_identifier_matches(tmp_path):
+    index = _index(tmp_path)
+    match = index.lookup(dict(INTRODUCTION, title="Another title", DOI="doi: 10.1000/INTRO.A"))
+    assert (match["kind"], match["zotero_key"], match["note_path"]) == ("doi", "INTROAAA", "intro.md")
+    assert index.lookup(dict(BOOK, ISBN="9780306406157", url=None))["kind"] == "isbn"
+    index.close()
+
+
+def test_different_doi_vetoes_a_title_match(tmp_path):
+    index = _index(tmp_path)
+    other = dict(INTRODUCTION, DOI="10.1000/intro.b")  # same title, year and author
+    assert index.lookup(other) is None
+    # Without a DOI of its own, the title match stands
+    assert index.lookup({k: v for k, v in other.items() if k != "DOI"})["kind"] == "title"
+    index.close()
+
+
+def test_different_isbn_vetoes_a_url_match(tmp_path):
+    index = _index(tmp_path)
+    assert index.lookup(dict(BOOK, ISBN="9781234567897", title="Streams, 2nd edition")) is None
+    assert index.lookup(dict(BOOK, ISBN=None, title="Streams, 2nd edition"))["kind"] == "url"
+    index.close()
+
+
+def test_the_index_survives_reopening(tmp_path):
+    _index(tmp_path).close()
+    index = DedupIndex(str(tmp_path / "dedup.sqlite"))
+    assert index.lookup(BOOK)["zotero_key"] == "BOOKAAAA"
+    assert index.note_for_key("INTROAAA") == "intro.md"
+    index.close()
+
+
+def test_seen_identifiers_apply_the_same_veto():
+    seen = SeenIdentifiers()
+    seen.add(identifiers_for(INTRODUCTION))
+    assert seen.match(identifiers_for(dict(INTRODUCTION, DOI="10.1000/intro.b"))) is None
+    assert seen.match(identifiers_for(dict(INTRODUCTION, DOI=None))) == ("title", "introduction|2020|smith")
+    assert seen.match(identifiers_for(INTRODUCTION)) == ("doi", "10.1000/intro.a")
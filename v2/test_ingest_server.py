@@ -0,0 +1,80 @@
+# test_ingest_server.py
+
+"""
+The ingest queue keeps accepted items across a restart: items a stopped
+worker was processing are queued again, finished ones keep their outcome,
+and a job accepted by one server instance is completed by the next.
+"""
+
+import json
+import time
+import urllib.request
+
+from ingest_server import IngestQueue, IngestServer
+
+ITEM = {"id": "q", "type": "book", "title": "Queued before the restart",
+        "author": [{"family": "Smith", "given": "Ada"}], "issued": {"date-parts": [[2019]]}}
+
+
+def _entries(n):
+    return [({"itemType": "book", "title": f"Book {i}"}, f"Smith2019Book{i}", f"LN Smith 2019 Book {i}.md")
+            for i in range(n)]
+
+
+def test_queue_survives_a_restart(tmp_path):
+    path = str(tmp_path / "queue.sqlite")
+    queue = IngestQueue(path)
+    job = queue.enqueue(_entries(3))
+    (first, _), (second, _) = queue.claim(2)
+    queue.finish(first, "done", zotero_key="ABCD2345", note="note.md")
+    queue.close()  # the worker stops with `second` still processing
+
+    queue = IngestQueue(path)
+    assert queue.depth() == {"processing": 1, "queued": 1}
+    assert queue.recover() == 1
+    assert queue.pending()[0] == 2
+    claimed = queue.claim(10)
+    assert [row_id for row_id, _ in claimed][0] == second  # the interrupted item goes first
+    assert claimed[0][1] == tuple(_entries(3)[1])
+    status = queue.job(job)
+    assert status["counts"] == {"done": 1, "processing": 2}
+    assert status["items"][0]["zotero_key"] == "ABCD2345"
+    queue.close()
+
+
+def test_fail_unfinished_keeps_finished_and_requeued_items(tmp_path):
+    queue = IngestQueue(str(tmp_path / "queue.sqlite"))
+    job = queue.enqueue(_entries(3))
+    ids = [row_id for row_id, _ in queue.claim(3)]
+    queue.finish(ids[0], "done", zotero_key="ABCD2345")
+    queue.retry([ids[1]], "no answer from Zotero")
+    assert queue.fail_unfinished(ids, "boom") == 1
+    assert [item["status"] for item in queue.job(job)["items"]] == ["done", "queued", "failed"]
+    queue.close()
+
+
+def _post(server, body):
+    request = urllib.request.Request(server.url + "/items", data=json.dumps(body).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"}, method="POST")
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return response.status, json.load(response)
+
+
+def test_job_accepted_before_a_restart_is_finished_after_it(tmp_path):
+    queue_path = str(tmp_path / "queue.sqlite")
+    # A batch window long enough that the first instance never processes the job
+    with IngestServer(port=0, queue_path=queue_path, window=3600, token=None) as server:
+        status_code, answer = _post(server, [ITEM])
+        assert status_code == 202
+    job = answer["job"]
+    queue = IngestQueue(queue_path)
+    assert queue.job(job)["status"] == "queued"
+    queue.close()
+
+    with IngestServer(port=0, queue_path=queue_path, window=0, token=None) as server:
+        deadline = time.monotonic() + 10
+        while server.queue.job(job)["status"] != "done" and time.monotonic() < deadline:
+            time.sleep(0.05)
+        status = server.queue.job(job)
+    assert status["status"] == "done"
+    assert status["items"][0]["filename"].startswith("LN Smith 2019 Queued")
@@ -0,0 +1,58 @@
+# test_key_allocator.py
+
+"""
+KeyAllocator hands out each citekey / note filename pair once, with the same
+a/b/c suffix on both, and treats filenames that differ only in case as the
+same file (as case-insensitive file systems do).
+"""
+
+import itertools
+
+from key_allocator import KeyAllocator, suffixes
+from vault_index import VaultIndex
+
+
+def _note(path, citekey):
+    path.write_text(f'---\ncitekey: "{citekey}"\nzotero_key: "ABCD2345"\n---\n', encoding="utf-8")
+
+
+def test_suffixes_follow_better_bibtex():
+    assert list(itertools.islice(suffixes(), 29)) == ["", *"abcdefghijklmnopqrstuvwxyz", "aa", "ab"]
+
+
+def test_clashes_get_the_same_suffix_on_both():
+    allocator = KeyAllocator()
+    pairs = [allocator.allocate("Smith2020Deep", "LN Smith 2020 Deep.md") for _ in range(3)]
+    assert pairs == [("Smith2020Deep", "LN Smith 2020 Deep.md"),
+                     ("Smith2020Deepa", "LN Smith 2020 Deep a.md"),
+                     ("Smith2020Deepb", "LN Smith 2020 Deep b.md")]
+    assert allocator.collisions == 2
+
+
+def test_filenames_differing_only_in_case_collide():
+    allocator = KeyAllocator()
+    allocator.allocate("Smith2020Deep", "LN Smith 2020 Deep.md")
+    # A different citekey, but the note would overwrite the first one on macOS/Windows
+    assert allocator.allocate("SMITH2020Deep", "LN SMITH 2020 Deep.md") == ("SMITH2020Deepa",
+                                                                            "LN SMITH 2020 Deep a.md")
+    # Its own case-folded clash resumes after the suffix taken by the other spelling
+    assert allocator.allocate("smith2020deep", "LN smith 2020 deep.md") == ("smith2020deepb",
+                                                                            "LN smith 2020 deep b.md")
+
+
+def test_a_suffix_taken_by_another_base_is_skipped():
+    allocator = KeyAllocator()
+    allocator.reserve("Other", "LN Smith 2020 Deep A.md")
+    allocator.allocate("Smith2020Deep", "LN Smith 2020 Deep.md")
+    assert allocator.allocate("Smith2020Deep", "LN Smith 2020 Deep.md") == ("Smith2020Deepb",
+                                                                            "LN Smith 2020 Deep b.md")
+
+
+def test_notes_in_the_vault_are_taken(tmp_path):
+    _note(tmp_path / "LN SMITH 2020 DEEP.md", "Smith2020DeepOld")
+    _note(tmp_path / "LN Jones 2019 Renamed By Hand.md", "Jones2019Streams")
+    allocator = KeyAllocator(VaultIndex(root=str(tmp_path), cache_path=None))
+    assert allocator.allocate("Smith2020Deep", "LN Smith 2020 Deep.md") == ("Smith2020Deepa",
+                                                                            "LN Smith 2020 Deep a.md")
+    assert allocator.allocate("Jones2019Streams", "LN Jones 2019 Streams.md") == ("Jones2019Streamsa",
+                                                                                  "LN Jones 2019 Streams a.md")
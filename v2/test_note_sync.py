@@ -0,0 +1,72 @@
+# test_note_sync.py
+
+"""
+Note re-sync replaces the generated header of a note and keeps everything
+after the "Do not edit above this line" marker exactly as the user left it.
+"""
+
+from csl_mapper import csl_to_zotero
+from dedup_index import DedupIndex
+from note_sync import MARKER, plan_updates, splice_note, split_at_marker
+from obsidian_writer import build_markdown_from_zotero
+
+OLD = f"---\ntitle: Old\n---\n\nOld citation\n\n{MARKER} -->\n"
+NEW = f"---\ntitle: New\n---\n\nNew citation\n\n{MARKER} -->\n\n# User-generated Content\n"
+USER = ("\r\n# User-generated Content\r\n\r\nMy notes.\r\n"
+        f"{MARKER} (quoted in my notes) -->\r\nno newline at the end")
+
+
+def _item(title):
+    data = csl_to_zotero({"id": "x", "type": "article-journal", "title": title,
+                          "author": [{"family": "Smith", "given": "Ada"}], "issued": {"date-parts": [[2020]]}})
+    return dict(data, key="ABCD2345", version=7)
+
+
+def test_splice_keeps_the_user_section_byte_for_byte():
+    spliced = splice_note(OLD + USER, NEW)
+    assert spliced == f"---\ntitle: New\n---\n\nNew citation\n\n{MARKER} -->\n" + USER
+
+
+def test_splice_keeps_an_empty_user_section_empty():
+    assert splice_note(OLD, NEW) == f"---\ntitle: New\n---\n\nNew citation\n\n{MARKER} -->\n"
+    assert splice_note(OLD.rstrip("\n"), NEW).endswith(f"{MARKER} -->\n")
+
+
+def test_splice_refuses_notes_without_a_marker():
+    assert splice_note("---\ntitle: Old\n---\nMy notes.\n", NEW) is None
+    assert splice_note(OLD + USER, "---\ntitle: New\n---\n") is None
+
+
+def test_plan_updates_rerenders_the_header_and_keeps_the_notes(tmp_path):
+    before = _item("Streams")
+    path = str(tmp_path / "note.md")
+    original = build_markdown_from_zotero(before, "smith2020", before["key"]) + "My notes.\r\n"
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(original)
+    dedup = DedupIndex(str(tmp_path / "dedup.sqlite"))
+    dedup.record(before, before["key"], path)
+
+    stats = {}
+    updates = list(plan_updates([_item("Streams, revised")], str(tmp_path), dedup, stats))
+    dedup.close()
+    assert len(updates) == 1 and stats == {}
+    markdown, filename, found, _ = updates[0]
+    assert (filename, found) == ("note.md", path)
+    assert 'record_title: "Streams, revised"' in markdown
+    assert 'citekey: "smith2020"' in markdown  # the note keeps its citekey
+    assert split_at_marker(markdown)[1] == split_at_marker(original)[1]
+    assert markdown.endswith("## User Notes\nMy notes.\r\n")
+
+
+def test_plan_updates_leaves_notes_with_autoupdate_off_alone(tmp_path):
+    data = _item("Streams")
+    path = str(tmp_path / "note.md")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(build_markdown_from_zotero(data, "smith2020", data["key"]).replace("autoupdate: true",
+                                                                                "autoupdate: false"))
+    dedup = DedupIndex(str(tmp_path / "dedup.sqlite"))
+    dedup.record(data, data["key"], path)
+    stats = {}
+    assert list(plan_updates([_item("Streams, revised")], str(tmp_path), dedup, stats)) == []
+    dedup.close()
+    assert stats == {"skipped": 1}
@@ -0,0 +1,65 @@
+# test_note_writer.py
+
+"""
+NoteWriter skips notes whose bytes are already on disk, notices notes edited
+outside bibnow, and never leaves temporary files behind.
+"""
+
+import json
+import os
+
+import pytest
+
+from note_writer import NoteWriter
+
+
+def _writer(tmp_path):
+    return NoteWriter(str(tmp_path / "vault"), str(tmp_path / "manifest.json"), max_workers=2)
+
+
+def test_unchanged_notes_are_not_rewritten(tmp_path):
+    writer = _writer(tmp_path)
+    path, written = writer.write("# Note\n", "a.md")
+    assert written
+    mtime = os.stat(path).st_mtime_ns
+    assert writer.write("# Note\n", "a.md") == (path, False)
+    assert os.stat(path).st_mtime_ns == mtime
+    assert (writer.written, writer.unchanged) == (1, 1)
+
+
+def test_manifest_is_kept_between_runs(tmp_path):
+    writer = _writer(tmp_path)
+    results = writer.write_many([("# A\n", "a.md"), ("# B\n", "b.md")])
+    assert [written for _, written in results] == [True, True]
+    with open(tmp_path / "manifest.json", encoding="utf-8") as f:
+        assert set(json.load(f)) == {path for path, _ in results}
+
+    writer = _writer(tmp_path)
+    assert writer.write_many([("# A\n", "a.md"), ("# B, changed\n", "b.md")])[1][1]
+    assert (writer.written, writer.unchanged) == (1, 1)
+
+
+def test_a_note_edited_outside_bibnow_is_rewritten(tmp_path):
+    writer = _writer(tmp_path)
+    path, _ = writer.write("# Note\n", "a.md")
+    writer.save_manifest()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# Edit\n")  # same size, different bytes
+    assert _writer(tmp_path).write("# Note\n", "a.md") == (path, True)
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "# Note\n"
+
+
+def test_a_failed_write_keeps_the_old_note(tmp_path, monkeypatch):
+    writer = _writer(tmp_path)
+    path, _ = writer.write("# Old\n", "a.md")
+
+    def crash(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", crash)
+    with pytest.raises(OSError):
+        writer.write("# New\n", "a.md")
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "# Old\n"
+    assert os.listdir(tmp_path / "vault") == ["a.md"]
@@ -0,0 +1,62 @@
+# test_records.py
+
+"""
+ItemRecord must give back exactly the JSON object the writer sends (same
+fields, same order), and the mirror must store items synced through records
+unchanged.
+"""
+
+import json
+
+from csl_mapper import csl_to_zotero
+from dedup_index import identifiers_for
+from fake_zotero_server import FakeZoteroServer
+from records import CreatorRecord, ItemRecord
+from synthetic_corpus import generate_corpus
+from zotero_client import ZoteroClient
+from zotero_query import LibraryMirror
+
+UNUSUAL = {
+    "itemType": "journalArticle",
+    "title": "Odd shapes",
+    "creators": [{"creatorType": "author", "firstName": "Ada", "lastName": "Smith"},
+                 {"creatorType": "editor", "name": "Editorial Board"},
+                 {"creatorType": "author", "lastName": "Okafor", "firstName": "Kim"}],  # other key order
+    "tags": [{"tag": "streams", "type": 1}],
+    "DOI": "10.1000/odd",
+    "relations": {},
+}
+
+
+def test_round_trip_gives_the_writer_payload():
+    for csl_item in generate_corpus(500, seed=3):
+        zotero_item = csl_to_zotero(csl_item)
+        record = ItemRecord.from_dict(zotero_item)
+        # send_to_zotero posts json=payload, so equal dumps mean the same request body
+        assert json.dumps(record.to_dict()) == json.dumps(zotero_item)
+        assert identifiers_for(record) == identifiers_for(zotero_item)
+
+
+def test_unusual_creators_and_tags_are_kept_as_they_are():
+    record = ItemRecord.from_dict(UNUSUAL)
+    assert json.dumps(record.to_dict()) == json.dumps(UNUSUAL)
+    assert isinstance(record.creators[0], CreatorRecord)
+    assert record.creators[2] == UNUSUAL["creators"][2]  # kept as a dict
+    assert record.tags == UNUSUAL["tags"]
+
+
+def test_mirror_stores_synced_records_unchanged(tmp_path):
+    with FakeZoteroServer() as server:
+        client = ZoteroClient("key", server.url + "/users/1", max_retries=0)
+        mirror = LibraryMirror(str(tmp_path / "mirror.sqlite"))
+        mirror.sync(client)  # empty library: sets the version the next sync starts from
+        zotero_items = [csl_to_zotero(csl_item) for csl_item in generate_corpus(60, seed=5)]
+        for start in range(0, len(zotero_items), 50):
+            status_code, _, _ = client.post_items(zotero_items[start:start + 50])
+            assert status_code == 200
+        assert mirror.sync(client)["mode"] == "incremental"
+
+        expected = {key: data for key, data in server.state.items.items()}
+        stored = {data["key"]: data for data in mirror.iter_items()}
+        mirror.close()
+    assert stored == expected
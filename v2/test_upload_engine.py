@@ -0,0 +1,74 @@
+# test_upload_engine.py
+
+"""
+ConcurrentUploader returns results in input order whatever order the chunks
+finish in, never has more than max_in_flight requests outstanding, and keeps
+to the token bucket's rate.
+"""
+
+import random
+import threading
+import time
+
+import zotero_writer
+from fake_zotero_server import FakeZoteroServer
+from upload_engine import ConcurrentUploader, TokenBucket
+from zotero_client import ZoteroClient
+
+
+class SlowSend:
+    """Stand-in for send_batch_to_zotero that answers after a random delay and counts requests in flight."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+        self.sizes = []
+        self.rng = random.Random(1)
+
+    def __call__(self, zotero_items):
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            self.sizes.append(len(zotero_items))
+            delay = self.rng.uniform(0, 0.02)
+        time.sleep(delay)
+        with self.lock:
+            self.in_flight -= 1
+        return 200, {}, [{"status": "successful", "key": item["title"].upper(), "message": ""}
+                         for item in zotero_items]
+
+
+def test_results_come_back_in_input_order():
+    send = SlowSend()
+    uploader = ConcurrentUploader(max_in_flight=3, batch_size=7, send=send,
+                                  client=ZoteroClient("key", "http://127.0.0.1:9"))
+    seen = []
+    items = [{"title": f"item{i}"} for i in range(100)]
+    results = uploader.run(iter(items), on_item=lambda i, entry, result: seen.append(i))
+    assert [entry for entry, _ in results] == items
+    assert [result["key"] for _, result in results] == [f"ITEM{i}" for i in range(100)]
+    assert sorted(seen) == list(range(100))
+    assert sorted(send.sizes) == [2] + [7] * 14
+    assert 1 < send.peak <= 3
+
+
+def test_token_bucket_limits_the_rate():
+    bucket = TokenBucket(rate=50, capacity=1)
+    started = time.monotonic()
+    waited = sum(bucket.acquire() for _ in range(6))
+    elapsed = time.monotonic() - started
+    assert waited >= 0.08 and elapsed >= 0.08  # five refills of 20 ms after the first token
+
+
+def test_upload_to_fake_server(monkeypatch):
+    with FakeZoteroServer(p429=0.2, retry_after=0, seed=3) as server:
+        client = ZoteroClient("key", server.url + "/users/1", max_retries=10, backoff_base=0)
+        monkeypatch.setattr(zotero_writer, "_client", client)
+        items = [{"itemType": "book", "title": f"Book {i}"} for i in range(120)]
+        results = ConcurrentUploader(max_in_flight=4, batch_size=25, rate=100).run(items)
+        assert all(result["status"] == "successful" for _, result in results)
+        keys = [result["key"] for _, result in results]
+        assert len(set(keys)) == 120
+        assert [server.state.items[key]["title"] for key in keys] == [item["title"] for item in items]
+        assert server.state.stats["created"] == 120
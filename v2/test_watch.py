@@ -0,0 +1,41 @@
+# test_watch.py
+
+"""
+Watch mode must survive bad input: an item that breaks the pipeline is
+reported, a dropped file with it goes to failed/, and polling goes on.
+"""
+
+import io
+import json
+
+from watch import DropDirSource, Watcher
+
+GOOD = {"id": "good", "type": "book", "title": "A well-formed book", "issued": {"date-parts": [[2020]]}}
+# Parses as CSL-JSON, but "issued" is not a date object
+MALFORMED = {"id": "bad", "type": "book", "title": "A malformed book", "issued": "2020"}
+
+
+def test_malformed_item_is_reported_and_the_watcher_goes_on(capsys):
+    watcher = Watcher([], commit=False)
+    assert watcher.handle("clipboard", io.StringIO(json.dumps(MALFORMED))) is False
+    assert "❌ clipboard:" in capsys.readouterr().out
+    assert watcher.handle("clipboard", io.StringIO(json.dumps(GOOD))) is True
+    assert watcher.processed == 1
+
+
+def test_dropped_files_are_moved_by_outcome(tmp_path):
+    drop = tmp_path / "drop"
+    source = DropDirSource(str(drop))
+    (drop / "bad.json").write_text(json.dumps(MALFORMED), encoding="utf-8")
+    (drop / "good.json").write_text(json.dumps(GOOD), encoding="utf-8")
+    (drop / "notes.txt").write_text("neither JSON nor BibTeX", encoding="utf-8")
+    watcher = Watcher([source], commit=False)
+
+    watcher.poll_once()  # files are first seen; taken once they are unchanged for a poll
+    assert sorted(p.name for p in drop.iterdir()) == ["bad.json", "good.json", "notes.txt"]
+    watcher.poll_once()
+
+    assert sorted(p.name for p in (drop / "failed").iterdir()) == ["bad.json", "notes.txt"]
+    assert [p.name for p in (drop / "done").iterdir()] == ["good.json"]
+    assert sorted(p.name for p in drop.iterdir()) == ["done", "failed"]
+    assert watcher.processed == 1
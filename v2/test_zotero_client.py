@@ -0,0 +1,76 @@
+# test_zotero_client.py
+
+"""
+Retries and backoff of ZoteroClient against fake_zotero_server: 429 and 5xx
+answers are retried up to max_retries, Retry-After and Backoff pause the
+calls that follow, and a retried write is applied once.
+"""
+
+from fake_zotero_server import FakeZoteroServer
+from zotero_client import ZoteroClient
+
+ITEM = {"itemType": "book", "title": "Retried until it went through",
+        "creators": [{"creatorType": "author", "firstName": "Ada", "lastName": "Smith"}]}
+
+
+def _client(server, **kwargs):
+    return ZoteroClient("key", server.url + "/users/1", backoff_base=0, **kwargs)
+
+
+def test_429_is_retried_until_max_retries():
+    with FakeZoteroServer(p429=1.0, retry_after=0) as server:
+        client = _client(server, max_retries=2)
+        status_code, _, stats = client.post_items([ITEM])
+        assert status_code == 429
+        assert (stats.attempts, stats.retries) == (3, 2)
+        assert server.state.stats["throttled"] == 3
+        assert server.state.stats["created"] == 0
+
+
+def test_5xx_is_retried_until_max_retries():
+    with FakeZoteroServer(p5xx=1.0) as server:
+        client = _client(server, max_retries=3)
+        response, stats, error = client.get("items")
+        assert response.status_code in (500, 502, 503) and error is None
+        assert (stats.attempts, stats.retries) == (4, 3)
+        assert server.state.stats["server_errors"] == 4
+
+
+def test_no_retry_for_other_client_errors():
+    with FakeZoteroServer() as server:
+        client = _client(server, max_retries=3)
+        status_code, _, stats = client.post_items([ITEM] * 51)  # over Zotero's 50-object limit
+        assert status_code == 413
+        assert stats.retries == 0
+
+
+def test_retried_writes_go_through_once():
+    with FakeZoteroServer(p429=0.3, p5xx=0.2, retry_after=0, seed=7) as server:
+        client = _client(server, max_retries=10)
+        retries = 0
+        for i in range(10):
+            status_code, content, stats = client.post_items([dict(ITEM, title=f"Book {i}")])
+            assert status_code == 200, content
+            retries += stats.retries
+        assert retries > 0
+        assert retries == server.state.stats["throttled"] + server.state.stats["server_errors"]
+        assert server.state.stats["created"] == 10
+        assert server.state.stats["precondition_failed"] == 0
+
+
+def test_retry_after_pauses_the_retry():
+    with FakeZoteroServer(p429=1.0, retry_after=0.2) as server:
+        client = _client(server, max_retries=1)
+        _, _, stats = client.post_items([ITEM])
+        assert stats.retries == 1
+        assert stats.backoff_seconds >= 0.15
+
+
+def test_backoff_header_pauses_the_next_call():
+    with FakeZoteroServer(pbackoff=1.0, backoff=0.2) as server:
+        client = _client(server, max_retries=0)
+        response, stats, _ = client.get("items")
+        assert response.status_code == 200 and stats.backoff_seconds == 0
+        response, stats, _ = client.get("items")
+        assert response.status_code == 200
+        assert stats.backoff_seconds >= 0.15
@@ -0,0 +1,61 @@
+# test_zotero_query.py
+
+"""
+Library sync against fake_zotero_server: items created outside bibnow must
+reach the dedup index, so the pipeline does not upload them a second time.
+"""
+
+import json
+
+from csl_mapper import csl_to_zotero
+from dedup_index import DedupIndex
+from fake_zotero_server import FakeZoteroServer
+from zotero_client import ZoteroClient
+from zotero_query import LibraryMirror, populate_dedup_index
+
+IN_LIBRARY = {"id": "lib", "type": "article-journal", "title": "Already in the library", "DOI": "10.1000/sync.1",
+              "author": [{"family": "Okafor", "given": "Kim"}], "issued": {"date-parts": [[2021]]}}
+NEW = {"id": "new", "type": "book", "title": "Not in the library yet", "ISBN": "9780306406157",
+       "author": [{"family": "Smith", "given": "Ada"}], "issued": {"date-parts": [[2019]]}}
+
+
+def _add_to_library(server, csl_item):
+    """Create an item the way Zotero desktop would: not through bibnow."""
+    client = ZoteroClient("key", server.url + "/users/1", max_retries=0)
+    _, content, _ = client.post_items([csl_to_zotero(csl_item)])
+    return content["successful"]["0"]["key"]
+
+
+def test_synced_library_item_is_skipped_as_duplicate(tmp_path, run_pipeline):
+    input_path = tmp_path / "items.json"
+    input_path.write_text(json.dumps([IN_LIBRARY, NEW]), encoding="utf-8")
+
+    with FakeZoteroServer() as server:
+        library_key = _add_to_library(server, IN_LIBRARY)
+        run = run_pipeline(["--commit", "--batch", "--sync", "--input", str(input_path)], server)
+        assert run.returncode == 0, run.stdout + run.stderr
+        assert "1 library item(s) added to the dedup index" in run.stdout
+        assert f"Already in Zotero (doi match), not uploading again. Zotero Key: {library_key}" in run.stdout
+        assert server.state.stats["created"] == 2  # the library item, and only NEW from the run
+    notes = sorted(p.read_text(encoding="utf-8") for p in (tmp_path / "vault").iterdir())
+    assert len(notes) == 2 and any(library_key in note for note in notes)
+
+
+def test_populate_adds_only_items_changed_since_the_last_call(tmp_path):
+    with FakeZoteroServer() as server:
+        client = ZoteroClient("key", server.url + "/users/1", max_retries=0)
+        mirror = LibraryMirror(str(tmp_path / "mirror.sqlite"))
+        dedup = DedupIndex(str(tmp_path / "dedup.sqlite"))
+        first_key = _add_to_library(server, IN_LIBRARY)
+        mirror.sync(client)
+        assert populate_dedup_index(mirror, dedup) == 1
+        assert populate_dedup_index(mirror, dedup) == 0
+        assert dedup.seeded_version == mirror.library_version
+
+        second_key = _add_to_library(server, NEW)
+        mirror.sync(client)
+        assert populate_dedup_index(mirror, dedup) == 1
+        assert dedup.lookup(csl_to_zotero(IN_LIBRARY))["zotero_key"] == first_key
+        assert dedup.lookup(csl_to_zotero(NEW))["zotero_key"] == second_key
+        mirror.close()
+        dedup.close()
@@ -0,0 +1,45 @@
+# test_zotero_writer.py
+
+"""
+Writes whose answer is lost: the client's retry reuses the write token, Zotero
+answers 412, and the items must count as created (keys looked up), not failed.
+"""
+
+import os
+
+import pipeline
+import zotero_writer
+from fake_zotero_server import FakeZoteroServer
+from zotero_client import ZoteroClient
+from zotero_query import LibraryMirror
+from zotero_writer import send_batch_to_zotero, split_batch_response
+
+ITEM = {"id": "lost", "type": "article-journal", "title": "An answer lost on the way", "DOI": "10.1000/lost.1",
+        "author": [{"family": "Okafor", "given": "Kim"}], "issued": {"date-parts": [[2021]]}}
+
+
+def test_412_means_committed_not_failed():
+    results = split_batch_response(412, "Write token already used", 2)
+    assert [r["status"] for r in results] == ["committed", "committed"]
+    assert all(r["key"] is None for r in results)
+
+
+def test_retry_after_lost_answer_resolves_the_created_key(tmp_path, monkeypatch):
+    # Every write is stored and its answer dropped; the retry's 412 is answered
+    with FakeZoteroServer(plost=1.0) as server:
+        client = ZoteroClient("key", server.url + "/users/1", max_retries=1, backoff_base=0)
+        monkeypatch.setattr(zotero_writer, "_client", client)
+        monkeypatch.setattr(pipeline, "LibraryMirror", lambda: LibraryMirror(str(tmp_path / "mirror.sqlite")))
+
+        status_code, _, results = send_batch_to_zotero([pipeline._prepare(ITEM)[0]])
+        assert status_code == 412 and results[0]["status"] == "committed"
+        assert client.last_stats.retries == 1
+
+        # Through the pipeline without a journal: the note gets the key of the item Zotero created
+        pipeline.commit_items_batched([dict(ITEM, id="lost2", DOI="10.1000/lost.2")], journal=None)
+        keys = sorted(server.state.items)
+    assert server.state.stats["created"] == 2
+    lost_key = next(key for key in keys if server.state.items[key].get("DOI") == "10.1000/lost.2")
+    note = os.path.join(os.environ["OBSIDIAN_VAULT_PATH"], "LN Okafor 2021 An Answer Lost On.md")
+    with open(note, encoding="utf-8") as f:
+        assert lost_key in f.read()
@@ -0,0 +1,139 @@
+# upload_engine.py
+
+"""
+Concurrent upload engine for Zotero batch writes.
+
+Mapped items are grouped into fixed chunks (in input order, so which items
+travel together is always the same), and the chunks are POSTed by a small
+thread pool. A token bucket shared by all workers caps the request rate, and
+at most `max_in_flight` requests are outstanding at any time.
+
+Results are handed to `on_item` on the calling thread as soon as a chunk
+completes (so notes can be written while other uploads are still running),
+and `run()` returns every result in input order.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from zotero_writer import send_batch_to_zotero, chunk_items, get_client, ZOTERO_MAX_BATCH_SIZE
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Parameters:
+        rate (float): Tokens added per second (sustained requests per second).
+        capacity (float): Maximum burst size; defaults to max(1, rate).
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1.0):
+        """
+        Block until `tokens` are available, then take them.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                shortfall = (tokens - self._tokens) / self.rate
+            time.sleep(shortfall)
+            waited += shortfall
+
+
+class ConcurrentUploader:
+    """
+    Upload prepared items with bounded parallelism and a global rate limit.
+
+    Parameters:
+        max_in_flight (int): Number of POSTs allowed to run at once.
+        rate (float): Requests per second across all workers (None = unlimited).
+        batch_size (int): Items per POST (max 50).
+        send (callable): Function taking a list of Zotero item dicts and returning
+                         (status_code, response, per-item results), as
+                         zotero_writer.send_batch_to_zotero does.
+        client (ZoteroClient): Client `send` uses, for per-call stats (default: the
+                               shared get_client(), with a pool of max_in_flight).
+    """
+
+    def __init__(self, max_in_flight=4, rate=None, batch_size=ZOTERO_MAX_BATCH_SIZE,
+                 send=send_batch_to_zotero, client=None):
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.limiter = TokenBucket(rate, capacity=self.max_in_flight) if rate else None
+        self.batch_size = batch_size
+        self.send = send
+        self.client = client
+
+    def _upload_chunk(self, zotero_items):
+        waited = self.limiter.acquire() if self.limiter else 0.0
+        status_code, response, results = self.send(zotero_items)
+        stats = self.client.last_stats
+        return status_code, results, stats, waited
+
+    def run(self, items, zotero_item=lambda entry: entry, on_item=None, on_chunk=None, chunker=None):
+        """
+        Upload `items` (any iterable) and return their results in input order.
+
+        Parameters:
+            items: Iterable of prepared entries (e.g. (zotero_item, citekey, filename)).
+            zotero_item (callable): Extracts the Zotero item dict from an entry.
+            on_item (callable): on_item(index, entry, result), called on this thread
+                                as soon as the entry's chunk has been uploaded.
+            on_chunk (callable): on_chunk(status_code, size, CallStats, rate_wait_seconds),
+                                 called once per completed chunk.
+            chunker (callable): Optional replacement for fixed-size chunking; receives an
+                                iterator of (index, entry, zotero_item) and yields lists of them.
+
+        Returns:
+            list: One (entry, result) pair per input entry, in input order. `result` is
+                  a dict as produced by zotero_writer.split_batch_response.
+        """
+        if self.client is None:
+            # Created here, before any worker starts, with a connection per request in flight
+            self.client = get_client(self.max_in_flight)
+        indexed = ((i, entry, zotero_item(entry)) for i, entry in enumerate(items))
+        chunks = chunker(indexed) if chunker else chunk_items(indexed, self.batch_size)
+        ordered = {}
+        pending = {}
+
+        def drain(done):
+            # Handle simultaneously finished chunks in input order
+            for future in sorted(done, key=lambda f: pending[f][0][0]):
+                chunk = pending.pop(future)
+                status_code, results, stats, waited = future.result()
+                if on_chunk:
+                    on_chunk(status_code, len(chunk), stats, waited)
+                for (i, entry, _), result in zip(chunk, results):
+                    ordered[i] = (entry, result)
+                    if on_item:
+                        on_item(i, entry, result)
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            for chunk in chunks:
+                if len(pending) >= self.max_in_flight:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    drain(done)
+                pending[pool.submit(self._upload_chunk, [z for _, _, z in chunk])] = chunk
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                drain(done)
+
+        return [ordered[i] for i in sorted(ordered)]
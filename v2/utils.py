@@ -0,0 +1,16 @@
+# utils.py
+
+"""
+Small helpers shared by the command-line entry points.
+"""
+
+
+def option_value(argv, name, default=None, cast=str):
+    """
+    Return the value following `name` in argv (e.g. `--batch-size 25`), or default.
+    """
+    if name in argv:
+        i = argv.index(name)
+        if i + 1 < len(argv):
+            return cast(argv[i + 1])
+    return default
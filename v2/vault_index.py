@@ -0,0 +1,222 @@
+# vault_index.py
+
+# Usage:
+#   python3 vault_index.py              → Refresh the index and show what it holds
+#   python3 vault_index.py find KEY     → Find a note by citekey or Zotero key
+
+"""
+Index of the bibnow notes in the Obsidian vault, built from front-matter only.
+
+Every `LN *.md` file under OUTPUT_DIR (subfolders included, so notes the user
+moved are still found) is opened and read only up to the end of its YAML
+front-matter block. The citekey and Zotero key found there are cached in
+VAULT_INDEX_PATH keyed by (path, mtime, size); later refreshes only stat()
+the vault and re-read files that were added or changed. Reads run on a
+thread pool.
+
+Lookups are dictionary / set probes:
+
+    vault = VaultIndex()
+    vault.path_for_key("ABCD1234")      # → note path or None
+    vault.path_for_citekey("Smith2020")
+    vault.has_citekey("Smith2020")      # O(1) collision checks
+    vault.has_filename("LN Smith 2020 Title.md")
+"""
+
+import json
+import os
+import re
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from obsidian_writer_config import OUTPUT_DIR, FILENAME_PREFIX, VAULT_INDEX_PATH, VAULT_SCAN_WORKERS
+
+FRONT_MATTER_LIMIT = 64 * 1024  # never read further than this looking for the closing '---'
+_FRONT_FIELD = re.compile(r'^(citekey|zotero_key|autoupdate):[ \t]*"?(.*?)"?[ \t]*\r?$', re.MULTILINE)
+_SKIP_DIRS = (".obsidian", ".trash", ".git")
+
+
+def front_matter_fields(text):
+    """Return {"citekey", "zotero_key", "autoupdate"} values found in a note's front-matter."""
+    if not text.startswith("---"):
+        return {}
+    end = text.find("\n---", 3)
+    block = text[:end] if end != -1 else ""
+    fields = {}
+    for name, value in _FRONT_FIELD.findall(block):
+        fields.setdefault(name, value)
+    return fields
+
+
+def read_front_matter(path):
+    """Read a note up to the end of its front-matter block (not the body)."""
+    lines = []
+    size = 0
+    with open(path, encoding="utf-8", errors="replace") as f:
+        first = f.readline()
+        if first.rstrip("\r\n") != "---":
+            return ""
+        lines.append(first)
+        for line in f:
+            lines.append(line)
+            size += len(line)
+            if line.rstrip("\r\n") == "---" or size > FRONT_MATTER_LIMIT:
+                break
+    return "".join(lines)
+
+
+def _read_entry(path):
+    fields = front_matter_fields(read_front_matter(path))
+    return {"citekey": fields.get("citekey") or None, "zotero_key": fields.get("zotero_key") or None}
+
+
+class VaultIndex:
+    """
+    Cached citekey / Zotero key → note path index of the vault.
+
+    Parameters:
+        root (str): Vault directory to scan.
+        cache_path (str): JSON cache of per-file front-matter (None = no cache).
+        prefix (str): Filename prefix of bibnow notes.
+        workers (int): Threads used to read changed files.
+    """
+
+    def __init__(self, root=OUTPUT_DIR, cache_path=VAULT_INDEX_PATH, prefix=FILENAME_PREFIX,
+                 workers=VAULT_SCAN_WORKERS):
+        self.root = root
+        self.cache_path = cache_path
+        self.prefix = prefix
+        self.workers = max(1, workers)
+        self._files = {}       # path -> {"mtime_ns", "size", "citekey", "zotero_key"}
+        self._by_citekey = {}
+        self._by_key = {}
+        self._filenames = set()
+        self._loaded = False
+        self.read_count = 0     # files whose front-matter was read by the last refresh
+
+    # --- building ---
+
+    def _scan(self):
+        """Yield (path, stat) for every note file under root."""
+        stack = [self.root]
+        while stack:
+            try:
+                entries = list(os.scandir(stack.pop()))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in _SKIP_DIRS:
+                        stack.append(entry.path)
+                elif entry.name.startswith(self.prefix) and entry.name.endswith(".md"):
+                    yield entry.path, entry.stat()
+
+    def _load_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        return cache.get("files", {}) if cache.get("root") == os.path.abspath(self.root) else {}
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.cache_path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".vault-index-", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"root": os.path.abspath(self.root), "files": self._files}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+
+    def refresh(self):
+        """
+        Bring the index up to date with the vault, re-reading only new or
+        changed files. Returns the number of files read.
+        """
+        cached = self._load_cache() if not self._loaded else self._files
+        files = {}
+        stale = []
+        for path, st in self._scan():
+            entry = cached.get(path)
+            if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+                files[path] = entry
+            else:
+                files[path] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+                stale.append(path)
+
+        if stale:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                for path, fields in zip(stale, pool.map(_read_entry, stale)):
+                    files[path].update(fields)
+
+        changed = bool(stale) or len(files) != len(cached)
+        self._files = files
+        self._rebuild()
+        self._loaded = True
+        self.read_count = len(stale)
+        if changed:
+            self._save_cache()
+        return len(stale)
+
+    def _rebuild(self):
+        self._by_citekey = {}
+        self._by_key = {}
+        self._filenames = set()
+        for path in sorted(self._files):
+            entry = self._files[path]
+            if entry.get("citekey"):
+                self._by_citekey.setdefault(entry["citekey"], path)
+            if entry.get("zotero_key"):
+                self._by_key.setdefault(entry["zotero_key"], path)
+            self._filenames.add(os.path.basename(path).casefold())
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.refresh()
+
+    def add(self, path, citekey=None, zotero_key=None):
+        """Register a note written during this run without rescanning the vault."""
+        self._ensure_loaded()
+        if citekey:
+            self._by_citekey.setdefault(citekey, path)
+        if zotero_key:
+            self._by_key.setdefault(zotero_key, path)
+        self._filenames.add(os.path.basename(path).casefold())
+
+    # --- lookups ---
+
+    def path_for_key(self, zotero_key):
+        self._ensure_loaded()
+        return self._by_key.get(zotero_key)
+
+    def path_for_citekey(self, citekey):
+        self._ensure_loaded()
+        return self._by_citekey.get(citekey)
+
+    def has_citekey(self, citekey):
+        self._ensure_loaded()
+        return citekey in self._by_citekey
+
+    def has_filename(self, filename):
+        """Case-insensitive, since vaults often live on case-insensitive file systems."""
+        self._ensure_loaded()
+        return os.path.basename(filename).casefold() in self._filenames
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._files)
+
+
+if __name__ == "__main__":
+    vault = VaultIndex()
+    read = vault.refresh()
+    if len(sys.argv) > 2 and sys.argv[1] == "find":
+        wanted = sys.argv[2]
+        path = vault.path_for_citekey(wanted) or vault.path_for_key(wanted)
+        print(f"📄 {path}" if path else f"❌ No note found for {wanted}")
+    else:
+        print(f"🗂️ Vault index: {len(vault)} note(s) in {vault.root}, {read} read this time.")
@@ -0,0 +1,303 @@
+# watch.py
+
+# Usage:
+#   python3 watch.py                      → Dry-run every new clipboard / input.txt content
+#   python3 watch.py --commit             → Upload it to Zotero and write the notes
+#   python3 watch.py --commit --dir DROP  → Also process CSL / BibTeX files dropped into DROP
+#                                           (moved to DROP/done or DROP/failed afterwards)
+#   Options: --no-clipboard, --file PATH (default input.txt; --file "" to disable),
+#            --interval SECONDS (default 1), --batch-size N
+#   Stop with Ctrl-C.
+
+"""
+Long-running watch mode: one warm process that picks up new citations as they
+appear, instead of one full interpreter start per item.
+
+Sources are polled cheaply:
+- clipboard: the text is read and compared by hash with the last seen text;
+  only new CSL-JSON or BibTeX is processed. It is not mirrored to input.txt,
+  which is watched as a source of its own, so the item would come in twice;
+- input file: a stat() per poll, and the contents are hashed only when the
+  mtime or size changed;
+- drop directory: new *.json / *.ndjson / *.txt / *.bib files are processed once their
+  size and mtime have stayed the same for one poll (so half-written files are
+  not read), then moved to done/ or failed/.
+
+Content that was already on the clipboard or in input.txt when the watcher
+started is not processed. Files already in the drop directory are.
+
+Everything expensive is set up once and reused for every item: the mapping
+plans, the compiled note template, the vault index and key allocator, the
+dedup index, the commit journal (compacted after each item, so it stays small)
+and the pooled HTTP session (opened at start).
+After that, an item costs about one Zotero round trip.
+
+Polling instead of inotify keeps this dependency-free and working on Termux
+and shared storage.
+"""
+
+import hashlib
+import io
+import os
+import sys
+import time
+
+from config import DEDUP_INDEX_PATH, BIBNOW_DATA_DIR, ZOTERO_API_URL, require_credentials
+from clipboard_loader import detect_platform, get_clipboard_text, _looks_like_input, _mirror_to_file
+from csl_stream import iter_csl_items
+from csl_mapper import CSL_TO_ZOTERO_TYPE, get_mapping_plan
+from dedup_index import DedupIndex
+from batch_journal import BatchJournal
+from key_allocator import KeyAllocator
+from obsidian_writer import TEMPLATES
+from vault_index import VaultIndex
+from zotero_writer import get_client, ZOTERO_MAX_BATCH_SIZE
+from pipeline import commit_items_batched, dry_run
+from utils import option_value
+
+WATCH_JOURNAL_PATH = os.path.join(BIBNOW_DATA_DIR, "watch_journal.jsonl")
+DROP_SUFFIXES = (".json", ".ndjson", ".txt", ".bib")
+
+
+def _digest(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+class ClipboardSource:
+    """
+    Yields clipboard text when it changes to something that looks like CSL-JSON or BibTeX.
+    `mirror_path` also copies it to a file; never to a file a FileSource watches.
+    """
+
+    label = "clipboard"
+
+    def __init__(self, mirror_path=None):
+        self.platform = detect_platform()
+        self.mirror_path = mirror_path
+        self.available = True
+        try:
+            text = get_clipboard_text(self.platform)
+        except Exception as e:
+            print(f"⚠️ Clipboard unavailable ({e}); not watching it.")
+            self.available = False
+            text = None
+        self._last = _digest(text) if text else None  # ignore what is already on the clipboard
+
+    def _read(self):
+        try:
+            return get_clipboard_text(self.platform)
+        except Exception as e:
+            print(f"⚠️ Clipboard read failed: {e}")
+            return None
+
+    def poll(self):
+        if not self.available:
+            return
+        text = self._read()
+        if not text:
+            return
+        digest = _digest(text)
+        if digest == self._last:
+            return
+        self._last = digest
+        if _looks_like_input(text):
+            if self.mirror_path:
+                _mirror_to_file(text, self.mirror_path)
+            yield self.label, io.StringIO(text)
+
+
+class FileSource:
+    """Yields the file's contents whenever they change."""
+
+    def __init__(self, path):
+        self.path = path
+        self.label = path
+        self._stat = None
+        self._last = None
+        self._changed()  # take the current contents as the baseline
+
+    def _changed(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self._stat = None
+            return None
+        signature = (st.st_mtime_ns, st.st_size)
+        if signature == self._stat:
+            return None
+        self._stat = signature
+        with open(self.path, encoding="utf-8") as f:
+            text = f.read()
+        digest = _digest(text)
+        if digest == self._last:
+            return None  # touched, or rewritten with the same content
+        self._last = digest
+        return text
+
+    def poll(self):
+        text = self._changed()
+        if text and text.strip():
+            yield self.label, io.StringIO(text)
+
+
+class DropDirSource:
+    """Yields new CSL / BibTeX files in a directory once they have stopped changing."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.label = directory
+        self._seen = {}   # name -> (mtime_ns, size) at the previous poll
+        self.results = {}  # path -> whether the watcher could process it
+        os.makedirs(directory, exist_ok=True)
+
+    def poll(self):
+        current = {}
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(DROP_SUFFIXES) and not entry.name.startswith("."):
+                st = entry.stat()
+                current[entry.name] = (st.st_mtime_ns, st.st_size)
+        ready = sorted(name for name, sig in current.items() if self._seen.get(name) == sig)
+        self._seen = {name: sig for name, sig in current.items() if name not in ready}
+        for name in ready:
+            path = os.path.join(self.directory, name)
+            with open(path, encoding="utf-8") as stream:
+                yield path, stream
+            # closed before it is moved; the watcher has recorded the outcome by now
+            self.finish(path, self.results.pop(path, False))
+
+    def finish(self, path, ok):
+        """Move a processed file out of the way."""
+        target = os.path.join(self.directory, "done" if ok else "failed")
+        os.makedirs(target, exist_ok=True)
+        os.replace(path, os.path.join(target, os.path.basename(path)))
+
+
+class Watcher:
+    """
+    Poll sources and push new items through the (already warm) pipeline.
+
+    Parameters:
+        sources (list): ClipboardSource / FileSource / DropDirSource objects.
+        commit (bool): Upload and write notes (True) or dry-run (False).
+        interval (float): Seconds between polls.
+        batch_size (int): Items per Zotero request.
+    """
+
+    def __init__(self, sources, commit=False, interval=1.0, batch_size=ZOTERO_MAX_BATCH_SIZE):
+        self.sources = sources
+        self.commit = commit
+        self.interval = interval
+        self.batch_size = batch_size
+        self.allocator = KeyAllocator(VaultIndex())
+        self.dedup = None
+        self.journal = None
+        if commit:
+            require_credentials()
+            self.dedup = DedupIndex(DEDUP_INDEX_PATH)
+            # Own journal, so a pipeline run's journal is never truncated. Only requests left
+            # unanswered by the last session are carried over (see handle)
+            self.journal = BatchJournal(WATCH_JOURNAL_PATH, resume=True)
+            self.journal.compact()
+        self.processed = 0
+
+    def warm_up(self):
+        """Do the one-time work now, so the first item is as fast as the rest."""
+        for item_type in set(CSL_TO_ZOTERO_TYPE.values()) | {"document"}:
+            get_mapping_plan(item_type)
+        TEMPLATES.get("obsidian_note")
+        self.allocator.vault.refresh()
+        if self.commit:
+            # Opens the pooled keep-alive connection (and checks the key) before the first item
+            response, _stats, error = get_client().get(f"{ZOTERO_API_URL}/keys/current")
+            if response is None:
+                print(f"⚠️ Could not reach Zotero yet: {error}")
+
+    def handle(self, label, stream):
+        """
+        Process one new piece of content. Returns True if it was processed
+        without error. Errors are reported with the label and never stop the
+        watcher; a dropped file that fails goes to failed/.
+        """
+        try:
+            items = list(iter_csl_items(stream))
+        except ValueError as e:
+            print(f"⚠️ {label}: {e}")
+            return False
+        if not items:
+            return True
+        started = time.perf_counter()
+        print(f"\n📥 {len(items)} new item(s) from {label}")
+        try:
+            if self.commit:
+                commit_items_batched(items, self.batch_size, 1, self.dedup, self.journal, self.allocator)
+            else:
+                dry_run(items, 1, self.dedup, self.allocator)
+        except Exception as e:
+            # e.g. a CSL item of an unexpected shape, a note that cannot be written, a locked database
+            print(f"❌ {label}: {type(e).__name__}: {e}")
+            return False
+        finally:
+            if self.journal is not None:
+                # Finished items are in the dedup index; keep only unanswered requests, so the
+                # journal does not grow for as long as the watcher runs
+                self.journal.compact()
+        self.processed += len(items)
+        print(f"⏱️ Done in {time.perf_counter() - started:.2f}s")
+        return True
+
+    def poll_once(self):
+        for source in self.sources:
+            try:
+                for label, stream in source.poll():
+                    ok = self.handle(label, stream)
+                    if isinstance(source, DropDirSource):
+                        source.results[label] = ok
+            except (OSError, ValueError) as e:
+                # An unreadable input file or drop directory; polled again next time
+                print(f"⚠️ {source.label}: {e}")
+
+    def run(self):
+        self.warm_up()
+        print(f"👀 Watching {', '.join(s.label for s in self.sources)} "
+              f"({'commit' if self.commit else 'dry-run'}, every {self.interval:g}s). Ctrl-C to stop.")
+        try:
+            while True:
+                self.poll_once()
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            print(f"\n👋 Stopped after {self.processed} item(s).")
+        finally:
+            self.close()
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
+        if self.dedup is not None:
+            self.dedup.close()
+
+
+def main(argv):
+    sources = []
+    if "--no-clipboard" not in argv:
+        sources.append(ClipboardSource())
+    input_path = option_value(argv, "--file", "input.txt")
+    if input_path:
+        sources.append(FileSource(input_path))
+    drop_dir = option_value(argv, "--dir")
+    if drop_dir:
+        sources.append(DropDirSource(drop_dir))
+    if not sources:
+        print("❌ Nothing to watch.")
+        return
+
+    watcher = Watcher(
+        sources,
+        commit="--commit" in argv,
+        interval=option_value(argv, "--interval", 1.0, float),
+        batch_size=option_value(argv, "--batch-size", ZOTERO_MAX_BATCH_SIZE, int),
+    )
+    watcher.run()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
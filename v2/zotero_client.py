@@ -0,0 +1,220 @@
+# zotero_client.py
+
+"""
+Long-lived HTTP client for the Zotero web API.
+
+- One pooled, keep-alive `requests.Session` is shared by every call, so a batch
+  of uploads reuses the same TCP/TLS connection instead of reconnecting per item.
+- Transient failures (connection errors, timeouts, 429, 5xx) are retried with
+  jittered exponential backoff.
+- Zotero's `Backoff` and `Retry-After` headers pause *all* calls made through the
+  client, not just the one that received the header.
+- Every call reports how many retries it needed and how long it waited (CallStats).
+- Streamed request bodies (file-like `data` with seek) are rewound before a retry.
+
+See: https://www.zotero.org/support/dev/web_api/v3/basics (rate limiting)
+"""
+
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import METRICS
+
+# Responses worth retrying: rate limiting and temporary server trouble
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class CallStats:
+    """Retry/backoff accounting for a single client call."""
+    attempts: int = 0
+    retries: int = 0
+    backoff_seconds: float = 0.0
+
+    def summary(self) -> str:
+        return f"{self.retries} retries, {self.backoff_seconds:.1f}s backoff"
+
+
+class ZoteroClient:
+    """
+    Shared session for Zotero API calls with retry, backoff and connection pooling.
+
+    Parameters:
+        api_key (str): Zotero API key sent with every request.
+        api_base (str): Library base URL, e.g. https://api.zotero.org/users/<id>.
+        timeout (float or tuple): requests timeout, (connect, read) in seconds.
+        max_retries (int): Retries after the first attempt for transient failures.
+        backoff_base (float): First retry delay in seconds; doubles on each retry.
+        backoff_cap (float): Upper bound for a single computed retry delay.
+        pool_size (int): Connections kept alive per host.
+    """
+
+    def __init__(self, api_key, api_base, timeout=(5, 30), max_retries=5,
+                 backoff_base=1.0, backoff_cap=60.0, pool_size=10):
+        self.api_base = api_base.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+        self.session = requests.Session()
+        self.pool_size = 0
+        self.resize_pool(pool_size)
+        self.session.headers.update({
+            "Zotero-API-Key": api_key or "",
+            "Zotero-API-Version": "3",
+        })
+
+        # Global pause shared by all threads using this client
+        self._pause_lock = threading.Lock()
+        self._pause_until = 0.0
+        self._local = threading.local()
+
+    def resize_pool(self, pool_size):
+        """
+        Keep up to `pool_size` connections per host alive. Call it before
+        starting more threads than the pool holds; connections already
+        open in the old pool are dropped.
+        """
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.pool_size = pool_size
+
+    # --- backoff bookkeeping ---
+
+    @property
+    def last_stats(self) -> CallStats:
+        """CallStats of the most recent call made from the current thread."""
+        return getattr(self._local, "stats", CallStats())
+
+    def pause(self, seconds: float):
+        """Hold every call made through this client for at least `seconds`."""
+        with self._pause_lock:
+            self._pause_until = max(self._pause_until, time.monotonic() + seconds)
+
+    def _wait_for_pause(self, stats: CallStats):
+        with self._pause_lock:
+            remaining = self._pause_until - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+            stats.backoff_seconds += remaining
+            METRICS.add("http.backoff_seconds", remaining)
+
+    def _retry_delay(self, attempt: int) -> float:
+        # "Full jitter": uniform in [0, min(cap, base * 2^attempt)]
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    @staticmethod
+    def _header_seconds(response, name):
+        value = response.headers.get(name)
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return None
+
+    # --- requests ---
+
+    def url(self, path: str) -> str:
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return f"{self.api_base}/{path.lstrip('/')}"
+
+    def request(self, method, path, **kwargs):
+        """
+        Send a request, retrying transient failures.
+
+        Returns:
+            tuple: (requests.Response or None, CallStats, exception or None)
+                   The response is None only if every attempt raised.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        stats = CallStats()
+        self._local.stats = stats
+        url = self.url(path)
+        error = None
+
+        body = kwargs.get("data")
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_pause(stats)
+            if attempt and hasattr(body, "seek"):
+                body.seek(0)  # a streamed body was (partly) consumed by the failed attempt
+            stats.attempts += 1
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+                error = None
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                response, error = None, e
+            except requests.exceptions.RequestException as e:
+                return None, stats, e
+            finally:
+                METRICS.observe(f"http.{method}", time.perf_counter() - started)
+            METRICS.add(f"http.status.{response.status_code if response is not None else 'error'}")
+
+            if response is not None:
+                # Backoff may accompany any response, including successes
+                backoff = self._header_seconds(response, "Backoff")
+                if backoff:
+                    self.pause(backoff)
+                if response.status_code not in RETRY_STATUSES:
+                    return response, stats, None
+
+            if attempt == self.max_retries:
+                break
+
+            delay = self._retry_delay(attempt)
+            if response is not None:
+                retry_after = self._header_seconds(response, "Retry-After")
+                if retry_after is not None:
+                    self.pause(retry_after)
+                    delay = 0.0
+            stats.retries += 1
+            METRICS.add("http.retries")
+            if delay:
+                time.sleep(delay)
+                stats.backoff_seconds += delay
+
+        return response, stats, error
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post_items(self, items, write_token=None):
+        """
+        POST one or more Zotero item dicts to `<api_base>/items`.
+
+        A Zotero-Write-Token is always sent so that a retried POST can never
+        create the same items twice.
+
+        Returns:
+            tuple: (status_code, response JSON or text, CallStats)
+                   status_code is 0 on network/connection failure.
+        """
+        payload = items if isinstance(items, list) else [items]
+        headers = {
+            "Content-Type": "application/json",
+            "Zotero-Write-Token": write_token or uuid.uuid4().hex,
+        }
+        response, stats, error = self.request("POST", "items", headers=headers, json=payload)
+        if response is None:
+            return 0, {"error": "Network or connection error", "exception": str(error)}, stats
+
+        # Attempt to parse response JSON or return raw text if malformed
+        try:
+            content = response.json()
+        except (json.JSONDecodeError, ValueError):
+            content = response.text
+        return response.status_code, content, stats
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,253 @@
+# zotero_query.py
+
+# Usage:
+#   python3 zotero_query.py sync     → Pull the library into the local mirror (first run)
+#                                      or download only what changed since the last sync, and
+#                                      add new library items to the dedup index (--no-dedup: don't)
+#   python3 zotero_query.py stats    → Show what the local mirror holds
+
+"""
+Incremental local mirror of the Zotero library.
+
+The first sync pulls every item with parallel paginated requests. Later syncs
+use Zotero's version-based sync: `?since=<version>&format=versions` lists only
+the items changed since the last sync, those are fetched 50 at a time, and
+`/deleted?since=<version>` removes what was deleted. The library version
+(`Last-Modified-Version`) is stored with the mirror.
+
+Everything that only reads the library (dedup, citekey collision checks, note
+regeneration) can then run offline against the SQLite mirror. After a sync,
+the items it brought in are added to the dedup index (populate_dedup_index),
+so items created outside bibnow are not uploaded a second time.
+
+See: https://www.zotero.org/support/dev/web_api/v3/syncing
+"""
+
+import json
+import os
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from config import BIBNOW_DATA_DIR, DEDUP_INDEX_PATH
+from dedup_index import DedupIndex
+from records import ItemRecord
+from zotero_writer import get_client
+
+MIRROR_PATH = os.path.join(BIBNOW_DATA_DIR, "library_mirror.sqlite")
+PAGE_SIZE = 100      # Zotero's maximum `limit`
+KEYS_PER_REQUEST = 50  # Zotero's maximum number of keys in `itemKey`
+
+
+class LibraryMirror:
+    """
+    SQLite copy of a Zotero library's items, kept current by version.
+
+    Parameters:
+        path (str): Database file; parent directories are created as needed.
+    """
+
+    def __init__(self, path=MIRROR_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            """CREATE TABLE IF NOT EXISTS items (
+                   key TEXT PRIMARY KEY,
+                   version INTEGER NOT NULL,
+                   item_type TEXT,
+                   data TEXT NOT NULL
+               );
+               CREATE INDEX IF NOT EXISTS items_version ON items (version);
+               CREATE TABLE IF NOT EXISTS meta (
+                   name TEXT PRIMARY KEY,
+                   value TEXT
+               );"""
+        )
+        self.conn.commit()
+
+    # --- stored state ---
+
+    @property
+    def library_version(self):
+        """Library version the mirror is current to, or None before the first sync."""
+        row = self.conn.execute("SELECT value FROM meta WHERE name = 'library_version'").fetchone()
+        return int(row[0]) if row else None
+
+    def _store(self, items, deleted=(), library_version=None):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO items (key, version, item_type, data) VALUES (?, ?, ?, ?)",
+                ((d["key"], d.get("version", 0), d.get("itemType"), json.dumps(_as_dict(d))) for d in items),
+            )
+            if deleted:
+                self.conn.executemany("DELETE FROM items WHERE key = ?", [(k,) for k in deleted])
+            if library_version is not None:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO meta (name, value) VALUES ('library_version', ?)",
+                    (str(library_version),),
+                )
+
+    # --- queries ---
+
+    def get(self, key):
+        """Return the item's Zotero `data` dict, or None."""
+        row = self.conn.execute("SELECT data FROM items WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def iter_items(self, item_type=None):
+        """Yield item `data` dicts, optionally only those of one item type."""
+        if item_type:
+            rows = self.conn.execute("SELECT data FROM items WHERE item_type = ?", (item_type,))
+        else:
+            rows = self.conn.execute("SELECT data FROM items")
+        for (data,) in rows:
+            yield json.loads(data)
+
+    def changed_since(self, version):
+        """Yield item `data` dicts whose version is newer than `version`."""
+        rows = self.conn.execute("SELECT data FROM items WHERE version > ? ORDER BY key", (version,))
+        for (data,) in rows:
+            yield json.loads(data)
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    # --- sync ---
+
+    def sync(self, client, workers=4):
+        """
+        Bring the mirror up to date with the library behind `client` (a ZoteroClient).
+
+        Returns:
+            dict: {"mode": "full" | "incremental", "updated": n, "deleted": n,
+                   "library_version": v}
+        """
+        since = self.library_version
+        if since is None:
+            return self._full_sync(client, workers)
+        return self._incremental_sync(client, since, workers)
+
+    def _full_sync(self, client, workers):
+        first = _get_json(client, "items", {"format": "json", "limit": PAGE_SIZE, "start": 0})
+        response, items = first
+        version = int(response.headers.get("Last-Modified-Version", 0))
+        total = int(response.headers.get("Total-Results", len(items)))
+        self._store([entry["data"] for entry in items])
+
+        starts = range(PAGE_SIZE, total, PAGE_SIZE)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            pages = pool.map(
+                lambda start: _get_json(client, "items", {"format": "json", "limit": PAGE_SIZE, "start": start})[1],
+                starts,
+            )
+            for page in pages:
+                self._store([entry["data"] for entry in page])
+        updated = self.count()
+
+        # Anything modified while we were paging is picked up from `version` onwards
+        self._store([], library_version=version)
+        result = self._incremental_sync(client, version, workers)
+        return {"mode": "full", "updated": updated + result["updated"],
+                "deleted": result["deleted"], "library_version": result["library_version"]}
+
+    def _incremental_sync(self, client, since, workers):
+        response, versions = _get_json(client, "items", {"since": since, "format": "versions"})
+        version = int(response.headers.get("Last-Modified-Version", since))
+        keys = sorted(versions)
+
+        batches = [keys[i:i + KEYS_PER_REQUEST] for i in range(0, len(keys), KEYS_PER_REQUEST)]
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            pages = pool.map(
+                # Zotero pages itemKey requests too (25 by default), so ask for all of them
+                lambda batch: _get_json(client, "items", {"itemKey": ",".join(batch), "format": "json",
+                                                          "limit": KEYS_PER_REQUEST})[1],
+                batches,
+            )
+            # Held until the one transaction that also moves the library version; after a long
+            # time offline that can be most of the library, so as compact records
+            changed = [ItemRecord.from_dict(entry["data"]) for page in pages for entry in page]
+
+        _, deleted = _get_json(client, "deleted", {"since": since})
+        deleted_keys = (deleted or {}).get("items", [])
+
+        self._store(changed, deleted_keys, library_version=version)
+        return {"mode": "incremental", "updated": len(changed), "deleted": len(deleted_keys),
+                "library_version": version}
+
+    def close(self):
+        self.conn.close()
+
+
+def _as_dict(item):
+    return item.to_dict() if isinstance(item, ItemRecord) else item
+
+
+def _get_json(client, path, params):
+    response, stats, error = client.get(path, params=params)
+    if response is None:
+        raise RuntimeError(f"[mirror] Network or connection error: {error}")
+    if not (200 <= response.status_code < 300):
+        raise RuntimeError(f"[mirror] GET {path} failed. Status: {response.status_code} {response.text[:200]}")
+    return response, response.json()
+
+
+def populate_dedup_index(mirror, dedup, chunk_size=500):
+    """
+    Record mirrored items in a dedup_index.DedupIndex, so items created outside
+    bibnow (Zotero desktop, browser connector) are also recognised. Only items
+    changed since the last call are added (the index remembers the library
+    version it was seeded to). Existing note paths in the index are kept.
+    Returns the number of items added.
+    """
+    since = dedup.seeded_version
+    items = mirror.iter_items() if since is None else mirror.changed_since(since)
+    count = 0
+    entries = []
+    for data in items:
+        if data.get("itemType") in ("attachment", "note", "annotation"):
+            continue
+        match = dedup.lookup(data)
+        entries.append((data, data["key"], match["note_path"] if match and match["zotero_key"] == data["key"] else None))
+        if len(entries) == chunk_size:
+            dedup.record_many(entries)
+            count += len(entries)
+            entries = []
+    dedup.record_many(entries)
+    count += len(entries)
+    if mirror.library_version is not None:
+        dedup.set_seeded_version(mirror.library_version)
+    return count
+
+
+def sync_library(client, dedup=None):
+    """
+    Bring the local mirror up to date, then add new library items to `dedup`
+    (if given). Returns the sync result (see LibraryMirror.sync) plus "indexed".
+    """
+    mirror = LibraryMirror()
+    try:
+        result = mirror.sync(client)
+        result["indexed"] = populate_dedup_index(mirror, dedup) if dedup is not None else 0
+    finally:
+        mirror.close()
+    return result
+
+
+def report_sync(result):
+    print(f"🔄 {result['mode'].capitalize()} sync: {result['updated']} item(s) updated, "
+          f"{result['deleted']} deleted. Library version {result['library_version']}.")
+    if result["indexed"]:
+        print(f"🧭 {result['indexed']} library item(s) added to the dedup index.")
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "sync"
+    if command == "sync":
+        dedup = None if "--no-dedup" in sys.argv else DedupIndex(DEDUP_INDEX_PATH)
+        report_sync(sync_library(get_client(), dedup))
+        if dedup is not None:
+            dedup.close()
+    mirror = LibraryMirror()
+    print(f"📚 Local mirror: {mirror.count()} item(s), library version {mirror.library_version}.")
@@ -0,0 +1,185 @@
+# zotero_schema.py
+
+# Usage:
+#   python3 zotero_schema.py              → Show which schema is in use and its item types
+#   python3 zotero_schema.py --refresh    → Fetch Zotero's current schema (only if it changed)
+#   python3 zotero_schema.py TYPE         → Fields, base fields and creator types of TYPE
+
+"""
+Zotero item-type schema: which fields and creator types each item type has,
+and which type-specific fields stand in for a base field (caseName is the
+title of a case, university the publisher of a thesis, …).
+
+The tables are compiled once, at import, from the first of:
+1. the copy fetched with --refresh (ZOTERO_SCHEMA_CACHE_PATH), and
+2. the snapshot bundled with bibnow (schema/zotero_schema.json).
+Both use the JSON layout of Zotero's GET /schema (`version`, `itemTypes`).
+The bundled snapshot has version 0, so a fetched schema always wins.
+
+--refresh sends the stored ETag as If-None-Match, so an unchanged schema
+costs one 304. Only `version` and `itemTypes` are kept, without locales, so
+the cache stays small and quick to load.
+
+All lookups are dict / frozenset probes on read-only tables:
+
+    SCHEMA.fields["case"]                    # frozenset of field names
+    SCHEMA.type_field("case", "title")       # "caseName"
+    SCHEMA.base_field("thesis", "university")  # "publisher"
+    SCHEMA.valid_creator_type("film", "author")  # "director" (the primary type)
+"""
+
+import json
+import os
+import sys
+import tempfile
+from types import MappingProxyType
+
+from config import BIBNOW_DATA_DIR, ZOTERO_API_URL
+
+SCHEMA_SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schema", "zotero_schema.json")
+ZOTERO_SCHEMA_CACHE_PATH = os.path.join(BIBNOW_DATA_DIR, "zotero_schema.json")
+FALLBACK_CREATOR_TYPE = "contributor"  # every regular item type has it
+
+
+class SchemaTables:
+    """
+    Frozen lookup tables compiled from a Zotero schema document.
+
+    Parameters:
+        schema (dict): Parsed schema JSON (`version`, `itemTypes`).
+        source (str): Where it was loaded from, for messages.
+    """
+
+    __slots__ = ("version", "source", "fields", "base_fields", "type_fields", "creator_types",
+                 "primary_creator_types")
+
+    def __init__(self, schema, source=""):
+        self.version = schema.get("version", 0)
+        self.source = source
+        fields, base_fields, type_fields, creator_types, primary = {}, {}, {}, {}, {}
+        for entry in schema.get("itemTypes", []):
+            item_type = entry["itemType"]
+            names = []
+            to_base = {}
+            for field in entry.get("fields", []):
+                names.append(field["field"])
+                if field.get("baseField"):
+                    to_base[field["field"]] = field["baseField"]
+            fields[item_type] = frozenset(names)
+            base_fields[item_type] = MappingProxyType(to_base)
+            type_fields[item_type] = MappingProxyType({base: name for name, base in to_base.items()})
+            roles = entry.get("creatorTypes", [])
+            creator_types[item_type] = frozenset(c["creatorType"] for c in roles)
+            primary[item_type] = next((c["creatorType"] for c in roles if c.get("primary")), None)
+        self.fields = MappingProxyType(fields)
+        self.base_fields = MappingProxyType(base_fields)
+        self.type_fields = MappingProxyType(type_fields)
+        self.creator_types = MappingProxyType(creator_types)
+        self.primary_creator_types = MappingProxyType(primary)
+
+    def has_field(self, item_type, field):
+        return field in self.fields.get(item_type, ())
+
+    def base_field(self, item_type, field):
+        """The base field a type-specific field maps to (university → publisher), or None."""
+        mapping = self.base_fields.get(item_type)
+        return mapping.get(field) if mapping else None
+
+    def type_field(self, item_type, base_field):
+        """The field that holds `base_field` for this item type (case: title → caseName), or None."""
+        mapping = self.type_fields.get(item_type)
+        return mapping.get(base_field) if mapping else None
+
+    def valid_creator_type(self, item_type, creator_type):
+        """
+        Return `creator_type` if the item type allows it. Otherwise return the
+        type's primary creator type for "author" (a film's director) and
+        "contributor" for anything else.
+        """
+        allowed = self.creator_types.get(item_type)
+        if not allowed or creator_type in allowed:
+            return creator_type
+        if creator_type == "author" and self.primary_creator_types.get(item_type):
+            return self.primary_creator_types[item_type]
+        return FALLBACK_CREATOR_TYPE
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_schema(cache_path=ZOTERO_SCHEMA_CACHE_PATH, snapshot_path=SCHEMA_SNAPSHOT_PATH):
+    """Compile the newest available schema (fetched copy, else bundled snapshot)."""
+    snapshot = _read_json(snapshot_path)
+    if snapshot is None:
+        raise RuntimeError(f"[schema] Bundled Zotero schema missing or unreadable: {snapshot_path}")
+    cached = _read_json(cache_path)
+    if cached and cached.get("schema", {}).get("version", 0) >= snapshot.get("version", 0):
+        return SchemaTables(cached["schema"], cache_path)
+    return SchemaTables(snapshot, snapshot_path)
+
+
+def refresh_schema(client=None, cache_path=ZOTERO_SCHEMA_CACHE_PATH, api_url=ZOTERO_API_URL):
+    """
+    Fetch Zotero's schema if it changed since the last refresh.
+
+    Returns:
+        tuple: (changed (bool), schema version or None, message)
+    """
+    if client is None:
+        from zotero_writer import get_client
+        client = get_client()
+    cached = _read_json(cache_path) or {}
+    headers = {"If-None-Match": cached["etag"]} if cached.get("etag") else {}
+    response, _stats, error = client.get(f"{api_url}/schema", headers=headers)
+    if response is None:
+        return False, None, f"could not reach Zotero: {error}"
+    if response.status_code == 304:
+        return False, cached["schema"].get("version"), "unchanged"
+    if response.status_code != 200:
+        return False, None, f"HTTP {response.status_code}"
+
+    schema = response.json()
+    document = {
+        "etag": response.headers.get("ETag"),
+        "schema": {"version": schema.get("version", 0), "itemTypes": schema.get("itemTypes", [])},
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(cache_path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(document, f, separators=(",", ":"), ensure_ascii=False)
+        os.replace(tmp, cache_path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return True, document["schema"]["version"], "updated"
+
+
+SCHEMA = load_schema()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if "--refresh" in args:
+        changed, version, message = refresh_schema()
+        print(f"{'✅' if changed else 'ℹ️'} Zotero schema {message}" + (f" (version {version})" if version is not None else ""))
+        sys.exit(0 if version is not None else 1)
+    if args:
+        item_type = args[0]
+        if item_type not in SCHEMA.fields:
+            print(f"❌ Unknown item type: {item_type}")
+            sys.exit(1)
+        print(f"{item_type} (schema version {SCHEMA.version})")
+        for field in sorted(SCHEMA.fields[item_type]):
+            base = SCHEMA.base_field(item_type, field)
+            print(f"  {field}" + (f" → {base}" if base else ""))
+        print("  creators: " + ", ".join(sorted(SCHEMA.creator_types[item_type])) +
+              f" (primary: {SCHEMA.primary_creator_types[item_type]})")
+    else:
+        print(f"📚 Zotero schema version {SCHEMA.version} from {SCHEMA.source}")
+        print(", ".join(sorted(SCHEMA.fields)))
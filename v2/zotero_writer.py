@@ -10,53 +10,170 @@ Assumptions:
    should be done in a separate utility (csl_mapper.py) for clarity and reuse.
 """
 
-import requests
-import json
-from config import ZOTERO_API_KEY, ZOTERO_USER_ID, ZOTERO_GROUP_ID, LIBRARY_TYPE
+import threading
+
+from config import (
+    ZOTERO_API_KEY, ZOTERO_USER_ID, ZOTERO_GROUP_ID, LIBRARY_TYPE, ZOTERO_API_URL,
+    ZOTERO_CONNECT_TIMEOUT, ZOTERO_READ_TIMEOUT, ZOTERO_MAX_RETRIES, ZOTERO_CONCURRENCY,
+    require_credentials
+)
 
 # Choose correct API base (user vs group)
 if LIBRARY_TYPE == "group":
-    API_BASE = f"https://api.zotero.org/groups/{ZOTERO_GROUP_ID}"
+    API_BASE = f"{ZOTERO_API_URL}/groups/{ZOTERO_GROUP_ID}"
 else:
-    API_BASE = f"https://api.zotero.org/users/{ZOTERO_USER_ID}"
+    API_BASE = f"{ZOTERO_API_URL}/users/{ZOTERO_USER_ID}"
 
 # Define base URL for Zotero item upload
 ZOTERO_BASE_URL = f"{API_BASE}/items"
 
-def send_to_zotero(csl_item):
+# Zotero's write API accepts at most 50 objects per request
+ZOTERO_MAX_BATCH_SIZE = 50
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client(pool_size=None):
+    """
+    Return the process-wide ZoteroClient (pooled keep-alive session), creating it on first use.
+    Credentials are checked, and the HTTP stack (requests) imported, only at that point.
+
+    Parameters:
+        pool_size (int): Requests the caller will run at once (e.g. --concurrency). The
+                         connection pool is grown to the largest size asked for.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            require_credentials()
+            from zotero_client import ZoteroClient
+            _client = ZoteroClient(
+                ZOTERO_API_KEY,
+                API_BASE,
+                timeout=(ZOTERO_CONNECT_TIMEOUT, ZOTERO_READ_TIMEOUT),
+                max_retries=ZOTERO_MAX_RETRIES,
+                pool_size=max(10, ZOTERO_CONCURRENCY, pool_size or 0),
+            )
+        elif pool_size and pool_size > _client.pool_size:
+            _client.resize_pool(pool_size)
+        return _client
+
+def send_to_zotero(csl_item, write_token=None):
     """
     Send a zotero-mapped bibliographic item to Zotero via their API.
 
     Parameters:
         csl_item (dict): A CSL-JSON bibliographic entry.
+        write_token (str): Optional Zotero-Write-Token; reuse one to retry a request
+                           without risk of creating its items twice. The client's own
+                           retries reuse it too. Either way, Zotero answers 412 if an
+                           earlier attempt went through; split_batch_response then
+                           reports the items as "committed", with their keys unknown.
 
     Returns:
         tuple: (status_code, response JSON or text)
     """
-    headers = {
-        "Zotero-API-Key": ZOTERO_API_KEY,
-        "Content-Type": "application/json"
-    }
-
     # Wrap CSL item in array — Zotero expects an array of items
     payload = csl_item if isinstance(csl_item, list) else [csl_item]
 
 #debug
 #    print("[DEBUG] Final payload:\n", json.dumps(payload, indent=2))
 
+    # Retries, Backoff/Retry-After handling and connection reuse live in the client;
+    # get_client().last_stats reports what this call cost.
+    status_code, content, _stats = get_client().post_items(payload, write_token)
+    return status_code, content
 
-    try:
-        response = requests.post(ZOTERO_BASE_URL, headers=headers, json=payload)
-    except requests.exceptions.RequestException as e:
-        return 0, {"error": "Network or connection error", "exception": str(e)}
 
-    # Attempt to parse response JSON or return raw text if malformed
+def chunk_items(items, size=ZOTERO_MAX_BATCH_SIZE):
+    """
+    Yield successive lists of at most `size` items from any iterable.
+
+    The size is clamped to Zotero's per-request limit of 50 objects.
+    """
+    size = max(1, min(int(size), ZOTERO_MAX_BATCH_SIZE))
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def split_batch_response(status_code, response_data, count):
+    """
+    Split a multi-object Zotero write response into one result per submitted item.
+
+    Zotero keys its response by the index of each object in the POSTed array:
+        {"successful": {"0": {"key": ...}}, "unchanged": {"1": "KEY"},
+         "failed": {"2": {"code": 400, "message": ...}}}
+
+    Parameters:
+        status_code (int): HTTP status code of the batch request.
+        response_data (dict or str): Response body from Zotero.
+        count (int): Number of items that were sent.
+
+    Returns:
+        list: `count` dicts of the form {"status", "key", "message"}, in input order.
+              status is one of "successful", "unchanged", "failed" or "committed"
+              (the request was already stored by an earlier attempt, e.g. one whose
+              answer was lost before the client retried; key None, so callers look
+              the items up, see batch_journal.resolve_committed_keys).
+    """
+    if status_code == 412:
+        # Writes always carry a Zotero-Write-Token and never a version precondition,
+        # so a 412 means this token was used before: the items exist
+        return [{"status": "committed", "key": None,
+                 "message": "Created by an earlier attempt of this request"} for _ in range(count)]
+    if not (200 <= status_code < 300) or not isinstance(response_data, dict):
+        _, explanation, _ = validate_zotero_response(status_code, response_data)
+        return [{"status": "failed", "key": None, "message": explanation} for _ in range(count)]
+
+    results = [{"status": "failed", "key": None, "message": "No result returned for item"}
+               for _ in range(count)]
+
+    for idx, entry in (response_data.get("successful") or {}).items():
+        key = entry.get("key") if isinstance(entry, dict) else entry
+        _set_result(results, idx, "successful", key, "Upload successful")
+
+    for idx, key in (response_data.get("unchanged") or {}).items():
+        _set_result(results, idx, "unchanged", key, "Item unchanged")
+
+    for idx, entry in (response_data.get("failed") or {}).items():
+        message = entry.get("message", "Unknown error") if isinstance(entry, dict) else str(entry)
+        key = entry.get("key") if isinstance(entry, dict) else None
+        _set_result(results, idx, "failed", key, f"Upload failed: {message}")
+
+    return results
+
+
+def _set_result(results, idx, status, key, message):
     try:
-        content = response.json()
-    except json.JSONDecodeError:
-        content = response.text
+        i = int(idx)
+    except (TypeError, ValueError):
+        return
+    if 0 <= i < len(results):
+        results[i] = {"status": status, "key": key, "message": message}
+
+
+def send_batch_to_zotero(zotero_items, write_token=None):
+    """
+    Send up to 50 zotero-mapped items to Zotero in a single POST.
 
-    return response.status_code, content
+    Parameters:
+        zotero_items (list): Zotero-mapped item dicts (at most ZOTERO_MAX_BATCH_SIZE).
+        write_token (str): Optional Zotero-Write-Token (see send_to_zotero).
+
+    Returns:
+        tuple: (status_code, response JSON or text, list of per-item results
+                as returned by split_batch_response)
+    """
+    if len(zotero_items) > ZOTERO_MAX_BATCH_SIZE:
+        raise ValueError(f"Zotero accepts at most {ZOTERO_MAX_BATCH_SIZE} items per request.")
+    status_code, response = send_to_zotero(list(zotero_items), write_token)
+    return status_code, response, split_batch_response(status_code, response, len(zotero_items))
 
 
 def validate_zotero_response(status_code, response_data):